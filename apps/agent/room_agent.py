@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Room agent: keeps the API informed about the presentation folder of a room PC
+
+Runs on the room PC itself, so the server never has to reach the share
+(works behind NAT and without ping/UNC access). Every interval the folder
+is listed, new or changed files are fingerprinted and the difference to
+the last acknowledged inventory is posted to POST /api/rooms/{id}/inventory.
+
+Only the standard library is used, so a stock Python 3.8+ install is enough:
+
+    python room_agent.py --api https://api.example.com --room-id 3 --folder C:\\Attachments
+
+The agent's state (last acknowledged inventory, batch sequence and any
+batch still waiting for an acknowledgement) is kept in a JSON file next to
+this script, so restarts only send what changed in the meantime.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+# Must stay in sync with RoomScanner.MEDIA_EXTENSIONS on the server
+MEDIA_EXTENSIONS = {
+    '.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm', '.m4v',
+    '.mp3', '.wav', '.aac', '.m4a', '.flac', '.ogg', '.wma',
+    '.ppt', '.pptx', '.pdf', '.doc', '.docx', '.key', '.odp'
+}
+
+# Must stay in sync with app/fingerprint.py on the server
+FINGERPRINT_CHUNK = 64 * 1024
+
+
+def fingerprint(path, size):
+    """Size plus a hash of the first and last 64 KB (see app/fingerprint.py)"""
+    with open(path, "rb") as f:
+        if size <= 2 * FINGERPRINT_CHUNK:
+            head, tail = f.read(size), b""
+        else:
+            head = f.read(FINGERPRINT_CHUNK)
+            f.seek(size - FINGERPRINT_CHUNK)
+            tail = f.read(FINGERPRINT_CHUNK)
+    digest = hashlib.blake2b(head, digest_size=16)
+    digest.update(tail)
+    return f"{size}:{digest.hexdigest()}"
+
+
+def scan(folder, previous):
+    """
+    List media files under folder
+
+    Returns:
+        Dict of "/"-separated relative path -> {"size", "mtime", "fingerprint"};
+        fingerprints of files with unchanged size and mtime are reused
+    """
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in MEDIA_EXTENSIONS:
+                continue
+            full_path = os.path.join(root, name)
+            rel_path = os.path.relpath(full_path, folder).replace(os.sep, "/")
+            try:
+                stat_info = os.stat(full_path)
+                old = previous.get(rel_path)
+                if old and old["size"] == stat_info.st_size and old["mtime"] == stat_info.st_mtime:
+                    file_fingerprint = old["fingerprint"]
+                else:
+                    file_fingerprint = fingerprint(full_path, stat_info.st_size)
+            except OSError as e:
+                # Still being copied or removed meanwhile; picked up next round
+                print(f"Skipping {full_path}: {e}")
+                continue
+            files[rel_path] = {
+                "size": stat_info.st_size,
+                "mtime": stat_info.st_mtime,
+                "fingerprint": file_fingerprint,
+            }
+    return files
+
+
+def entry(path, info):
+    return {"path": path, **info}
+
+
+def build_batch(state, current):
+    """Delta between the acknowledged inventory and the current listing, or a full listing"""
+    batch = {"agent_id": state["agent_id"], "seq": state["seq"] + 1, "full": state["needs_full"]}
+    if state["needs_full"]:
+        batch["added"] = [entry(p, i) for p, i in current.items()]
+        return batch
+
+    acked = state["files"]
+    batch["added"] = [entry(p, i) for p, i in current.items() if p not in acked]
+    batch["changed"] = [entry(p, i) for p, i in current.items() if p in acked and acked[p] != i]
+    batch["removed"] = [p for p in acked if p not in current]
+    return batch
+
+
+def post(url, token, payload, timeout):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json", "X-Agent-Token": token},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"agent_id": uuid.uuid4().hex, "seq": 0, "needs_full": True, "files": {}, "pending": None}
+
+
+def save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def run_once(args, state):
+    """Send the pending batch, or compute and send the next one. Returns True on acknowledgement."""
+    if state["pending"] is None:
+        current = scan(args.folder, state["files"])
+        batch = build_batch(state, current)
+        has_changes = batch["full"] or batch["added"] or batch["changed"] or batch["removed"]
+        if not has_changes and time.time() - state.get("last_sent", 0) < args.heartbeat:
+            return True
+        # Re-sent unchanged until acknowledged, so a lost response cannot skip changes
+        state["pending"] = {"batch": batch, "files": current}
+        save_state(args.state, state)
+
+    batch = state["pending"]["batch"]
+    url = f"{args.api.rstrip('/')}/api/rooms/{args.room_id}/inventory"
+    try:
+        result = post(url, args.token, batch, args.timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 409:
+            # Server lost track of us (new agent, missed batch): start over with a full listing
+            print(f"Server requested a full inventory: {e.read().decode(errors='replace')}")
+            state["needs_full"] = True
+            state["pending"] = None
+            save_state(args.state, state)
+        else:
+            print(f"Inventory push failed: HTTP {e.code}")
+        return False
+    except (urllib.error.URLError, OSError) as e:
+        print(f"Inventory push failed: {e}")
+        return False
+
+    state["seq"] = batch["seq"]
+    state["files"] = state["pending"]["files"]
+    state["needs_full"] = False
+    state["pending"] = None
+    state["last_sent"] = time.time()
+    save_state(args.state, state)
+    print(
+        f"Batch {batch['seq']} ({'full' if batch['full'] else 'delta'}): "
+        f"{result.get('matched_uploads', 0)} matched, {result.get('unmatched_files', 0)} unmatched"
+    )
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push the room's presentation folder inventory to the API")
+    parser.add_argument("--api", default=os.getenv("ROOM_AGENT_API"), required=not os.getenv("ROOM_AGENT_API"))
+    parser.add_argument("--room-id", type=int, default=os.getenv("ROOM_AGENT_ROOM_ID"),
+                        required=not os.getenv("ROOM_AGENT_ROOM_ID"))
+    parser.add_argument("--folder", default=os.getenv("ROOM_AGENT_FOLDER", r"C:\Attachments"))
+    parser.add_argument("--token", default=os.getenv("ROOM_AGENT_TOKEN"), required=not os.getenv("ROOM_AGENT_TOKEN"))
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between folder listings")
+    parser.add_argument("--heartbeat", type=float, default=60.0, help="Send an empty batch at least this often")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--state", default=None, help="State file (default: next to this script)")
+    parser.add_argument("--once", action="store_true", help="Push one batch and exit")
+    args = parser.parse_args()
+    if args.state is None:
+        args.state = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"room_agent_{args.room_id}.json")
+
+    state = load_state(args.state)
+    if args.once:
+        sys.exit(0 if run_once(args, state) else 1)
+
+    print(f"Room agent for room {args.room_id} watching {args.folder}")
+    while True:
+        run_once(args, state)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
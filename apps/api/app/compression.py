@@ -0,0 +1,106 @@
+# services/compression.py
+"""
+Content negotiation and compression of large response bodies
+
+Picks the encoding a client accepts (Accept-Encoding, with q-values): br when
+the brotli package is installed, gzip otherwise. Bodies below
+COMPRESSION_MIN_BYTES are sent as they are; the savings would not pay for
+the CPU and the header. Compressing a body above COMPRESSION_OFFLOAD_BYTES
+runs in the threadpool so the event loop keeps serving other requests.
+
+Used by response_cache.compressed() and response_cache.cached(), which
+keeps the compressed bytes so repeat polls are not compressed again.
+"""
+
+import functools
+import gzip
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import get_settings
+
+settings = get_settings()
+
+IDENTITY = "identity"
+
+# Request header compressed responses depend on
+VARY = "Accept-Encoding"
+
+
+@functools.lru_cache()
+def _brotli():
+    try:
+        import brotli  # optional; without it only gzip is offered
+    except ImportError:
+        return None
+    return brotli
+
+
+def available() -> tuple:
+    """Encodings this process can produce, preferred first"""
+    if not settings.COMPRESSION_ENABLED:
+        return ()
+    return ("br", "gzip") if _brotli() is not None else ("gzip",)
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """Encoding to answer with: the highest q the client accepts, br before gzip on a tie"""
+    if not accept_encoding:
+        return IDENTITY
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = IDENTITY, 0.0
+    for coding in available():
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    return body
+
+
+async def encode(body: bytes, encoding: str) -> tuple:
+    """
+    (body, encoding actually applied) for a response body
+
+    Bodies under COMPRESSION_MIN_BYTES stay uncompressed (identity).
+    """
+    if encoding == IDENTITY or len(body) < settings.COMPRESSION_MIN_BYTES:
+        return body, IDENTITY
+    if len(body) > settings.COMPRESSION_OFFLOAD_BYTES:
+        return await run_in_threadpool(compress, body, encoding), encoding
+    return compress(body, encoding), encoding
+
+
+def headers(encoding: str) -> Dict[str, str]:
+    """Headers of a response that depends on Accept-Encoding"""
+    if encoding == IDENTITY:
+        return {"Vary": VARY}
+    return {"Vary": VARY, "Content-Encoding": encoding}
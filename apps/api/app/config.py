@@ -15,6 +15,45 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str | None = None
 
+    # Connection pool (see db.py); profile is auto, lambda, server or test
+    DB_POOL_PROFILE: str = os.getenv("DB_POOL_PROFILE", "auto")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 10.0))
+    # Below MySQL's wait_timeout and the RDS Proxy idle client timeout
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 280))
+    # Lambda behind RDS Proxy: the proxy pools, so keep no idle connections here
+    DB_USE_RDS_PROXY: bool = os.getenv("DB_USE_RDS_PROXY", "false").lower() == "true"
+
+    # Lazy: nothing is connected or fetched until the first request (or a
+    # warm-up event) needs it; false warms the pool and clients at startup
+    LAZY_INIT: bool = os.getenv("LAZY_INIT", "true").lower() == "true"
+
+    # Optional read replica for get_read_db: a full URL, or a host reached with the primary's credentials
+    DATABASE_READ_URL: str | None = None
+    DB_READ_HOST: str | None = os.getenv("DB_READ_HOST")
+    # Replica lagging further behind is skipped until it catches up
+    DB_READ_MAX_LAG_SECONDS: float = float(os.getenv("DB_READ_MAX_LAG_SECONDS", 2.0))
+    DB_READ_HEALTH_INTERVAL_SECONDS: float = float(os.getenv("DB_READ_HEALTH_INTERVAL_SECONDS", 5.0))
+    # A client reads from the primary for this long after a write (keep above the max lag)
+    DB_WRITE_FENCE_SECONDS: float = float(os.getenv("DB_WRITE_FENCE_SECONDS", 5.0))
+
+    # Response cache of the polled event read endpoints (see response_cache.py): memory, redis or off
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    # Upper bound on staleness for changes made by other processes (memory backend) or to rooms/speakers
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 10.0))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    RESPONSE_CACHE_REDIS_URL: str = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Compression of the large JSON and CSV responses (see compression.py); br needs the brotli package
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+    # Larger bodies are compressed in the threadpool, off the event loop
+    COMPRESSION_OFFLOAD_BYTES: int = int(os.getenv("COMPRESSION_OFFLOAD_BYTES", 64 * 1024))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    # Brotli's default (11) is meant for static assets; 4-5 compresses better than gzip at similar speed
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
     cors_origins: list = ["http://localhost:3000", "http://localhost:8000"]
 
     STORAGE_BACKEND: str = "local"
@@ -22,6 +61,38 @@ class Settings(BaseSettings):
     S3_BUCKET: str | None = None
     S3_PREFIX: str = "uploads/"
 
+    # Filesystem watch mode for room shares mounted on the on-site server
+    ROOM_WATCH_ENABLED: bool = os.getenv("ROOM_WATCH_ENABLED", "false").lower() == "true"
+    ROOM_WATCH_DEBOUNCE_SECONDS: float = float(os.getenv("ROOM_WATCH_DEBOUNCE_SECONDS", 2.0))
+    ROOM_WATCH_MAX_DELAY_SECONDS: float = float(os.getenv("ROOM_WATCH_MAX_DELAY_SECONDS", 15.0))
+    ROOM_WATCH_POLL_SECONDS: float = float(os.getenv("ROOM_WATCH_POLL_SECONDS", 5.0))
+
+    # Remote (SFTP) scanning of room PCs
+    SFTP_PORT: int = int(os.getenv("SFTP_PORT", 22))
+    SFTP_CONNECT_TIMEOUT: float = float(os.getenv("SFTP_CONNECT_TIMEOUT", 10.0))
+    SFTP_POOL_SIZE: int = int(os.getenv("SFTP_POOL_SIZE", 2))
+    SFTP_IDLE_SECONDS: float = float(os.getenv("SFTP_IDLE_SECONDS", 300.0))
+    # Host keys of the room PCs (added to the system known_hosts); unknown hosts are refused
+    SFTP_KNOWN_HOSTS: str | None = os.getenv("SFTP_KNOWN_HOSTS")
+    # Accept any host key instead (only on a trusted event network)
+    SFTP_ALLOW_UNKNOWN_HOSTS: bool = os.getenv("SFTP_ALLOW_UNKNOWN_HOSTS", "false").lower() == "true"
+    SCAN_MAX_PARALLEL_ROOMS: int = int(os.getenv("SCAN_MAX_PARALLEL_ROOMS", 8))
+
+    # Concurrent scans of the same room share one result
+    SCAN_RESULT_CACHE_SECONDS: float = float(os.getenv("SCAN_RESULT_CACHE_SECONDS", 10.0))
+    SCAN_LOCK_TIMEOUT_SECONDS: int = int(os.getenv("SCAN_LOCK_TIMEOUT_SECONDS", 120))
+
+    # Shared secret room agents send as X-Agent-Token (unset: inventory pushes are refused)
+    ROOM_AGENT_TOKEN: str | None = os.getenv("ROOM_AGENT_TOKEN")
+
+    # Push-sync of presentations to room shares
+    SYNC_MAX_PARALLEL_FILES: int = int(os.getenv("SYNC_MAX_PARALLEL_FILES", 4))
+    SYNC_BLOCK_SIZE: int = int(os.getenv("SYNC_BLOCK_SIZE", 1024 * 1024))
+    SYNC_DELTA_MIN_BYTES: int = int(os.getenv("SYNC_DELTA_MIN_BYTES", 4 * 1024 * 1024))
+
+    # Hash whole files (not just first/last 64 KB) when fingerprinting
+    FINGERPRINT_FULL_HASH: bool = os.getenv("FINGERPRINT_FULL_HASH", "false").lower() == "true"
+
     @property
     def database_url(self) -> str:
         return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
@@ -1,25 +1,565 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+"""
+Database engine, connection pool and sessions
+
+All database access goes through one lazily created engine whose pool is
+chosen by deployment profile (DB_POOL_PROFILE, "auto" picks one):
+
+    lambda  one request per container at a time, reused across invocations:
+            a single pooled connection plus a little overflow for advisory
+            locks and background threads; with DB_USE_RDS_PROXY no
+            connection is kept idle, the proxy does the pooling
+    server  uvicorn / docker: a QueuePool of DB_POOL_SIZE connections plus
+            DB_MAX_OVERFLOW, recycled before MySQL or the proxy drop them
+    test    SQLite (DATABASE_URL=sqlite://...); an in-memory URL is backed
+            by a temporary file, shared by the sync and async engines
+
+The engine is only created on first use, so importing the app (a Lambda
+cold start) does not fetch the password from SSM or open a connection.
+
+pool_metrics() reports checkouts, connections in use (current and peak),
+how long requests waited for a connection and how long they held one; the
+same numbers are served at /api/health/pool. Size the pool so that waits
+stay near zero at peak: roughly peak requests per second times the mean
+hold time, plus headroom.
+
+async def endpoints use get_async_db / get_async_read_db, sessions of an
+async engine (aiomysql, aiosqlite for SQLite) with the same pool sizes;
+while they wait on MySQL no threadpool thread is held.
+
+With DATABASE_READ_URL (or DB_READ_HOST) a second engine points at a read
+replica. GET endpoints opt into it with get_read_db instead of get_db; it
+falls back to the primary while the replica is down or lagging, and for a
+client that has just written (see mark_write).
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from . import upsert
 from .config import get_settings
 
 settings = get_settings()
-# print("=== ACTIVE ENV FILE ===")
-# print(f"DATABASE_URL = {settings.database_url}")
-# print(f"ENVIRONMENT  = {settings.environment}")
-
-engine = create_engine(
-    settings.database_url,
-    echo=False,
-    pool_pre_ping=True
+
+Base = declarative_base()
+
+# Upper bounds (seconds) of the wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0, float("inf"))
+
+
+@lru_cache()
+def get_db_password() -> str:
+    """Database password: SSM Parameter Store in production, settings locally"""
+    if not settings.is_production:
+        return settings.MYSQL_PASSWORD
+    try:
+        import boto3
+
+        ssm = boto3.client("ssm", region_name=os.environ.get("AWS_REGION", "af-south-1"))
+        response = ssm.get_parameter(Name="/event-mgmt-api/db/password", WithDecryption=True)
+        return response["Parameter"]["Value"]
+    except Exception as e:
+        print(f"Error fetching password from SSM: {e}")
+        # Fallback to environment variable
+        return os.environ.get("DB_PASSWORD", "")
+
+
+def database_url(host: Optional[str] = None):
+    """DATABASE_URL if set, otherwise MySQL from DB_* (Lambda) or MYSQL_* (docker) settings"""
+    if settings.DATABASE_URL and host is None:
+        return make_url(settings.DATABASE_URL)
+    return URL.create(
+        "mysql+pymysql",
+        username=os.environ.get("DB_USER", settings.MYSQL_USER),
+        password=get_db_password(),
+        host=host or os.environ.get("DB_HOST", settings.MYSQL_HOST),
+        port=int(os.environ.get("DB_PORT", settings.MYSQL_PORT)),
+        database=os.environ.get("DB_NAME", settings.MYSQL_DB),
+        query={"charset": "utf8mb4"},
+    )
+
+
+def pool_profile(url) -> str:
+    profile = settings.DB_POOL_PROFILE.lower()
+    if profile != "auto":
+        return profile
+    if url.get_backend_name() == "sqlite":
+        return "test"
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return "lambda"
+    return "server"
+
+
+class PoolMetrics:
+    """Checkout, wait and hold statistics of one pool (thread-safe)"""
+
+    def __init__(self, profile: str):
+        self._lock = threading.Lock()
+        self.profile = profile
+        self.connects = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.checkins = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self, held: Optional[float]):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+            if held is not None:
+                self.hold_total += held
+                self.hold_max = max(self.hold_max, held)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            return {
+                "profile": self.profile,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(1000 * self.wait_total / waits, 3) if waits else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max, 3),
+                "wait_histogram": {
+                    ("inf" if bound == float("inf") else f"<={bound * 1000:g}ms"): count
+                    for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                },
+                "hold_avg_ms": round(1000 * self.hold_total / self.checkins, 3) if self.checkins else 0.0,
+                "hold_max_ms": round(1000 * self.hold_max, 3),
+            }
+
+
+class _MeteredPool:
+    """Pool mixin timing how long a checkout waits for a connection"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredNullPool(_MeteredPool, NullPool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _instrument(engine: Engine, metrics: PoolMetrics):
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        metrics.record_connect()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        metrics.record_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, record):
+        started = record.info.pop("checked_out_at", None)
+        metrics.record_checkin(time.perf_counter() - started if started is not None else None)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        metrics.record_invalidation()
+
+
+# Drivers of the async engine, by the sync engine's driver
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+@lru_cache()
+def _memory_database_file() -> str:
+    """
+    Temporary file standing in for an in-memory SQLite database
+
+    The sync (pysqlite) and async (aiosqlite) engines cannot share a
+    connection, and each connection to :memory: is a database of its own;
+    a file both open is the same database for every session. Removed at exit.
+    """
+    fd, path = tempfile.mkstemp(prefix="event-mgmt-", suffix=".db")
+    os.close(fd)
+    atexit.register(lambda: os.path.exists(path) and os.remove(path))
+    return path
+
+
+def create_pooled_engine(
+    url=None, profile: Optional[str] = None, name: str = "primary", asynchronous: bool = False
+):
+    """
+    An engine with the pool of the given (or detected) deployment profile
+
+    With asynchronous an AsyncEngine on the matching asyncio driver
+    (aiomysql, aiosqlite) with the same pool sizes.
+    """
+    url = make_url(url) if url is not None else database_url()
+    # Fail here rather than at the first write that needs a counter upsert
+    upsert.check_dialect(url.get_backend_name())
+    profile = profile or pool_profile(url)
+    queue_pool = MeteredAsyncQueuePool if asynchronous else MeteredQueuePool
+    options = {"echo": False}
+
+    if profile == "test":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # Every session, sync or async, has to see the same database
+            url = url.set(database=_memory_database_file())
+        options.update(poolclass=queue_pool, pool_size=5, max_overflow=10)
+    elif profile == "lambda":
+        options.update(
+            pool_pre_ping=True,
+            # aiomysql has no read/write timeouts
+            connect_args={"connect_timeout": 5} if asynchronous else
+            {"connect_timeout": 5, "read_timeout": 10, "write_timeout": 10},
+        )
+        if settings.DB_USE_RDS_PROXY:
+            options["poolclass"] = MeteredNullPool
+        else:
+            # Survives across warm invocations; the recycle covers connections
+            # that went stale while the container was frozen
+            options.update(
+                poolclass=queue_pool,
+                pool_size=1,
+                max_overflow=2,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+            )
+    elif profile == "server":
+        options.update(
+            poolclass=queue_pool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            pool_use_lifo=True,
+        )
+    else:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r} (auto, lambda, server or test)")
+
+    if asynchronous:
+        if url.drivername not in ASYNC_DRIVERS:
+            raise ValueError(f"No async driver for {url.drivername}")
+        engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[url.drivername]), **options)
+        _instrument(engine.sync_engine, PoolMetrics(profile))
+        name += ", async"
+    else:
+        engine = create_engine(url, **options)
+        _instrument(engine, PoolMetrics(profile))
+    print(f"Database engine created: {name} ({profile} profile, {type(engine.pool).__name__})")
+    return engine
+
+
+_engine: Optional[Engine] = None
+_read_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_async_read_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """The process-wide engine, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_pooled_engine()
+    return _engine
+
+
+def replica_configured() -> bool:
+    return bool(settings.DATABASE_READ_URL or settings.DB_READ_HOST)
+
+
+def get_read_engine() -> Optional[Engine]:
+    """The read replica's engine, or None without DATABASE_READ_URL / DB_READ_HOST"""
+    global _read_engine
+    if _read_engine is None and replica_configured():
+        with _engine_lock:
+            if _read_engine is None:
+                _read_engine = create_pooled_engine(read_url(), name="replica")
+    return _read_engine
+
+
+def read_url():
+    return settings.DATABASE_READ_URL or database_url(host=settings.DB_READ_HOST)
+
+
+def get_async_engine() -> AsyncEngine:
+    """The process-wide async engine (for async def endpoints), created on first use"""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_pooled_engine(asynchronous=True)
+    return _async_engine
+
+
+def get_async_read_engine() -> Optional[AsyncEngine]:
+    global _async_read_engine
+    if _async_read_engine is None and replica_configured():
+        with _engine_lock:
+            if _async_read_engine is None:
+                _async_read_engine = create_pooled_engine(read_url(), name="replica", asynchronous=True)
+    return _async_read_engine
+
+
+def dispose_engine():
+    """Close pooled connections (shutdown, or after fork)"""
+    for engine in (_engine, _read_engine):
+        if engine is not None:
+            engine.dispose()
+
+
+async def dispose_async_engine():
+    for engine in (_async_engine, _async_read_engine):
+        if engine is not None:
+            await engine.dispose()
+
+
+class ReplicaHealth:
+    """
+    Whether the replica may serve reads: reachable and at most
+    DB_READ_MAX_LAG_SECONDS behind
+
+    Checked at most every DB_READ_HEALTH_INTERVAL_SECONDS by whichever
+    request comes first; the others meanwhile go by the last result. Until
+    the first check succeeds reads stay on the primary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+
+    def check_due(self) -> bool:
+        return time.monotonic() - self.checked_at >= settings.DB_READ_HEALTH_INTERVAL_SECONDS
+
+    def is_healthy(self, engine: Engine) -> bool:
+        if self.check_due():
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._check(engine)
+                finally:
+                    self._lock.release()
+        return self.healthy
+
+    def mark_down(self, error: Exception):
+        """A replica query failed; read from the primary until the next check"""
+        self.healthy = False
+        self.error = str(error)
+        self.checked_at = time.monotonic()
+
+    def _check(self, engine: Engine):
+        try:
+            with engine.connect() as conn:
+                lag = replication_lag(conn)
+        except Exception as e:
+            print(f"Read replica unavailable, reading from primary: {e}")
+            self.mark_down(e)
+            return
+        self.lag_seconds = lag
+        self.error = None
+        self.healthy = lag is None or lag <= settings.DB_READ_MAX_LAG_SECONDS
+        self.checked_at = time.monotonic()
+        if not self.healthy:
+            print(f"Read replica {lag}s behind, reading from primary")
+
+    def snapshot(self) -> dict:
+        return {"healthy": self.healthy, "lag_seconds": self.lag_seconds, "error": self.error}
+
+
+def replication_lag(conn) -> Optional[float]:
+    """
+    Seconds the connected MySQL replica is behind its source
+
+    None when the lag cannot be read (not a binlog replica, e.g. Aurora,
+    or no REPLICATION CLIENT privilege); the replica is then trusted once
+    it answers. Raises when replication is stopped.
+    """
+    if conn.dialect.name != "mysql":
+        conn.execute(text("SELECT 1"))
+        return None
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(text(statement)).mappings().first()
+        except DBAPIError:
+            continue
+        if row is None:
+            return None
+        if row.get(column) is None:
+            raise RuntimeError("replication is not running")
+        return float(row[column])
+    conn.execute(text("SELECT 1"))
+    return None
+
+
+replica_health = ReplicaHealth()
+
+
+def _engine_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), overflow=pool.overflow(), idle=pool.checkedin())
+    stats.update(pool.metrics.snapshot())
+    return stats
+
+
+def pool_metrics() -> dict:
+    """
+    Live pool statistics (see module docstring); those of the replica and
+    of the async engines, once in use, under "replica", "async" and
+    "async_replica"
+    """
+    stats = _engine_stats(get_engine())
+    read_engine = get_read_engine()
+    if read_engine is not None:
+        stats["replica"] = {**_engine_stats(read_engine), **replica_health.snapshot()}
+    for key, engine in (("async", _async_engine), ("async_replica", _async_read_engine)):
+        if engine is not None:
+            stats[key] = _engine_stats(engine)
+    return stats
+
+
+def __getattr__(name):
+    # `from .db import engine` keeps working without creating the engine at import
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazyBind:
+    """Session factory mixin binding to an engine (the primary by default) on first use"""
+
+    def __init__(self, engine_factory=get_engine, **kw):
+        self._engine_factory = engine_factory
+        super().__init__(**kw)
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._engine_factory())
+        return super().__call__(**local_kw)
+
+
+class _LazySessionmaker(_LazyBind, sessionmaker):
+    pass
+
+
+class _LazyAsyncSessionmaker(_LazyBind, async_sessionmaker):
+    pass
+
+
+SessionLocal = _LazySessionmaker(
+    autocommit=False,
+    autoflush=False,
 )
 
-SessionLocal = sessionmaker(
+ReadSessionLocal = _LazySessionmaker(
+    get_read_engine,
     autocommit=False,
     autoflush=False,
-    bind=engine
+    info={"read_only": True},
 )
 
-Base = declarative_base()
+
+# Async sessions for async def endpoints; nothing is lazy-loaded there, so
+# objects stay readable after commit
+AsyncSessionLocal = _LazyAsyncSessionmaker(
+    get_async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+AsyncReadSessionLocal = _LazyAsyncSessionmaker(
+    get_async_read_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    info={"read_only": True},
+)
+
+
+@event.listens_for(Session, "before_flush", insert=True)
+def _refuse_replica_writes(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Session from get_read_db is read-only; use get_db for endpoints that write")
+
 
 def get_db():
     db = SessionLocal()
@@ -27,3 +567,91 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# --- Read/write routing ---
+# A client that wrote is fenced onto the primary for DB_WRITE_FENCE_SECONDS so
+# it reads its own writes however far the replica lags; mark_write stamps the
+# fence on responses to writes, as a cookie for browsers and a header that
+# other clients (room agents) can send back.
+WRITE_FENCE_COOKIE = "db_write_fence"
+WRITE_FENCE_HEADER = "X-Write-Fence"
+
+
+def mark_write(response):
+    """Fence the client of this (successful, writing) response onto the primary"""
+    if not replica_configured():
+        return
+    stamp = f"{time.time():.3f}"
+    response.headers[WRITE_FENCE_HEADER] = stamp
+    response.set_cookie(
+        WRITE_FENCE_COOKIE, stamp,
+        max_age=max(int(settings.DB_WRITE_FENCE_SECONDS), 1),
+        httponly=True,
+        # The web app is served from another site in production
+        secure=settings.is_production,
+        samesite="none" if settings.is_production else "lax",
+    )
+
+
+def _recently_wrote(request) -> bool:
+    stamp = request.headers.get(WRITE_FENCE_HEADER) or request.cookies.get(WRITE_FENCE_COOKIE)
+    if not stamp:
+        return False
+    try:
+        # abs: stamps from another server's clock may lie slightly ahead
+        return abs(time.time() - float(stamp)) < settings.DB_WRITE_FENCE_SECONDS
+    except ValueError:
+        return False
+
+
+def use_replica(request) -> bool:
+    read_engine = get_read_engine()
+    return read_engine is not None and not _recently_wrote(request) and replica_health.is_healthy(read_engine)
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: the replica when it is configured,
+    healthy and the client has not just written, the primary otherwise
+    """
+    if not use_replica(request):
+        yield from get_db()
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    except (OperationalError, InterfaceError) as e:
+        # Lost or unreachable replica: the next requests read from the primary
+        replica_health.mark_down(e)
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """
+    Async counterpart of get_read_db, for async def endpoints
+
+    Their requests wait on the database without holding a threadpool
+    thread, so concurrency is bounded by the pool rather than by threads.
+    """
+    read_engine = get_read_engine()
+    replica = False
+    if read_engine is not None and not _recently_wrote(request):
+        if replica_health.check_due():
+            # The health check is blocking; keep it off the event loop
+            await run_in_threadpool(replica_health.is_healthy, read_engine)
+        replica = replica_health.healthy
+    async with (AsyncReadSessionLocal() if replica else AsyncSessionLocal()) as db:
+        try:
+            yield db
+        except (OperationalError, InterfaceError) as e:
+            if replica:
+                replica_health.mark_down(e)
+            raise
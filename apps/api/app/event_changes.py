@@ -0,0 +1,207 @@
+# services/event_changes.py
+"""
+Which events a transaction changed
+
+Collects the ids of the events whose uploads, sessions, room or speaker
+assignments or stats rows a Session writes, through ORM flushes and Core or
+bulk statements alike, and hands them to the on_commit listeners once the
+transaction has committed. A rolled back transaction is forgotten.
+
+Changes to an event itself count for that event; changes to the shown
+details of a room or speaker (name, status, ...) count for the events the
+room or speaker takes part in.
+
+An UPDATE or DELETE counts for the events its WHERE clause narrows it to
+with event_id == ... or event_id IN (...). Statements that cannot be
+attributed to events (a bulk UPDATE by primary key, a DELETE by speaker,
+event_id != ...) count as ALL_EVENTS; callers that know the events can name
+them with execution_options(event_ids=...).
+"""
+
+import re
+from itertools import chain
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, ColumnElement
+
+from .models import Event, Room, Session as SessionModel, Speaker, Upload, event_rooms, event_speakers
+
+ALL_EVENTS = "*"
+
+WATCHED_TABLES = {"uploads", "sessions", "event_rooms", "event_speakers", "event_room_stats"}
+
+# Bound parameter names of event_id in compiled statements: SET / VALUES, multi-row VALUES
+_VALUE_PARAM = re.compile(r"event_id(_m\d+)?")
+
+# Room and speaker columns the event read endpoints show; scan results,
+# agent heartbeats and credentials change without affecting them
+SHOWN_COLUMNS = {
+    Room: ("name", "location", "capacity", "layout", "equipment", "status", "ip_address"),
+    Speaker: ("name", "title", "bio", "email"),
+}
+
+_commit_listeners: List[Callable[[Set], None]] = []
+
+
+def on_commit(listener: Callable[[Set], None]):
+    """Register listener(event_ids) to run after each commit that changed events"""
+    _commit_listeners.append(listener)
+    return listener
+
+
+def touched(session: Session) -> Set:
+    """Event ids (or ALL_EVENTS) changed so far in the session's transaction"""
+    return session.info.setdefault("touched_events", set())
+
+
+def _flatten(values: Iterable) -> Set:
+    out = set()
+    for value in values:
+        if isinstance(value, (list, tuple, set)):
+            out.update(value)
+        elif value is not None:
+            out.add(value)
+    return out
+
+
+def _is_event_id(element) -> bool:
+    return isinstance(element, ColumnElement) and getattr(element, "name", None) == "event_id"
+
+
+def _bound_values(bind: BindParameter, rows: List[dict]) -> Optional[Set]:
+    value = bind.effective_value
+    if value is None:
+        # bindparam() filled in per row by the execute() parameters
+        if not rows or any(bind.key not in row for row in rows):
+            return None
+        value = [row[bind.key] for row in rows]
+    return _flatten([value])
+
+
+def where_event_ids(clause, rows: List[dict]) -> Optional[Set]:
+    """
+    Events a WHERE clause limits rows to, or None when it does not
+
+    Only event_id == value and event_id IN (...) narrow; AND takes the
+    narrowest of its terms, OR needs every branch to narrow. Anything else
+    (!=, ranges, subqueries, other columns) could match any event.
+    """
+    if isinstance(clause, BooleanClauseList):
+        parts = [where_event_ids(c, rows) for c in clause.clauses]
+        if clause.operator is operators.and_:
+            narrowing = [p for p in parts if p is not None]
+            return set.intersection(*narrowing) if narrowing else None
+        if clause.operator is operators.or_ and parts and all(p is not None for p in parts):
+            return set().union(*parts)
+        return None
+    if not isinstance(clause, BinaryExpression):
+        return None
+    if clause.operator is operators.eq:
+        for column, bind in ((clause.left, clause.right), (clause.right, clause.left)):
+            if _is_event_id(column) and isinstance(bind, BindParameter):
+                return _bound_values(bind, rows)
+    elif clause.operator is operators.in_op:
+        if _is_event_id(clause.left) and isinstance(clause.right, BindParameter):
+            return _bound_values(clause.right, rows)
+    return None
+
+
+def statement_event_ids(state: ORMExecuteState) -> Set:
+    """Events a DML statement on a watched table writes, or {ALL_EVENTS}"""
+    statement = state.statement
+    rows = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+    try:
+        params = statement.compile().params
+    except Exception:
+        return {ALL_EVENTS}
+    values = _flatten(v for k, v in params.items() if _VALUE_PARAM.fullmatch(k))
+    values |= _flatten(row["event_id"] for row in rows if "event_id" in row)
+
+    if state.is_insert:
+        if getattr(statement, "select", None) is not None or not values:
+            return {ALL_EVENTS}
+        return values
+    # UPDATE / DELETE: only attributable when narrowed to events in the WHERE clause
+    where = where_event_ids(statement.whereclause, rows)
+    return where | values if where is not None else {ALL_EVENTS}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(state: ORMExecuteState):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    named = state.execution_options.get("event_ids")
+    if named is not None:
+        touched(state.session).update(named)
+        return
+    table = getattr(state.statement, "table", None)
+    if table is not None and getattr(table, "name", None) in WATCHED_TABLES:
+        touched(state.session).update(statement_event_ids(state))
+
+
+def _events_of(session: Session, model, ids: Set) -> Set:
+    """Events a room or speaker is assigned to or has uploads or sessions in"""
+    if model is Room:
+        sources = (
+            (event_rooms.c.event_id, event_rooms.c.room_id),
+            (Upload.event_id, Upload.room_id),
+            (SessionModel.event_id, SessionModel.room_id),
+        )
+    else:
+        sources = (
+            (event_speakers.c.event_id, event_speakers.c.speaker_id),
+            (Upload.event_id, Upload.speaker_id),
+            (SessionModel.event_id, SessionModel.speaker_id),
+        )
+    query = union(*(select(event_id).where(owner.in_(ids)) for event_id, owner in sources))
+    return {event_id for event_id, in session.connection().execute(query) if event_id is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context):
+    ids = touched(session)
+    changed = {Room: set(), Speaker: set()}
+    for obj in chain(session.new, session.deleted, session.dirty):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        if isinstance(obj, (Upload, SessionModel)):
+            # Old and new event of a moved row; without a loaded value it could be any
+            history = state.attrs.event_id.history
+            values = list(chain(history.added, history.unchanged, history.deleted))
+            ids.update((v for v in values if v is not None) if values else (ALL_EVENTS,))
+        elif isinstance(obj, Event):
+            ids.add(obj.id)
+        elif isinstance(obj, (Room, Speaker)):
+            history = state.attrs.events.history
+            ids.update(e.id for e in chain(history.added, history.deleted))
+            if obj in session.deleted:
+                # Its assignments may already be gone
+                ids.add(ALL_EVENTS)
+            elif obj not in session.new and any(
+                state.attrs[column].history.has_changes() for column in SHOWN_COLUMNS[type(obj)]
+            ):
+                changed[type(obj)].add(obj.id)
+    for model, model_ids in changed.items():
+        if model_ids:
+            ids.update(_events_of(session, model, model_ids))
+
+
+@event.listens_for(Session, "after_commit")
+def _notify(session: Session):
+    ids = session.info.pop("touched_events", None)
+    if not ids:
+        return
+    for listener in _commit_listeners:
+        try:
+            listener(ids)
+        except Exception as e:
+            print(f"Event change listener failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session: Session):
+    session.info.pop("touched_events", None)
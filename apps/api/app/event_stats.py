@@ -0,0 +1,127 @@
+# services/event_stats.py
+"""
+Materialized upload counters per event and room (event_room_stats)
+
+Every flush that inserts, changes or deletes Upload rows adds its deltas to
+the counters in the same transaction, so the stats page reads one row per
+room instead of every upload. Bulk statements bypass the ORM and have to
+call apply_deltas themselves (see room_inventory.write_back_uploads and
+delete_speaker); rebuild recomputes the counters from uploads.
+"""
+
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, inspect, insert, select
+from sqlalchemy.orm import Session
+
+from . import upsert
+from .models import EventRoomStats, Room, Upload
+
+# room_id used for uploads without a room
+UNASSIGNED_ROOM = 0
+
+StatsKey = Tuple[int, int]
+
+
+def new_deltas() -> Dict[StatsKey, list]:
+    """Accumulator of [total, uploaded, bytes] changes per (event_id, room_id)"""
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def add_upload(deltas: Dict[StatsKey, list], event_id, room_id, uploaded, size_bytes, sign: int = 1):
+    """Count one upload in (sign=1) or out of (sign=-1) its event and room"""
+    if event_id is None:
+        return
+    delta = deltas[(event_id, room_id or UNASSIGNED_ROOM)]
+    delta[0] += sign
+    delta[1] += sign if uploaded else 0
+    delta[2] += sign * (size_bytes or 0)
+
+
+def apply_deltas(db: Session, deltas: Dict[StatsKey, list]):
+    """Upsert counter changes; runs in the caller's transaction"""
+    rows = [
+        {"event_id": event_id, "room_id": room_id, "total": d[0], "uploaded": d[1], "bytes": d[2]}
+        for (event_id, room_id), d in sorted(deltas.items())
+        if any(d)
+    ]
+    upsert.increment(
+        db, EventRoomStats.__table__, rows,
+        keys=("event_id", "room_id"), counters=("total", "uploaded", "bytes"), touch=("updated_at",)
+    )
+
+
+def subtract_uploads(db: Session, *criteria):
+    """Count out the uploads matching criteria before a bulk DELETE removes them"""
+    deltas = new_deltas()
+    for event_id, room_id, uploaded, size_bytes in db.query(
+        Upload.event_id, Upload.room_id, Upload.uploaded, Upload.size_bytes
+    ).filter(*criteria).all():
+        add_upload(deltas, event_id, room_id, uploaded, size_bytes, sign=-1)
+    apply_deltas(db, deltas)
+
+
+def rebuild(db: Session, event_id: Optional[int] = None):
+    """Recompute the counters (of one event, or all) from the uploads table"""
+    table = EventRoomStats.__table__
+    clear = delete(table)
+    source = select(
+        Upload.event_id,
+        func.coalesce(Upload.room_id, UNASSIGNED_ROOM),
+        func.count(Upload.id),
+        func.sum(case((Upload.uploaded.is_(True), 1), else_=0)),
+        func.coalesce(func.sum(Upload.size_bytes), 0),
+    ).group_by(Upload.event_id, func.coalesce(Upload.room_id, UNASSIGNED_ROOM))
+    if event_id is not None:
+        clear = clear.where(table.c.event_id == event_id)
+        source = source.where(Upload.event_id == event_id)
+    db.execute(clear)
+    db.execute(insert(table).from_select(["event_id", "room_id", "total", "uploaded", "bytes"], source))
+
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(state.obj(), attr)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_upload_changes(session: Session, flush_context, instances):
+    deltas = new_deltas()
+    for obj in session.new:
+        if isinstance(obj, Upload):
+            add_upload(deltas, obj.event_id, obj.room_id, obj.uploaded, obj.size_bytes)
+    for obj in session.deleted:
+        if isinstance(obj, Upload):
+            state = inspect(obj)
+            add_upload(
+                deltas,
+                _old_value(state, "event_id"), _old_value(state, "room_id"),
+                _old_value(state, "uploaded"), _old_value(state, "size_bytes"),
+                sign=-1
+            )
+    for obj in session.dirty:
+        if not isinstance(obj, Upload):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[a].history.has_changes() for a in ("event_id", "room_id", "uploaded", "size_bytes")):
+            continue
+        add_upload(
+            deltas,
+            _old_value(state, "event_id"), _old_value(state, "room_id"),
+            _old_value(state, "uploaded"), _old_value(state, "size_bytes"),
+            sign=-1
+        )
+        add_upload(deltas, obj.event_id, obj.room_id, obj.uploaded, obj.size_bytes)
+    # Deleting a room nulls its uploads' room_id during the flush; move them to unassigned
+    room_ids = [obj.id for obj in session.deleted if isinstance(obj, Room)]
+    if room_ids:
+        for row in session.query(EventRoomStats).filter(EventRoomStats.room_id.in_(room_ids)).all():
+            for key, sign in (((row.event_id, row.room_id), -1), ((row.event_id, UNASSIGNED_ROOM), 1)):
+                delta = deltas[key]
+                delta[0] += sign * row.total
+                delta[1] += sign * row.uploaded
+                delta[2] += sign * row.bytes
+    apply_deltas(session, deltas)
@@ -0,0 +1,69 @@
+# services/event_versions.py
+"""
+Data version per event (event_versions), for ETags
+
+Every commit that changes an event's rows (see event_changes) increments the
+event's version in the same transaction; writes that cannot be attributed
+to events increment row 0, which is part of every event's version. Reading
+the version is a primary key lookup of two rows, so read endpoints can
+answer If-None-Match before running their queries (response_cache.conditional).
+
+Read in the endpoint's own transaction, the version belongs to the same
+snapshot (primary or replica) as the data the endpoint then reads.
+"""
+
+from typing import Iterable, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import event_changes, upsert
+from .models import EventVersion
+
+# Row counting writes to all events
+ALL_EVENTS_ROW = 0
+
+
+def bump(db: Session, event_ids: Iterable):
+    """Increment the versions of event_ids (ALL_EVENTS: row 0); runs in the caller's transaction"""
+    ids = sorted({ALL_EVENTS_ROW if e == event_changes.ALL_EVENTS else int(e) for e in event_ids})
+    if not ids:
+        return
+
+    # Through the connection: no ORM events while the session is committing
+    upsert.increment(
+        db.connection(), EventVersion.__table__, [{"event_id": event_id, "version": 1} for event_id in ids],
+        keys=("event_id",), counters=("version",)
+    )
+
+
+def _version_query(event_id: int):
+    return select(EventVersion.event_id, EventVersion.version).where(
+        EventVersion.event_id.in_((event_id, ALL_EVENTS_ROW))
+    )
+
+
+def _as_tuple(event_id: int, rows) -> Tuple[int, int]:
+    versions = dict(rows)
+    return versions.get(event_id, 0), versions.get(ALL_EVENTS_ROW, 0)
+
+
+def current(db: Session, event_id: int) -> Tuple[int, int]:
+    """(version of the event, version of all events)"""
+    return _as_tuple(event_id, db.execute(_version_query(event_id)).all())
+
+
+async def current_async(db: AsyncSession, event_id: int) -> Tuple[int, int]:
+    return _as_tuple(event_id, (await db.execute(_version_query(event_id))).all())
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session):
+    if session.info.get("read_only"):
+        return
+    # before_commit runs ahead of the final flush; flush now so its changes are counted
+    session.flush()
+    ids = session.info.get("touched_events")
+    if ids:
+        bump(session, ids)
@@ -0,0 +1,168 @@
+"""
+Query plan regression check for the hot router queries.
+
+Runs EXPLAIN on each query in HOT_QUERIES and fails when one of them reads
+a large table (uploads, sessions, ...) with a full table scan, i.e. when an
+index from models.py / migrate.py is missing or no longer matches the
+query shape.
+
+Run from apps/api against a scratch database:
+    DATABASE_URL=mysql+pymysql://... python -m app.explain_check --seed
+
+--seed creates missing tables and fills an empty database with synthetic
+rows first; plans on near-empty tables say little, as the optimizer
+prefers scanning a handful of rows over any index.
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, select, text
+
+from . import db
+from .models import (
+    Attendee, Base, Device, Event, EventRoomStats, MatchMemory, Room, RoomFile, Session, Speaker, Upload,
+)
+
+# Tables that grow with every event; a full scan of one of these fails the check
+CHECKED_TABLES = {"uploads", "sessions", "devices", "event_room_stats", "room_files", "match_memory"}
+
+DAY = datetime(2026, 5, 4)
+
+# (name, statement) pairs mirroring the queries of the routers and services
+HOT_QUERIES = [
+    ("event sessions by day (events.get_event_sessions)",
+     select(Upload.id).where(Upload.event_id == 1, Upload.session_date == DAY)
+     .order_by(Upload.session_time, Upload.id)),
+    ("manifest page (files.manifest)",
+     select(Upload.id, Upload.filename).where(Upload.event_id == 1, Upload.id > 100)
+     .order_by(Upload.id).limit(100)),
+    ("event speaker counts (events.get_event_speakers)",
+     select(Upload.speaker_id, func.count(Upload.id), func.sum(case((Upload.uploaded.is_(True), 1), else_=0)))
+     .where(Upload.event_id == 1).group_by(Upload.speaker_id)),
+    ("room scan uploads (room_inventory.load_room_uploads)",
+     select(Upload.id).where(Upload.room_id == 1, Upload.event_id == 1, Upload.session_date == DAY)),
+    ("room presentations (rooms.list_room_presentations)",
+     select(Upload.id, Upload.filename).where(Upload.room_id == 1).order_by(Upload.id).limit(100)),
+    ("speaker sessions (speakers.get_speaker_sessions)",
+     select(Upload.id).where(Upload.speaker_id == 1, Upload.event_id == 1)),
+    ("attendee uploads (attendees.get_attendee)",
+     select(Upload.id).where(Upload.attendee_id == 1).order_by(Upload.updated_at.desc())),
+    ("room sessions (events.get_room_sessions)",
+     select(Session.id).where(Session.event_id == 1, Session.room_id == 1).order_by(Session.start_time)),
+    ("device by name (devices.heartbeat)",
+     select(Device.id).where(Device.name == "device-1")),
+    ("event stats (events.get_event_stats)",
+     select(EventRoomStats.room_id, EventRoomStats.total).where(EventRoomStats.event_id == 1)),
+    ("room counts (rooms.list_rooms)",
+     select(EventRoomStats.room_id, func.sum(EventRoomStats.total))
+     .where(EventRoomStats.room_id.in_([1, 2, 3])).group_by(EventRoomStats.room_id)),
+    ("room inventory (room_inventory.update_inventory)",
+     select(RoomFile.id).where(RoomFile.room_id == 1)),
+    ("match memory (match_memory.recall)",
+     select(MatchMemory.file_path).where(MatchMemory.room_id == 1)),
+]
+
+
+def seed(engine, uploads=20000):
+    """Create missing tables and fill an empty database with synthetic rows"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(Upload.__table__)).scalar():
+            print("Database already has uploads, not seeding")
+            return
+        rng = random.Random(42)
+        events, rooms, speakers, attendees = 20, 100, 2000, 500
+        conn.execute(insert(Event.__table__), [
+            {"title": f"Event {i}", "start_time": DAY, "end_time": DAY + timedelta(days=3)} for i in range(events)
+        ])
+        conn.execute(insert(Room.__table__), [{"name": f"Room {i}", "status": "offline"} for i in range(rooms)])
+        conn.execute(insert(Speaker.__table__), [{"name": f"Speaker {i}"} for i in range(speakers)])
+        conn.execute(insert(Attendee.__table__), [
+            {"name": f"Attendee {i}", "email": f"a{i}@example.com"} for i in range(attendees)
+        ])
+        conn.execute(insert(Upload.__table__), [
+            {
+                "event_id": rng.randint(1, events),
+                "speaker_id": rng.randint(1, speakers),
+                "attendee_id": rng.randint(1, attendees) if rng.random() < 0.3 else None,
+                "room_id": rng.randint(1, rooms) if rng.random() < 0.9 else None,
+                "session_date": DAY + timedelta(days=rng.randint(0, 2)),
+                "session_time": (DAY + timedelta(minutes=30 * rng.randint(16, 36))).time(),
+                "filename": f"talk_{i}.pptx",
+                "size_bytes": rng.randint(10_000, 50_000_000),
+                "uploaded": rng.random() < 0.7,
+                "updated_at": DAY - timedelta(minutes=i),
+            }
+            for i in range(uploads)
+        ])
+        conn.execute(insert(Session.__table__), [
+            {
+                "event_id": rng.randint(1, events),
+                "room_id": rng.randint(1, rooms),
+                "session_name": f"Session {i}",
+                "start_time": DAY + timedelta(minutes=30 * i % 4320),
+                "end_time": DAY + timedelta(minutes=30 * i % 4320 + 30),
+            }
+            for i in range(uploads // 4)
+        ])
+        conn.execute(insert(Device.__table__), [{"name": f"device-{i}"} for i in range(uploads // 40)])
+        conn.execute(insert(RoomFile.__table__), [
+            {"room_id": rng.randint(1, rooms), "file_path": f"d/talk_{i}.pptx", "filename": f"talk_{i}.pptx"}
+            for i in range(uploads // 4)
+        ])
+        conn.execute(insert(MatchMemory.__table__), [
+            {"room_id": rng.randint(1, rooms), "file_path": f"d/talk_{i}.pptx", "upload_id": i + 1}
+            for i in range(uploads // 10)
+        ])
+        conn.execute(text("""
+            INSERT INTO event_room_stats (event_id, room_id, total, uploaded, bytes, updated_at)
+            SELECT event_id, COALESCE(room_id, 0), COUNT(*),
+                   SUM(CASE WHEN uploaded THEN 1 ELSE 0 END), COALESCE(SUM(size_bytes), 0), CURRENT_TIMESTAMP
+            FROM uploads
+            GROUP BY event_id, COALESCE(room_id, 0)
+        """))
+    with engine.connect() as conn:
+        for table in sorted(CHECKED_TABLES):
+            conn.execute(text(f"ANALYZE TABLE {table}" if engine.dialect.name == "mysql" else f"ANALYZE {table}"))
+        conn.commit()
+    print(f"✓ Seeded {uploads} uploads")
+
+
+def full_scans(conn, statement):
+    """Plan lines that read a checked table in full"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        plan = [row.detail for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        return [line for line in plan if line.startswith("SCAN ") and line.split()[1] in CHECKED_TABLES]
+    plan = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return [
+        f"{row['table']}: type={row['type']} rows={row['rows']}"
+        for row in plan if row["type"] == "ALL" and row["table"] in CHECKED_TABLES
+    ]
+
+
+def run(database_url=None, do_seed=False) -> bool:
+    """database_url defaults to the app's database (db.database_url)"""
+    engine = db.create_pooled_engine(database_url, name="explain check")
+    if do_seed:
+        seed(engine)
+    ok = True
+    with engine.connect() as conn:
+        for name, statement in HOT_QUERIES:
+            scans = full_scans(conn, statement)
+            if scans:
+                ok = False
+                print(f"✗ {name}: full scan ({'; '.join(scans)})")
+            else:
+                print(f"✓ {name}")
+    print("\nAll hot queries use an index." if ok else "\nFull table scans found; check the indexes in migrate.py.")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot queries and fail on full table scans")
+    parser.add_argument("--seed", action="store_true", help="Create tables and seed an empty database first")
+    args = parser.parse_args()
+    sys.exit(0 if run(do_seed=args.seed) else 1)
@@ -3,10 +3,103 @@
 Smart file matching between scanned files and upload records
 """
 
-from typing import List, Tuple, Optional
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple, Optional, Union
 from difflib import SequenceMatcher
 from pathlib import Path
 
+# Fuzzy candidates scored per scanned file, best trigram overlap first
+SHORTLIST_SIZE = 50
+
+
+def _trigrams(normalized: str) -> set:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MatcherIndex:
+    """
+    Lookup structures over a room's uploads, built once per scan
+
+    Holds the normalized upload names, exact fingerprint/name/size maps and
+    a trigram inverted index, so each scanned file is only compared with a
+    short list of plausible uploads instead of all of them.
+    """
+
+    def __init__(self, uploads: List):
+        self.uploads = list(uploads)
+        self.normalized = [FileMatcher.normalize_filename(u.filename) for u in self.uploads]
+        self.by_fingerprint: Dict[str, int] = {}
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        self.by_size: Dict[int, List[int]] = defaultdict(list)
+        self.by_trigram: Dict[str, List[int]] = defaultdict(list)
+
+        for i, upload in enumerate(self.uploads):
+            fingerprint = getattr(upload, 'fingerprint', None)
+            if fingerprint:
+                self.by_fingerprint.setdefault(fingerprint, i)
+            self.by_name[self.normalized[i]].append(i)
+            if upload.size_bytes:
+                self.by_size[upload.size_bytes].append(i)
+            for trigram in _trigrams(self.normalized[i]):
+                self.by_trigram[trigram].append(i)
+
+    def candidates(self, normalized: str, file_size: Optional[int]) -> List[int]:
+        """Indexes of uploads worth scoring for a scanned file, in upload order"""
+        shared: Dict[int, int] = defaultdict(int)
+        for trigram in _trigrams(normalized):
+            for i in self.by_trigram.get(trigram, ()):
+                shared[i] += 1
+        shortlist = set(sorted(shared, key=lambda i: (-shared[i], i))[:SHORTLIST_SIZE])
+
+        # Always score same-name and same-size uploads, they can win on the size bonus
+        shortlist.update(self.by_name.get(normalized, ()))
+        if file_size:
+            shortlist.update(self.by_size.get(file_size, ()))
+        return sorted(shortlist)
+
+    def match(self, scanned_file: dict, threshold: float = 0.6, exclude: Iterable[int] = ()) -> Optional[int]:
+        """Best upload id for a scanned file (see FileMatcher.match_file_to_upload)"""
+        exclude = set(exclude)
+        # An identical fingerprint is an exact match regardless of filename
+        fingerprint = scanned_file.get('fingerprint')
+        if fingerprint and fingerprint in self.by_fingerprint:
+            upload_id = self.uploads[self.by_fingerprint[fingerprint]].id
+            if upload_id not in exclude:
+                return upload_id
+
+        normalized = FileMatcher.normalize_filename(scanned_file['filename'])
+        file_size = scanned_file.get('file_size')
+
+        best_match = None
+        best_score = 0.0
+
+        # Same argument order as calculate_similarity (scanned name first)
+        sequence = SequenceMatcher(None, normalized)
+        for i in self.candidates(normalized, file_size):
+            upload = self.uploads[i]
+            if upload.id in exclude:
+                continue
+            sequence.set_seq2(self.normalized[i])
+            # Cheap upper bounds first; ratio() is the expensive part
+            if sequence.real_quick_ratio() < threshold or sequence.quick_ratio() < threshold:
+                continue
+            similarity = sequence.ratio()
+
+            # Bonus for exact file size match
+            size_bonus = 0.0
+            if upload.size_bytes and file_size:
+                if upload.size_bytes == file_size:
+                    size_bonus = 0.2
+
+            total_score = similarity + size_bonus
+
+            if total_score > best_score and similarity >= threshold:
+                best_score = total_score
+                best_match = upload.id
+
+        return best_match
+
 
 class FileMatcher:
     """Match scanned files to upload records"""
@@ -27,37 +120,94 @@ class FileMatcher:
         return SequenceMatcher(None, norm1, norm2).ratio()
     
     @staticmethod
-    def match_file_to_upload(scanned_file: dict, uploads: List, threshold: float = 0.6) -> Optional[int]:
+    def build_index(uploads: List) -> MatcherIndex:
+        """Index uploads once for matching many scanned files against them"""
+        return MatcherIndex(uploads)
+    
+    @staticmethod
+    def match_file_to_upload(
+        scanned_file: dict,
+        uploads: Union[List, MatcherIndex],
+        threshold: float = 0.6
+    ) -> Optional[int]:
         """
         Match a scanned file to an upload record
         
         Args:
-            scanned_file: Dict with 'filename' and 'file_size'
-            uploads: List of upload objects
+            scanned_file: Dict with 'filename', 'file_size' and optionally 'fingerprint'
+            uploads: List of upload objects, or a MatcherIndex from build_index
+                     when matching many files against the same uploads
             threshold: Minimum similarity score (0-1)
             
         Returns:
             upload_id if match found, None otherwise
         """
-        best_match = None
-        best_score = 0.0
+        if not isinstance(uploads, MatcherIndex):
+            uploads = MatcherIndex(uploads)
+        return uploads.match(scanned_file, threshold)
+    
+    @staticmethod
+    def match_batch(
+        scanned_files: List[dict],
+        uploads: List,
+        threshold: float = 0.6
+    ) -> List[Optional[Tuple[int, float]]]:
+        """
+        Match many scanned files at once, each upload to at most one file
         
-        scanned_filename = scanned_file['filename']
+        Only the MatcherIndex shortlist of each file is scored, with the same
+        name similarity as match_file_to_upload plus the usual size bonus;
+        equal fingerprints always win. The scored pairs are kept sparse and
+        assigned best pair first (ties in file order, then upload order), so
+        a file does not take an upload another file matches better.
         
-        for upload in uploads:
-            # Calculate filename similarity
-            similarity = FileMatcher.calculate_similarity(scanned_filename, upload.filename)
-            
-            # Bonus for exact file size match
-            size_bonus = 0.0
-            if upload.size_bytes and scanned_file.get('file_size'):
-                if upload.size_bytes == scanned_file['file_size']:
-                    size_bonus = 0.2
+        Args:
+            scanned_files: Dicts with 'filename', 'file_size' and optionally 'fingerprint'
+            uploads: List of upload objects
+            threshold: Minimum name similarity (0-1) for a fuzzy pair
             
-            total_score = similarity + size_bonus
+        Returns:
+            List aligned with scanned_files of (upload_id, confidence) or None
+        """
+        results: List[Optional[Tuple[int, float]]] = [None] * len(scanned_files)
+        if not scanned_files or not uploads:
+            return results
+        
+        index = MatcherIndex(uploads)
+        by_fingerprint: Dict[str, List[int]] = defaultdict(list)
+        for col, upload in enumerate(index.uploads):
+            if getattr(upload, 'fingerprint', None):
+                by_fingerprint[upload.fingerprint].append(col)
+        
+        # (score, row, col, similarity) of every eligible pair
+        pairs = []
+        for row, scanned_file in enumerate(scanned_files):
+            file_size = scanned_file.get('file_size')
+            exact = set(by_fingerprint.get(scanned_file.get('fingerprint') or '', ()))
+            for col in exact:
+                size_bonus = 0.2 if file_size and index.uploads[col].size_bytes == file_size else 0.0
+                pairs.append((2.0 + size_bonus, row, col, 1.0))
             
-            if total_score > best_score and similarity >= threshold:
-                best_score = total_score
-                best_match = upload.id
+            normalized = FileMatcher.normalize_filename(scanned_file['filename'])
+            sequence = SequenceMatcher(None, normalized)
+            for col in index.candidates(normalized, file_size):
+                if col in exact:
+                    continue
+                sequence.set_seq2(index.normalized[col])
+                # Cheap upper bounds first; ratio() is the expensive part
+                if sequence.real_quick_ratio() < threshold or sequence.quick_ratio() < threshold:
+                    continue
+                similarity = sequence.ratio()
+                if similarity < threshold:
+                    continue
+                size_bonus = 0.2 if file_size and index.uploads[col].size_bytes == file_size else 0.0
+                pairs.append((similarity + size_bonus, row, col, similarity))
         
-        return best_match
\ No newline at end of file
+        pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+        used_cols = set()
+        for _, row, col, similarity in pairs:
+            if results[row] is not None or col in used_cols:
+                continue
+            used_cols.add(col)
+            results[row] = (index.uploads[col].id, round(similarity, 3))
+        return results
@@ -0,0 +1,82 @@
+# services/fingerprint.py
+"""
+Cheap content fingerprints for matching scanned files to uploads
+
+A fingerprint is the file size plus a hash of the first and last 64 KB,
+so it costs at most two small reads even for multi-GB videos. A full
+content hash can be enabled with FINGERPRINT_FULL_HASH for exact
+matching of files that only differ in the middle.
+"""
+
+import hashlib
+from typing import BinaryIO, Optional, Tuple
+
+from .config import get_settings
+
+FINGERPRINT_CHUNK = 64 * 1024
+FULL_HASH_BLOCK = 1024 * 1024
+
+
+def _full_hash_enabled(full_hash: Optional[bool]) -> bool:
+    if full_hash is None:
+        return get_settings().FINGERPRINT_FULL_HASH
+    return full_hash
+
+
+def _format(size: int, head: bytes, tail: bytes) -> str:
+    digest = hashlib.blake2b(head, digest_size=16)
+    digest.update(tail)
+    return f"{size}:{digest.hexdigest()}"
+
+
+def fingerprint_bytes(data: bytes, full_hash: Optional[bool] = None) -> Tuple[str, Optional[str]]:
+    """
+    Fingerprint an in-memory file
+
+    Returns:
+        (fingerprint, content_hash) - content_hash is None unless full hashing is enabled
+    """
+    size = len(data)
+    if size <= 2 * FINGERPRINT_CHUNK:
+        head, tail = data, b""
+    else:
+        head, tail = data[:FINGERPRINT_CHUNK], data[-FINGERPRINT_CHUNK:]
+
+    content_hash = hashlib.sha256(data).hexdigest() if _full_hash_enabled(full_hash) else None
+    return _format(size, head, tail), content_hash
+
+
+def fingerprint_stream(f: BinaryIO, size: int, full_hash: Optional[bool] = None) -> Tuple[str, Optional[str]]:
+    """
+    Fingerprint a seekable binary file object of known size
+
+    Works for local files as well as remote ones (e.g. paramiko SFTPFile).
+    """
+    if size <= 2 * FINGERPRINT_CHUNK:
+        head, tail = f.read(size), b""
+    else:
+        head = f.read(FINGERPRINT_CHUNK)
+        f.seek(size - FINGERPRINT_CHUNK)
+        tail = f.read(FINGERPRINT_CHUNK)
+
+    content_hash = None
+    if _full_hash_enabled(full_hash):
+        f.seek(0)
+        sha = hashlib.sha256()
+        while True:
+            block = f.read(FULL_HASH_BLOCK)
+            if not block:
+                break
+            sha.update(block)
+        content_hash = sha.hexdigest()
+
+    return _format(size, head, tail), content_hash
+
+
+def fingerprint_file(file_path, full_hash: Optional[bool] = None) -> Tuple[str, Optional[str]]:
+    """Fingerprint a file on the local filesystem"""
+    with open(file_path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        return fingerprint_stream(f, size, full_hash)
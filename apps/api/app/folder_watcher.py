@@ -0,0 +1,475 @@
+# services/folder_watcher.py
+"""
+Filesystem watch mode for room shares mounted on the on-site server
+
+Uses inotify on Linux (through libc, no extra dependency) and falls back to
+polling where inotify is unavailable or blind: network mounts such as CIFS
+or NFS only report changes made by the local machine.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .room_scanner import RoomScanner
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+    | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+
+# Filesystems where inotify does not see changes made by other machines
+NETWORK_FILESYSTEMS = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "fuse.sshfs", "9p"}
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# A change is (path, removed); a path of None means "rescan everything"
+Change = Tuple[Optional[str], bool]
+
+
+def _mount_fstype(path: str) -> Optional[str]:
+    """Filesystem type of the mount containing path (Linux only)"""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype
+
+
+class InotifyBackend:
+    """Recursive inotify watches on Linux"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_paths: Dict[int, str] = {}
+
+    @staticmethod
+    def is_available() -> bool:
+        if platform.system().lower() != "linux":
+            return False
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return False
+        return hasattr(ctypes.CDLL(libc_name), "inotify_init1")
+
+    def has_watches(self) -> bool:
+        return bool(self._wd_paths)
+
+    def add_tree(self, root: str) -> List[str]:
+        """Watch root and every directory below it, returning the files found"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                print(f"inotify_add_watch failed for {dirpath}: errno {ctypes.get_errno()}")
+                continue
+            self._wd_paths[wd] = dirpath
+            files.extend(os.path.join(dirpath, name) for name in filenames)
+        return files
+
+    def remove_tree(self, root: str):
+        prefix = root.rstrip(os.sep) + os.sep
+        for wd, path in list(self._wd_paths.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._wd_paths[wd]
+
+    def read(self, timeout: float) -> List[Change]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changes: List[Change] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Kernel queue overflowed, events were lost
+                changes.append((None, False))
+                continue
+            if mask & IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+
+            base = self._wd_paths.get(wd)
+            if base is None or not name:
+                continue
+            path = os.path.join(base, os.fsdecode(name))
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Watch the new directory and pick up files copied in before the watch existed
+                    changes.extend((file_path, False) for file_path in self.add_tree(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    changes.append((path, True))
+                continue
+
+            changes.append((path, bool(mask & (IN_DELETE | IN_MOVED_FROM))))
+        return changes
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """Periodic (size, mtime) snapshots for filesystems inotify cannot watch"""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._snapshots: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._next_poll = 0.0
+
+    @staticmethod
+    def _snapshot(root: str) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat_info = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat_info.st_size, stat_info.st_mtime_ns)
+        return snapshot
+
+    def has_watches(self) -> bool:
+        return bool(self._snapshots)
+
+    def add_tree(self, root: str) -> List[str]:
+        self._snapshots[root] = self._snapshot(root)
+        return list(self._snapshots[root])
+
+    def remove_tree(self, root: str):
+        self._snapshots.pop(root, None)
+
+    def read(self) -> List[Change]:
+        """Walk the watched trees if the poll interval has elapsed"""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return []
+        self._next_poll = now + self.interval
+
+        changes: List[Change] = []
+        for root, old in list(self._snapshots.items()):
+            new = self._snapshot(root)
+            changes.extend((path, False) for path, sig in new.items() if old.get(path) != sig)
+            changes.extend((path, True) for path in old.keys() - new.keys())
+            self._snapshots[root] = new
+        return changes
+
+
+class FolderWatcher:
+    """
+    Watch room folders and report debounced change batches
+
+    on_changes(room_id, changed_files, removed_paths, full) is called from the
+    watcher thread. changed_files are RoomScanner file dicts; full=True means
+    changed_files is the complete folder content (initial sync or after lost
+    events).
+    """
+
+    def __init__(
+        self,
+        on_changes: Callable[[int, List[dict], List[str], bool], None],
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 15.0,
+        poll_seconds: float = 5.0,
+        use_inotify: Optional[bool] = None
+    ):
+        self.on_changes = on_changes
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+        if use_inotify is None:
+            use_inotify = InotifyBackend.is_available()
+        self._inotify = InotifyBackend() if use_inotify else None
+        self._polling = PollingBackend(poll_seconds)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._roots: Dict[int, str] = {}
+        self._backends: Dict[int, object] = {}
+        self._known: Dict[int, Set[str]] = {}
+        self._pending: Dict[int, Dict[str, bool]] = {}
+        self._full_rescan: Set[int] = set()
+        self._first_event: Dict[int, float] = {}
+        self._last_event: Dict[int, float] = {}
+
+    # ---- watch management ----
+
+    def watched_rooms(self) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._roots)
+
+    def watch(self, room_id: int, folder_path: str):
+        with self._lock:
+            if self._roots.get(room_id) == folder_path:
+                return
+            self._unwatch(room_id)
+
+            backend = self._polling
+            if self._inotify and _mount_fstype(folder_path) not in NETWORK_FILESYSTEMS:
+                backend = self._inotify
+            backend.add_tree(folder_path)
+
+            self._roots[room_id] = folder_path
+            self._backends[room_id] = backend
+            self._known[room_id] = set()
+            # Initial sync of the inventory, flushed on the next tick
+            self._full_rescan.add(room_id)
+            now = time.monotonic()
+            self._first_event[room_id] = now - self.max_delay_seconds
+            self._last_event[room_id] = now - self.debounce_seconds
+            print(f"Watching room {room_id}: {folder_path} ({type(backend).__name__})")
+
+    def unwatch(self, room_id: int):
+        with self._lock:
+            self._unwatch(room_id)
+
+    def _unwatch(self, room_id: int):
+        root = self._roots.pop(room_id, None)
+        if root is None:
+            return
+        self._backends.pop(room_id).remove_tree(root)
+        for state in (self._known, self._pending, self._first_event, self._last_event):
+            state.pop(room_id, None)
+        self._full_rescan.discard(room_id)
+
+    # ---- event loop ----
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._inotify:
+            self._inotify.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once(timeout=0.5)
+            except Exception as e:
+                print(f"Folder watcher error: {e}")
+                self._stop.wait(1.0)
+
+    def poll_once(self, timeout: float = 0.0):
+        """Collect pending events and flush rooms whose batch is ready"""
+        with self._lock:
+            use_inotify = self._inotify is not None and self._inotify.has_watches()
+        if use_inotify:
+            changes = self._inotify.read(timeout)
+        else:
+            self._stop.wait(timeout)
+            changes = []
+
+        with self._lock:
+            changes.extend(self._polling.read())
+            now = time.monotonic()
+            for path, removed in changes:
+                if path is None:
+                    self._rescan_all(now)
+                    continue
+                room_id = self._room_for_path(path)
+                if room_id is None:
+                    continue
+                self._pending.setdefault(room_id, {})[path] = removed
+                self._first_event.setdefault(room_id, now)
+                self._last_event[room_id] = now
+
+            ready = [
+                room_id for room_id in set(self._pending) | self._full_rescan
+                if now - self._last_event.get(room_id, now) >= self.debounce_seconds
+                or now - self._first_event.get(room_id, now) >= self.max_delay_seconds
+            ]
+            batches = [(room_id, self._take_batch(room_id)) for room_id in ready]
+
+        for room_id, (pending, full) in batches:
+            self._flush(room_id, pending, full)
+
+    def _rescan_all(self, now: float):
+        for room_id, backend in self._backends.items():
+            if backend is self._inotify:
+                self._full_rescan.add(room_id)
+                self._first_event.setdefault(room_id, now)
+                self._last_event[room_id] = now
+
+    def _room_for_path(self, path: str) -> Optional[int]:
+        best_room, best_len = None, -1
+        for room_id, root in self._roots.items():
+            if (path == root or path.startswith(root.rstrip(os.sep) + os.sep)) and len(root) > best_len:
+                best_room, best_len = room_id, len(root)
+        return best_room
+
+    def _take_batch(self, room_id: int) -> Tuple[Dict[str, bool], bool]:
+        pending = self._pending.pop(room_id, {})
+        full = room_id in self._full_rescan
+        self._full_rescan.discard(room_id)
+        self._first_event.pop(room_id, None)
+        self._last_event.pop(room_id, None)
+        return pending, full
+
+    def _flush(self, room_id: int, pending: Dict[str, bool], full: bool):
+        with self._lock:
+            root = self._roots.get(room_id)
+            known = self._known.get(room_id)
+        if root is None or known is None:
+            return
+
+        changed_files: List[dict] = []
+        removed_paths: List[str] = []
+
+        if full:
+            try:
+                changed_files = RoomScanner.scan_folder(root)
+            except Exception as e:
+                print(f"Room {room_id}: full rescan of {root} failed: {e}")
+                return
+            known.clear()
+            known.update(f["file_path"] for f in changed_files)
+        else:
+            for path, removed in pending.items():
+                if removed or not os.path.exists(path):
+                    # A removed directory takes every known file below it along
+                    prefix = path.rstrip(os.sep) + os.sep
+                    gone = [p for p in known if p == path or p.startswith(prefix)]
+                    known.difference_update(gone)
+                    removed_paths.extend(gone)
+                    continue
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    info = RoomScanner.describe_file(path)
+                except OSError:
+                    continue
+                if info:
+                    known.add(path)
+                    changed_files.append(info)
+
+        if not (full or changed_files or removed_paths):
+            return
+        try:
+            self.on_changes(room_id, changed_files, removed_paths, full)
+        except Exception as e:
+            print(f"Room {room_id}: applying watched changes failed, scheduling rescan: {e}")
+            with self._lock:
+                if room_id in self._roots:
+                    now = time.monotonic()
+                    self._full_rescan.add(room_id)
+                    self._first_event.setdefault(room_id, now)
+                    self._last_event[room_id] = now
+
+
+class RoomWatchService:
+    """Keep a FolderWatcher in sync with rooms that have a local attachment_folder"""
+
+    REFRESH_SECONDS = 60
+
+    def __init__(self, session_factory, settings):
+        self._session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.watcher = FolderWatcher(
+            self._apply_changes,
+            debounce_seconds=settings.ROOM_WATCH_DEBOUNCE_SECONDS,
+            max_delay_seconds=settings.ROOM_WATCH_MAX_DELAY_SECONDS,
+            poll_seconds=settings.ROOM_WATCH_POLL_SECONDS,
+        )
+
+    def start(self):
+        self.refresh_rooms()
+        self.watcher.start()
+        self._thread = threading.Thread(target=self._refresh_loop, name="room-watch-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.watcher.stop()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.REFRESH_SECONDS):
+            try:
+                self.refresh_rooms()
+            except Exception as e:
+                print(f"Room watch refresh failed: {e}")
+
+    def refresh_rooms(self):
+        """Watch rooms whose attachment_folder is mounted here, drop the rest"""
+        from .models import Room
+
+        db = self._session_factory()
+        try:
+            rooms = db.query(Room.id, Room.attachment_folder).filter(Room.attachment_folder.isnot(None)).all()
+        finally:
+            db.close()
+
+        wanted = {room_id: folder for room_id, folder in rooms if folder and os.path.isdir(folder)}
+        for room_id in set(self.watcher.watched_rooms()) - set(wanted):
+            self.watcher.unwatch(room_id)
+        for room_id, folder in wanted.items():
+            self.watcher.watch(room_id, folder)
+
+    def _apply_changes(self, room_id: int, changed_files: List[dict], removed_paths: List[str], full: bool):
+        from .room_inventory import match_scanned_files
+
+        db = self._session_factory()
+        try:
+            result = match_scanned_files(db, room_id, changed_files, removed_paths, full=full)
+            db.commit()
+            print(
+                f"Room {room_id}: {len(changed_files)} changed, {len(removed_paths)} removed, "
+                f"{len(result['matches'])} matched"
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
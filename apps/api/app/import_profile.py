@@ -0,0 +1,83 @@
+"""
+Import-time profile of the API (the cold-start share spent importing)
+
+Imports app.main in a fresh interpreter with -X importtime and reports the
+total, the slowest modules and the time per top-level package. Fails when
+the total exceeds the budget or when a module that must stay lazy (boto3,
+paramiko, ... see DEFERRED_MODULES) was imported.
+
+Run from apps/api:
+    python -m app.import_profile                  report, 1500 ms budget
+    python -m app.import_profile --budget-ms 1000 --top 30
+
+Numbers vary between runs and machines; compare against a budget with
+headroom and rerun before chasing a small overshoot.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+DEFAULT_BUDGET_MS = 1500
+
+# Imported on first use only; any of these at import time is a regression
+DEFERRED_MODULES = ("boto3", "botocore", "paramiko", "numpy", "aiomysql", "aiosqlite", "redis", "watchdog", "brotli")
+
+
+def profile(module: str = "app.main") -> List[Tuple[str, int, int, int]]:
+    """(module, self µs, cumulative µs, nesting depth) for every import made by importing module"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Importing {module} failed")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def report(rows, budget_ms: float, top: int) -> bool:
+    # Top-level entries are the imports made directly by the profiled module
+    # or its parents; together they are the whole import
+    total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Import of app.main: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)\n")
+    print("Slowest modules (cumulative):")
+    for name, _, cumulative, _ in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print("\nBy package (self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    ok = True
+    eager = sorted({name.split(".")[0] for name, *_ in rows} & set(DEFERRED_MODULES))
+    if eager:
+        ok = False
+        print(f"\n✗ Imported at startup but should be deferred: {', '.join(eager)}")
+    if total_ms > budget_ms:
+        ok = False
+        print(f"\n✗ Over budget by {total_ms - budget_ms:.0f} ms")
+    if ok:
+        print("\n✓ Within budget, heavy modules deferred.")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report and budget the import time of app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum total import time")
+    parser.add_argument("--top", type=int, default=20, help="Number of modules and packages listed")
+    args = parser.parse_args()
+    sys.exit(0 if report(profile(), args.budget_ms, args.top) else 1)
@@ -0,0 +1,163 @@
+# services/listing.py
+"""
+Shared paging and field selection for list endpoints
+
+List endpoints accept ?limit=, ?cursor= and ?fields=. Pages are cut with
+keyset pagination: rows come in a fixed order ending in a unique column
+and the cursor holds the ordering values of the last row served, so a page
+is one indexed range read however deep the client has paged, and rows
+inserted meanwhile neither repeat nor go missing. When more rows follow,
+the cursor for the next page is returned in the X-Next-Cursor header; the
+body keeps its plain list shape.
+
+Without limit the whole (filtered) list is returned as before.
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, false, inspect, or_
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (column, descending) pairs; the last one must be unique (usually the primary key)
+Ordering = Sequence[Tuple[Any, bool]]
+
+
+class ListParams:
+    """Paging and projection requested by the client (see list_params)"""
+
+    def __init__(self, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    def select(self, available: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The requested subset of available (output name -> column)
+
+        Returns None when no fields were requested, so the endpoint can keep
+        its full representation.
+        """
+        if not self.fields:
+            return None
+        unknown = [f for f in self.fields if f not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+            )
+        return {name: available[name] for name in dict.fromkeys(self.fields)}
+
+
+def list_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated field names"),
+) -> ListParams:
+    """FastAPI dependency for the common list query parameters"""
+    return ListParams(limit, cursor, fields)
+
+
+def model_fields(model) -> Dict[str, Any]:
+    """Column attributes of a model by name, for ListParams.select"""
+    return {attr.key: getattr(model, attr.key) for attr in inspect(model).mapper.column_attrs}
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        kind, text = next(iter(value.items()))
+        return {"dt": datetime.fromisoformat, "d": date.fromisoformat, "t": time.fromisoformat}[kind](text)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_decode_value(v) for v in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError, KeyError, StopIteration):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(ordering: Ordering, values: Sequence):
+    """Rows strictly after values in the ordering (NULLs sort first ascending, as in MySQL)"""
+    alternatives = []
+    for i, ((column, descending), value) in enumerate(zip(ordering, values)):
+        earlier_equal = [
+            prev.is_(None) if prev_value is None else prev == prev_value
+            for (prev, _), prev_value in zip(ordering[:i], values[:i])
+        ]
+        if value is None:
+            beyond = false() if descending else column.is_not(None)
+        elif descending:
+            beyond = or_(column < value, column.is_(None))
+        else:
+            beyond = column > value
+        alternatives.append(and_(*earlier_equal, beyond))
+    return or_(*alternatives)
+
+
+def _page_query(query, params: ListParams, ordering: Ordering):
+    """The query (Query or select) ordered, continued after the cursor and limited, and its own width"""
+    width = len(query.column_descriptions)
+    query = query.add_columns(*[column.label(f"_cursor_{i}") for i, (column, _) in enumerate(ordering)])
+    if params.cursor:
+        query = query.filter(_after(ordering, decode_cursor(params.cursor, len(ordering))))
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in ordering])
+    if params.limit is not None:
+        query = query.limit(params.limit + 1)
+    return query, width
+
+
+def _cut_page(rows, params: ListParams, width: int, response: Response) -> list:
+    if params.limit is not None and len(rows) > params.limit:
+        rows = rows[:params.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1][width:])
+    return [row[0] if width == 1 else tuple(row[:width]) for row in rows]
+
+
+def paginate(query, params: ListParams, ordering: Ordering, response: Response) -> list:
+    """
+    Order the query, continue after the cursor and cut one page
+
+    Returns rows in the shape the query produces them (entities for a
+    single-entity query, tuples otherwise) and sets X-Next-Cursor on the
+    response when there are more.
+    """
+    query, width = _page_query(query, params, ordering)
+    return _cut_page(query.all(), params, width, response)
+
+
+async def paginate_async(db, statement, params: ListParams, ordering: Ordering, response: Response) -> list:
+    """paginate for a select() statement run on an AsyncSession"""
+    statement, width = _page_query(statement, params, ordering)
+    return _cut_page((await db.execute(statement)).all(), params, width, response)
+
+
+def as_dicts(names: Sequence[str], rows: List) -> List[dict]:
+    """Rows of a projected query (see ListParams.select) as dicts"""
+    if len(names) == 1:
+        return [{names[0]: row} for row in rows]
+    return [dict(zip(names, row)) for row in rows]
@@ -1,21 +1,22 @@
 from fastapi import FastAPI, Request
-from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from .routers import auth, events, files, devices, speakers, rooms, attendees, admin_users
 from .config import get_settings
+from .schemas import HealthOut, MetricsOut, RootOut
+from .response_cache import cache_stats
+from .db import WRITE_FENCE_HEADER, dispose_async_engine, dispose_engine, get_engine, mark_write, pool_metrics
+from sqlalchemy import text
 import os
-import boto3
-import pymysql
-from contextlib import contextmanager
-from typing import Generator
-from functools import lru_cache
 
 settings = get_settings()
 
 app = FastAPI(
     title="Event Management API",
     version="0.1.0",
-    redirect_slashes=True
+    redirect_slashes=True,
+    # Response models are serialized by pydantic-core, the JSON written by orjson
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -44,100 +45,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor", "ETag", WRITE_FENCE_HEADER],  # "*" is not honoured for credentialed requests
 )
 
-# --- Database Connection Management ---
-_db_password = None
-_db_connection = None
-
-
-@lru_cache()
-def get_db_password():
-    """Get database password from SSM Parameter Store (cached)"""
-    from .config import get_settings
-    settings = get_settings()
-    
-    # In production, get from SSM
-    if settings.is_production:
-        try:
-            ssm = boto3.client("ssm", region_name=os.environ.get("AWS_REGION", "af-south-1"))
-            response = ssm.get_parameter(
-                Name="/event-mgmt-api/db/password",
-                WithDecryption=True
-            )
-            return response['Parameter']['Value']
-        except Exception as e:
-            print(f"Error fetching password from SSM: {e}")
-            # Fallback to environment variable
-            return os.environ.get("DB_PASSWORD", "")
-    else:
-        # Local development
-        return settings.MYSQL_PASSWORD
-
-
-def init_db_connection():
-    """Initialize database connection (reused across Lambda invocations)"""
-    global _db_connection
-    
-    if _db_connection is None or not _db_connection.open:
-        try:
-            # Get password
-            password = get_db_password()
-            
-            _db_connection = pymysql.connect(
-                host=os.environ.get("DB_HOST", os.environ.get("MYSQL_HOST", "localhost")),
-                user=os.environ.get("DB_USER", os.environ.get("MYSQL_USER", "appuser")),
-                password=password,
-                database=os.environ.get("DB_NAME", os.environ.get("MYSQL_DB", "eventdb")),
-                port=int(os.environ.get("DB_PORT", "3306")),
-                connect_timeout=5,
-                read_timeout=10,
-                write_timeout=10,
-                autocommit=False,
-                charset='utf8mb4'
-            )
-            print("Database connection established")
-        except Exception as e:
-            print(f"Error connecting to database: {e}")
-            raise
-    
-    return _db_connection
-
-@contextmanager
-def get_db_connection() -> Generator[pymysql.connections.Connection, None, None]:
-    """
-    Context manager for database connections.
-    Reuses existing connection and handles ping/reconnection.
-    """
-    conn = init_db_connection()
-    
-    # Ping to check if connection is alive, reconnect if needed
-    try:
-        conn.ping(reconnect=True)
-    except Exception as e:
-        print(f"Connection ping failed, reconnecting: {e}")
-        conn = init_db_connection()
-    
-    try:
-        yield conn
-    except Exception as e:
-        conn.rollback()
-        print(f"Database error, rolling back: {e}")
-        raise
-    else:
-        conn.commit()
-
-
-@contextmanager
-def get_db_cursor(cursor_type=pymysql.cursors.DictCursor):
-    """Context manager for database cursor."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor(cursor_type)
-        try:
-            yield cursor
-        finally:
-            cursor.close()
+
+# Clients that just wrote read from the primary (see db.get_read_db)
+@app.middleware("http")
+async def write_fence(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_write(response)
+    return response
 
 # --- Include Routers ---
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -149,33 +67,58 @@ app.include_router(rooms.router, prefix="/api/rooms", tags=["rooms"])
 app.include_router(attendees.router, prefix="/api/attendees", tags=["attendees"])
 app.include_router(admin_users.router, prefix="/api/admin/users", tags=["admin-users"])
 
-# --- DEBUG: print all routes and methods ---
-for route in app.routes:
-    if isinstance(route, APIRoute): 
-        print(route.path, route.methods)
+# --- Room share watcher (on-site server with mounted shares) ---
+@app.on_event("startup")
+def start_room_watcher():
+    if settings.ROOM_WATCH_ENABLED:
+        from .folder_watcher import RoomWatchService
+        from .db import SessionLocal
+        app.state.room_watcher = RoomWatchService(SessionLocal, settings)
+        app.state.room_watcher.start()
+
+
+@app.on_event("shutdown")
+def stop_room_watcher():
+    watcher = getattr(app.state, "room_watcher", None)
+    if watcher:
+        watcher.stop()
+
+
+# --- Lazy initialization (see warmup.py) ---
+@app.on_event("startup")
+def warm_up_on_startup():
+    if not settings.LAZY_INIT:
+        from .warmup import warm_up
+        warm_up()
+
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    dispose_engine()
+    await dispose_async_engine()
+
 
 # --- Health Check Endpoints ---
 @app.get("/")
-async def root():
+async def root() -> RootOut:
     return {
         "message": "API is running",
         "environment": settings.environment
     }
 
 
-@app.get("/api/health")
-def health():
+@app.get("/api/health", response_model_exclude_unset=True)
+def health() -> HealthOut:
     """Basic health check"""
     return {"status": "ok"}
 
 
-@app.get("/api/health/db")
-def health_db():
+@app.get("/api/health/db", response_model_exclude_unset=True)
+def health_db() -> HealthOut:
     """Health check with database connectivity test"""
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
         return {
             "status": "ok",
             "database": "connected"
@@ -188,6 +131,35 @@ def health_db():
         }
 
 
+@app.get("/api/health/pool")
+def health_pool() -> MetricsOut:
+    """Connection pool checkout/wait statistics, for sizing DB_POOL_SIZE"""
+    return pool_metrics()
+
+
+@app.get("/api/health/cache")
+def health_cache() -> MetricsOut:
+    """Response cache size and hit/miss counts"""
+    return cache_stats()
+
+
 # --- Lambda Handler ---
+# Mangum would run startup and shutdown around every invocation, closing the
+# pool each time; on Lambda the pool lives as long as the container instead.
 from mangum import Mangum
-handler = Mangum(app)
\ No newline at end of file
+_mangum = Mangum(app, lifespan="off")
+
+if not settings.LAZY_INIT and os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+    # Init phase: connect before the first request arrives
+    from .warmup import warm_up
+    warm_up()
+
+
+def handler(event, context):
+    from .warmup import is_warmup_event, warm_up
+
+    if is_warmup_event(event):
+        import asyncio
+
+        return warm_up(loop=asyncio.get_event_loop())
+    return _mangum(event, context)
\ No newline at end of file
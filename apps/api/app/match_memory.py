@@ -0,0 +1,131 @@
+# services/match_memory.py
+"""
+Remembered file-to-upload assignments per room
+
+When a tech confirms a match or assigns a file by hand, the assignment is
+stored by room, path and fingerprint. Later scans look files up here
+before any other matching, so on show days most files resolve with one
+query per scan. An entry is dropped when its upload is deleted or when the
+upload's file, name or room changes.
+"""
+
+from typing import Dict, List, Optional
+from datetime import date
+
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.orm import Session
+
+from .models import MatchMemory, Upload
+
+# Upload attributes whose change makes a remembered assignment doubtful
+_IDENTITY_ATTRS = ("filename", "room_id")
+# Content attributes; only a change of an existing value counts (not the first fill-in)
+_CONTENT_ATTRS = ("fingerprint", "content_hash")
+
+
+def remember(
+    db: Session,
+    room_id: int,
+    file_path: str,
+    fingerprint: Optional[str],
+    upload_id: int,
+    source: str = "confirmed"
+) -> MatchMemory:
+    """Store (or replace) the assignment of a file on a room's share"""
+    entry = db.query(MatchMemory).filter(
+        MatchMemory.room_id == room_id,
+        MatchMemory.file_path == file_path
+    ).first()
+    if entry is None:
+        entry = MatchMemory(room_id=room_id, file_path=file_path)
+        db.add(entry)
+    entry.fingerprint = fingerprint
+    entry.upload_id = upload_id
+    entry.source = source
+    return entry
+
+
+def forget(db: Session, room_id: int, file_path: str) -> bool:
+    """Drop the remembered assignment of a file. Returns whether there was one."""
+    return db.query(MatchMemory).filter(
+        MatchMemory.room_id == room_id,
+        MatchMemory.file_path == file_path
+    ).delete(synchronize_session=False) > 0
+
+
+def recall(
+    db: Session,
+    room_id: int,
+    scanned_files: List[dict],
+    event_id: Optional[int] = None,
+    session_date: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Remembered assignments for scanned files
+
+    A file is recognised by fingerprint wherever it now lives, or by path
+    as long as its content did not change since it was assigned.
+
+    Returns:
+        Dict mapping file_path to upload_id
+    """
+    if not scanned_files:
+        return {}
+    query = db.query(MatchMemory.file_path, MatchMemory.fingerprint, MatchMemory.upload_id).filter(
+        MatchMemory.room_id == room_id
+    )
+    if event_id or session_date:
+        query = query.join(Upload, Upload.id == MatchMemory.upload_id)
+        if event_id:
+            query = query.filter(Upload.event_id == event_id)
+        if session_date:
+            query = query.filter(Upload.session_date == session_date)
+
+    by_fingerprint: Dict[str, int] = {}
+    by_path: Dict[str, tuple] = {}
+    for file_path, fingerprint, upload_id in query.all():
+        if fingerprint:
+            by_fingerprint.setdefault(fingerprint, upload_id)
+        by_path[file_path] = (fingerprint, upload_id)
+
+    matches = {}
+    for scanned_file in scanned_files:
+        fingerprint = scanned_file.get('fingerprint')
+        if fingerprint and fingerprint in by_fingerprint:
+            matches[scanned_file['file_path']] = by_fingerprint[fingerprint]
+            continue
+        remembered = by_path.get(scanned_file['file_path'])
+        if remembered and (not remembered[0] or not fingerprint or remembered[0] == fingerprint):
+            matches[scanned_file['file_path']] = remembered[1]
+    return matches
+
+
+def _upload_changed(session: Session, upload: Upload) -> bool:
+    state = inspect(upload)
+    for attr in _IDENTITY_ATTRS:
+        if state.attrs[attr].history.has_changes():
+            return True
+    for attr in _CONTENT_ATTRS:
+        history = state.attrs[attr].history
+        if not history.has_changes():
+            continue
+        old = history.deleted
+        if not old:
+            # Set on an expired object (e.g. after a commit): the old value was
+            # never loaded, read it before the flush overwrites it
+            old = [session.query(getattr(Upload, attr)).filter(Upload.id == upload.id).scalar()]
+        if any(value is not None for value in old):
+            return True
+    return False
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_changed_uploads(session: Session, flush_context, instances):
+    """Drop remembered assignments of uploads that are deleted or changed in this flush"""
+    upload_ids = [obj.id for obj in session.deleted if isinstance(obj, Upload)]
+    upload_ids += [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Upload) and obj.id is not None and _upload_changed(session, obj)
+    ]
+    if upload_ids:
+        session.execute(delete(MatchMemory).where(MatchMemory.upload_id.in_(upload_ids)))
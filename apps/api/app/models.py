@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Time, Enum, Table
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Text, Date, Time, Enum, Table, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column, declarative_base
 from .db import Base
 from datetime import datetime
@@ -41,8 +41,8 @@ class Attendee(Base):
     __tablename__ = "attendees"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
-    email = Column(String, nullable=False)
+    name = Column(String(255), nullable=False)
+    email = Column(String(255), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     event_id = Column(Integer, ForeignKey("events.id"), nullable=True)
@@ -85,13 +85,26 @@ class Room(Base):
         Enum("offline", "busy", "online", "synced", name="room_status"),
         nullable=False,
         default="offline")
-    ip_address: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
+    # Network share access (see migrations/001_add_fields.sql)
+    username = Column(String(255), nullable=True)
+    password = Column(String(255), nullable=True)
+    share_path = Column(String(512), nullable=True)
+    attachment_folder = Column(String(512), nullable=True)
+    # Last completed scan, shared between workers (see single_flight.py)
+    last_scan_at = Column(DateTime, nullable=True)
+    last_scan_result = Column(Text(16777215), nullable=True)
+    # Room agent inventory push (POST /api/rooms/{id}/inventory)
+    agent_id = Column(String(64), nullable=True)
+    agent_seq = Column(Integer, nullable=True)
+    agent_seen_at = Column(DateTime, nullable=True)
 
     uploads = relationship("Upload", back_populates="room")
     # FIX #1: Room linked to events via junction table
     events = relationship("Event", secondary=event_rooms, back_populates="rooms")
     # FIX #2: Room has sessions
     sessions = relationship("Session", back_populates="room")
+    files = relationship("RoomFile", back_populates="room", cascade="all, delete-orphan")
 
 
 class Speaker(Base):
@@ -110,6 +123,8 @@ class Speaker(Base):
 # FIX #2: Dedicated Session model (room time slots)
 class Session(Base):
     __tablename__ = "sessions"
+    # Room schedule: sessions of an event (and room) by start time
+    __table_args__ = (Index("ix_sessions_event_room_start", "event_id", "room_id", "start_time"),)
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
@@ -127,17 +142,31 @@ class Session(Base):
 
 class Upload(Base):
     __tablename__ = "uploads"
+    # Chosen from the router queries; app/explain_check.py verifies they are used
+    __table_args__ = (
+        # Event lists, manifest, stats: event (+ day), ordered by time
+        Index("ix_uploads_event_date_time", "event_id", "session_date", "session_time"),
+        # Room scans and room presentations: room (+ event, day)
+        Index("ix_uploads_room_event_date", "room_id", "event_id", "session_date"),
+        # Per-speaker counts of an event (filter and GROUP BY from the index)
+        Index("ix_uploads_event_speaker", "event_id", "speaker_id"),
+        # Speaker sessions and speaker delete: speaker (+ event)
+        Index("ix_uploads_speaker_event", "speaker_id", "event_id"),
+        # Attendee uploads, newest first
+        Index("ix_uploads_attendee_updated", "attendee_id", "updated_at"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    # active_history: event_stats needs the previous values to move counters
+    event_id = mapped_column(Integer, ForeignKey("events.id"), nullable=False, active_history=True)
     speaker_id = Column(Integer, ForeignKey("speakers.id"), nullable=False)
     attendee_id = Column(Integer, ForeignKey("attendees.id"), nullable=True)
-    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=True)
+    room_id = mapped_column(Integer, ForeignKey("rooms.id"), nullable=True, active_history=True)
     # FIX #3/#4: Link upload to a session
     session_id = Column(Integer, ForeignKey("sessions.id"), nullable=True)
     session_date = Column(DateTime, nullable=True)
     session_time = Column(Time, nullable=True)
     filename = Column(String(512), nullable=False)
-    size_bytes = Column(Integer)
+    size_bytes = mapped_column(Integer, active_history=True)
     has_video: Mapped[bool] = mapped_column(Boolean, default=False)
     has_audio: Mapped[bool] = mapped_column(Boolean, default=False)
     # FIX #4: Proper tech note fields
@@ -147,9 +176,12 @@ class Upload(Base):
     own_machine: Mapped[bool] = mapped_column(Boolean, default=False)
     no_ppt: Mapped[bool] = mapped_column(Boolean, default=False)
     needs_internet: Mapped[bool] = mapped_column(Boolean, default=False)
-    uploaded: Mapped[bool] = mapped_column(Boolean, default=False)
+    uploaded: Mapped[bool] = mapped_column(Boolean, default=False, active_history=True)
 
     etag: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    # Size + head/tail hash (see fingerprint.py), set at ingest for exact scan matching
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.utcnow,
@@ -164,10 +196,82 @@ class Upload(Base):
     session = relationship("Session", back_populates="uploads")
 
 
+class RoomFile(Base):
+    """Inventory of presentation files currently present on a room's share"""
+    __tablename__ = "room_files"
+    __table_args__ = (UniqueConstraint("room_id", "file_path", name="uq_room_files_room_path"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False, index=True)
+    file_path = Column(String(512), nullable=False)
+    filename = Column(String(512), nullable=False)
+    size_bytes = Column(BigInteger)
+    modified_at = Column(DateTime, nullable=True)
+    has_video: Mapped[bool] = mapped_column(Boolean, default=False)
+    has_audio: Mapped[bool] = mapped_column(Boolean, default=False)
+    fingerprint = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    upload_id = Column(Integer, ForeignKey("uploads.id", ondelete="SET NULL"), nullable=True)
+    seen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    room = relationship("Room", back_populates="files")
+    upload = relationship("Upload")
+
+
+class MatchMemory(Base):
+    """File-to-upload assignments confirmed or made by a tech, reused by later scans"""
+    __tablename__ = "match_memory"
+    __table_args__ = (UniqueConstraint("room_id", "file_path", name="uq_match_memory_room_path"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    fingerprint = Column(String(64), nullable=True)
+    upload_id = Column(Integer, ForeignKey("uploads.id", ondelete="CASCADE"), nullable=False, index=True)
+    source = Column(String(16), nullable=False, default="confirmed")  # confirmed | manual
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class EventRoomStats(Base):
+    """Upload counters per event and room, kept current by event_stats.py"""
+    __tablename__ = "event_room_stats"
+    # Room listings read the counters by room across events
+    __table_args__ = (Index("ix_event_room_stats_room", "room_id"),)
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    room_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 = no room assigned
+    total = Column(Integer, nullable=False, default=0)
+    uploaded = Column(Integer, nullable=False, default=0)
+    bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class EventVersion(Base):
+    """Data version per event, bumped by event_versions.py on every commit that changes it"""
+    __tablename__ = "event_versions"
+
+    event_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 = all events
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class SyncSignature(Base):
+    """Block hashes of the file last pushed to a room share, for delta transfers"""
+    __tablename__ = "sync_signatures"
+    __table_args__ = (UniqueConstraint("room_id", "file_path", name="uq_sync_signatures_room_path"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    block_size = Column(Integer, nullable=False)
+    block_hashes = Column(Text(16777215), nullable=False)  # MEDIUMTEXT on MySQL
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class Device(Base):
     __tablename__ = "devices"
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     room_id: Mapped[int | None] = mapped_column(nullable=True)
     active: Mapped[bool] = mapped_column(Boolean, default=False)
     last_seen: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
\ No newline at end of file
@@ -0,0 +1,312 @@
+# services/remote_scanner.py
+"""
+Pluggable scanners for room shares
+
+LocalFolderScanner walks a path visible to this server (a mounted share or
+a UNC path on Windows hosts). SftpScanner lists the room PC over SSH using
+the room's stored credentials, which also works from Linux containers where
+UNC paths cannot be opened. Room PCs are only trusted when their host key is
+in the system known_hosts or SFTP_KNOWN_HOSTS; SFTP_ALLOW_UNKNOWN_HOSTS=true
+accepts any key instead (trusted networks only).
+"""
+
+import hashlib
+import os
+import posixpath
+import stat
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from .config import get_settings
+from .fingerprint import fingerprint_stream
+from .room_scanner import RoomScanner
+
+
+@dataclass(frozen=True)
+class RoomShare:
+    """Connection details of a room share, detached from the DB session"""
+    room_id: int
+    ip_address: Optional[str]
+    username: Optional[str] = None
+    password: Optional[str] = None
+    share_path: Optional[str] = None
+    attachment_folder: Optional[str] = None
+    port: int = 22
+
+    @classmethod
+    def from_room(cls, room, port: Optional[int] = None) -> "RoomShare":
+        return cls(
+            room_id=room.id,
+            ip_address=room.ip_address,
+            username=room.username,
+            password=room.password,
+            share_path=room.share_path,
+            attachment_folder=room.attachment_folder,
+            port=port or get_settings().SFTP_PORT,
+        )
+
+    @property
+    def pool_key(self) -> tuple:
+        # Credential changes get a fresh connection instead of a stale one
+        secret = hashlib.sha256((self.password or "").encode()).hexdigest()
+        return (self.room_id, self.ip_address, self.port, self.username, secret)
+
+    @property
+    def local_path(self) -> str:
+        """Folder path as scan_room has always resolved it"""
+        if self.attachment_folder:
+            return self.attachment_folder
+        if self.share_path:
+            return f"\\\\{self.ip_address}\\{self.share_path}"
+        return f"\\\\{self.ip_address}\\Attachments"
+
+    @property
+    def remote_root(self) -> str:
+        """Folder on the room PC as seen over SFTP"""
+        return (self.share_path or "Attachments").replace("\\", "/")
+
+
+class RemoteScanner(ABC):
+    """Abstract base class for room share scanners"""
+
+    @abstractmethod
+    def scan(self, share: RoomShare, known: Optional[dict] = None) -> List[dict]:
+        """
+        List presentation files on the share
+
+        Args:
+            share: Room share to scan
+            known: Previous file info by file_path (room inventory), used to
+                   skip re-fingerprinting unchanged files
+
+        Returns:
+            List of file information dictionaries (see RoomScanner)
+        """
+        pass
+
+
+class LocalFolderScanner(RemoteScanner):
+    """Scan a folder reachable through the local filesystem"""
+
+    def scan(self, share: RoomShare, known: Optional[dict] = None) -> List[dict]:
+        return RoomScanner.scan_folder(share.local_path, known=known)
+
+
+class SftpConnectionPool:
+    """Warm, pooled SSH/SFTP connections per room"""
+
+    def __init__(
+        self,
+        max_idle_per_room: int = 2,
+        idle_seconds: float = 300.0,
+        connect_timeout: float = 10.0,
+        keepalive_seconds: int = 30,
+        known_hosts: Optional[str] = None,
+        allow_unknown_hosts: bool = False
+    ):
+        self.max_idle_per_room = max_idle_per_room
+        self.idle_seconds = idle_seconds
+        self.connect_timeout = connect_timeout
+        self.keepalive_seconds = keepalive_seconds
+        self.known_hosts = known_hosts
+        self.allow_unknown_hosts = allow_unknown_hosts
+        self._idle: Dict[tuple, List[tuple]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, share: RoomShare):
+        """Check out an SFTP client for the share, returning it to the pool afterwards"""
+        entry = self._checkout(share)
+        try:
+            yield entry[1]
+        finally:
+            self._checkin(share, entry)
+
+    def _checkout(self, share: RoomShare) -> tuple:
+        now = time.monotonic()
+        stale = []
+        entry = None
+        with self._lock:
+            self._reap(now, stale)
+            idle = self._idle.get(share.pool_key, [])
+            while idle:
+                candidate = idle.pop()
+                if self._is_alive(candidate):
+                    entry = candidate
+                    break
+                stale.append(candidate)
+        self._close(stale)
+        return entry or self._connect(share)
+
+    def _checkin(self, share: RoomShare, entry: tuple):
+        if not self._is_alive(entry):
+            self._close([entry])
+            return
+        client, sftp, _ = entry
+        with self._lock:
+            idle = self._idle.setdefault(share.pool_key, [])
+            if len(idle) < self.max_idle_per_room:
+                idle.append((client, sftp, time.monotonic()))
+                return
+        self._close([entry])
+
+    def _connect(self, share: RoomShare) -> tuple:
+        import paramiko
+
+        if not share.ip_address or not share.username:
+            raise ValueError(f"Room {share.room_id} has no IP address or username configured")
+
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        if self.known_hosts:
+            client.load_host_keys(self.known_hosts)
+        # A room PC whose host key is not known is refused unless explicitly allowed
+        if self.allow_unknown_hosts:
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        else:
+            client.set_missing_host_key_policy(paramiko.RejectPolicy())
+
+        client.connect(
+            share.ip_address,
+            port=share.port,
+            username=share.username,
+            password=share.password,
+            timeout=self.connect_timeout,
+            banner_timeout=self.connect_timeout,
+            auth_timeout=self.connect_timeout,
+            allow_agent=False,
+            look_for_keys=False,
+        )
+        client.get_transport().set_keepalive(self.keepalive_seconds)
+        return (client, client.open_sftp(), time.monotonic())
+
+    @staticmethod
+    def _is_alive(entry: tuple) -> bool:
+        transport = entry[0].get_transport()
+        return transport is not None and transport.is_active()
+
+    def _reap(self, now: float, stale: list):
+        for key, idle in list(self._idle.items()):
+            fresh = [e for e in idle if now - e[2] < self.idle_seconds]
+            stale.extend(e for e in idle if now - e[2] >= self.idle_seconds)
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+
+    @staticmethod
+    def _close(entries: list):
+        for client, sftp, _ in entries:
+            try:
+                sftp.close()
+                client.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        with self._lock:
+            entries = [e for idle in self._idle.values() for e in idle]
+            self._idle.clear()
+        self._close(entries)
+
+
+class SftpScanner(RemoteScanner):
+    """Scan a room PC over SFTP using pooled connections"""
+
+    def __init__(self, pool: SftpConnectionPool, fingerprint: bool = True):
+        self.pool = pool
+        self.fingerprint = fingerprint
+
+    def scan(self, share: RoomShare, known: Optional[dict] = None) -> List[dict]:
+        attachments = []
+        with self.pool.connection(share) as sftp:
+            pending = [share.remote_root]
+            while pending:
+                directory = pending.pop()
+                # Each READDIR response carries a batch of names with their attributes,
+                # so there is no stat round trip per file
+                for attr in sftp.listdir_attr(directory):
+                    file_path = posixpath.join(directory, attr.filename)
+                    if stat.S_ISDIR(attr.st_mode or 0):
+                        pending.append(file_path)
+                        continue
+                    if posixpath.splitext(attr.filename)[1].lower() not in RoomScanner.MEDIA_EXTENSIONS:
+                        continue
+
+                    attachment = RoomScanner.build_file_info(file_path, attr.st_size, attr.st_mtime)
+                    if self.fingerprint and not RoomScanner.reuse_fingerprint(
+                        attachment, known.get(file_path) if known else None
+                    ):
+                        try:
+                            with sftp.open(file_path, "rb") as f:
+                                attachment["fingerprint"], attachment["content_hash"] = fingerprint_stream(
+                                    f, attr.st_size
+                                )
+                        except IOError as e:
+                            print(f"Error fingerprinting {file_path}: {str(e)}")
+                    attachments.append(attachment)
+        return attachments
+
+
+@lru_cache()
+def get_sftp_pool() -> SftpConnectionPool:
+    settings = get_settings()
+    return SftpConnectionPool(
+        max_idle_per_room=settings.SFTP_POOL_SIZE,
+        idle_seconds=settings.SFTP_IDLE_SECONDS,
+        connect_timeout=settings.SFTP_CONNECT_TIMEOUT,
+        known_hosts=settings.SFTP_KNOWN_HOSTS,
+        allow_unknown_hosts=settings.SFTP_ALLOW_UNKNOWN_HOSTS,
+    )
+
+
+def get_remote_scanner(share: RoomShare) -> RemoteScanner:
+    """
+    Returns the scanner for a room share.
+    A locally mounted attachment_folder wins; rooms with credentials are
+    scanned over SFTP; anything else falls back to the UNC path.
+    """
+    if share.attachment_folder and os.path.isdir(share.attachment_folder):
+        return LocalFolderScanner()
+    if share.username:
+        return SftpScanner(get_sftp_pool())
+    return LocalFolderScanner()
+
+
+def scan_rooms(
+    shares: List[RoomShare],
+    known_by_room: Optional[Dict[int, dict]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[int, dict]:
+    """
+    Ping and scan several rooms concurrently
+
+    Returns:
+        Dict keyed by room_id with 'status' ('ok', 'offline' or 'error')
+        and either 'files' or 'error'
+    """
+    known_by_room = known_by_room or {}
+    max_workers = max_workers or get_settings().SCAN_MAX_PARALLEL_ROOMS
+
+    def _scan_one(share: RoomShare) -> dict:
+        if not RoomScanner.ping_host(share.ip_address):
+            return {"status": "offline"}
+        try:
+            files = get_remote_scanner(share).scan(share, known=known_by_room.get(share.room_id))
+            return {"status": "ok", "files": files}
+        except FileNotFoundError as e:
+            return {"status": "error", "error": f"Folder not found: {str(e)}"}
+        except Exception as e:
+            return {"status": "error", "error": f"Scan failed: {str(e)}"}
+
+    if not shares:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(shares))) as executor:
+        results = executor.map(_scan_one, shares)
+        return {share.room_id: result for share, result in zip(shares, results)}
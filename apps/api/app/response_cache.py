@@ -0,0 +1,434 @@
+# services/response_cache.py
+"""
+Response cache and conditional requests of the polled event read endpoints
+
+Stats, rooms, speakers, room sessions and the manifest are polled every few
+seconds by browser tabs and room PCs. @cached() keeps their serialized JSON
+(and headers such as X-Next-Cursor) per path and query string for
+RESPONSE_CACHE_TTL_SECONDS:
+
+- Entries are tagged with the event; a commit changing the event, its
+  uploads, sessions, rooms or speakers (see event_changes) bumps the tag's
+  generation, which is part of every key, so stale entries are never served.
+- Concurrent misses for the same key run the endpoint once (AsyncSingleFlight).
+- MemoryCache evicts least recently used entries past RESPONSE_CACHE_MAX_BYTES.
+  RedisCache shares entries and generations between workers; its memory is
+  bounded by the server's maxmemory (use allkeys-lru).
+
+@conditional() sends a weak ETag built from the event's data version
+(event_versions) and answers a matching If-None-Match with 304 before the
+endpoint runs. Below it, @cached() keys entries by that version too, so
+writes by other processes show at once; without it they show within the TTL
+with the memory backend.
+
+Responses are compressed for clients that accept it (see compression):
+@cached() keys entries by the negotiated encoding and keeps the compressed
+bytes, @compressed() does the same for endpoints that are not cached.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import compression, event_changes, event_versions
+from .config import get_settings
+from .single_flight import AsyncSingleFlight
+
+settings = get_settings()
+
+ALL_TAG = f"event:{event_changes.ALL_EVENTS}"
+
+# Entry: (JSON body, compressed for the key's encoding, and the response headers)
+Entry = Tuple[bytes, Dict[str, str]]
+
+# Set by Response itself, not by the endpoint
+_OWN_HEADERS = {"content-length", "content-type"}
+
+
+def event_tag(event_id) -> str:
+    return f"event:{event_id}"
+
+
+class CacheBackend(ABC):
+    """Storage of cached responses and the generation of each tag"""
+
+    # Calls do network I/O and run in the threadpool
+    blocking = False
+
+    @abstractmethod
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Current generation of each tag"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Entry]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, entry: Entry, ttl: float, tag: str):
+        pass
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]):
+        """Bump the generation of tags; ALL_TAG invalidates every entry"""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU with TTL and a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (expires at, size, tag, entry), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def generations(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[3]
+
+    def set(self, key, entry, ttl, tag):
+        body, headers = entry
+        size = len(key) + len(body) + sum(len(k) + len(v) for k, v in headers.items())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, tag, entry)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            # Unreachable after the bump; free their bytes now
+            everything = ALL_TAG in tags
+            for key in [k for k, item in self._entries.items() if everything or item[2] in tags]:
+                self._drop(key)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCache(CacheBackend):
+    """Entries and generations in Redis, shared by all workers"""
+
+    blocking = True
+    PREFIX = "respcache:"
+
+    def __init__(self, url: str):
+        import redis  # only with RESPONSE_CACHE_BACKEND=redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def generations(self, tags):
+        values = self._redis.mget([f"{self.PREFIX}gen:{tag}" for tag in tags])
+        return tuple(int(v or 0) for v in values)
+
+    def get(self, key):
+        values = self._redis.hgetall(self.PREFIX + key)
+        if not values:
+            return None
+        body = values.pop(b"__body__", b"")
+        return body, {k.decode(): v.decode() for k, v in values.items()}
+
+    def set(self, key, entry, ttl, tag):
+        body, headers = entry
+        with self._redis.pipeline() as pipe:
+            pipe.hset(self.PREFIX + key, mapping={"__body__": body, **headers})
+            pipe.expire(self.PREFIX + key, max(1, int(ttl)))
+            pipe.execute()
+
+    def invalidate(self, tags):
+        with self._redis.pipeline() as pipe:
+            for tag in set(tags):
+                pipe.incr(f"{self.PREFIX}gen:{tag}")
+            pipe.execute()
+
+    def stats(self):
+        return {"backend": "redis"}
+
+
+def create_backend(name: str) -> Optional[CacheBackend]:
+    if name == "off":
+        return None
+    if name == "redis":
+        return RedisCache(settings.RESPONSE_CACHE_REDIS_URL)
+    if name == "memory":
+        return MemoryCache(settings.RESPONSE_CACHE_MAX_BYTES)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+
+
+@functools.lru_cache()
+def get_backend() -> Optional[CacheBackend]:
+    return create_backend(settings.RESPONSE_CACHE_BACKEND.lower())
+
+
+@event_changes.on_commit
+def _invalidate(event_ids):
+    backend = get_backend()
+    if backend is None:
+        return
+    tags = [ALL_TAG] if event_changes.ALL_EVENTS in event_ids else [event_tag(e) for e in event_ids]
+    try:
+        backend.invalidate(tags)
+    except Exception as e:
+        # Entries still expire with the TTL
+        print(f"Response cache invalidation failed: {e}")
+
+
+def cache_stats() -> dict:
+    backend = get_backend()
+    return backend.stats() if backend is not None else {"backend": "off"}
+
+
+_flight = AsyncSingleFlight()
+
+
+async def _call(backend: CacheBackend, method: str, *args):
+    fn = getattr(backend, method)
+    if backend.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+def _endpoint_signature(fn):
+    """fn's signature plus the Request and Response a wrapper needs from FastAPI"""
+    signature = inspect.signature(fn)
+    wants_request = "request" in signature.parameters
+    wants_response = "response" in signature.parameters
+    parameters = list(signature.parameters.values())
+    if not wants_request:
+        parameters.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+    if not wants_response:
+        parameters.append(inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+    return signature.replace(parameters=parameters), wants_request, wants_response
+
+
+def _serializer(signature: inspect.Signature) -> Callable[[object], bytes]:
+    """JSON body of an endpoint's data, through its return annotation (the response model) when it has one"""
+    model = signature.return_annotation
+    if model is inspect.Signature.empty:
+        return lambda data: JSONResponse(jsonable_encoder(data)).body
+    adapter = TypeAdapter(model)
+    return lambda data: adapter.dump_json(adapter.validate_python(data, from_attributes=True), exclude_unset=True)
+
+
+def _endpoint_headers(response: Response) -> Dict[str, str]:
+    """Headers the endpoint set on its Response parameter (X-Next-Cursor, ...)"""
+    return {k: v for k, v in response.headers.items() if k not in _OWN_HEADERS}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with etag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+def conditional(tag_param: str = "event_id", db_param: str = "db"):
+    """
+    Weak ETag from the event's data version; If-None-Match is answered with 304
+
+    The version (event_versions) is read on the endpoint's own session before
+    the endpoint runs, so a 304 costs a primary key lookup. Stack it above
+    @cached(), which then keys entries by the version as well. Requests
+    without an event (tag_param None, e.g. an optional filter) pass through.
+
+    Args:
+        tag_param: Parameter naming the event the response belongs to
+        db_param: Parameter holding the endpoint's Session or AsyncSession
+    """
+    def decorator(fn):
+        signature, wants_request, wants_response = _endpoint_signature(fn)
+        is_async = inspect.iscoroutinefunction(fn)
+        # A 304 repeats the Vary of the 200 it stands for (@cached()/@compressed() below)
+        vary = getattr(fn, "response_vary", None)
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if wants_request else kwargs.pop("request")
+            response: Response = kwargs["response"] if wants_response else kwargs.pop("response")
+            event_id = kwargs.get(tag_param)
+            if event_id is not None:
+                db = kwargs[db_param]
+                if isinstance(db, AsyncSession):
+                    version = await event_versions.current_async(db, event_id)
+                else:
+                    version = await run_in_threadpool(event_versions.current, db, event_id)
+                etag = f'W/"{version[0]}.{version[1]}"'
+                headers = {"ETag": etag, "Cache-Control": "no-cache", **({"Vary": vary} if vary else {})}
+                if _etag_matches(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers=headers)
+                request.state.data_version = etag
+
+            result = await fn(**kwargs) if is_async else await run_in_threadpool(fn, **kwargs)
+            if event_id is not None:
+                (result if isinstance(result, Response) else response).headers.update(headers)
+            return result
+
+        wrapper.__signature__ = signature
+        return wrapper
+
+    return decorator
+
+
+def cached(tag_param: str = "event_id", ttl: Optional[float] = None):
+    """
+    Serve a GET endpoint from the response cache
+
+    Works on sync and async endpoints returning JSON-able data, serialized
+    through the endpoint's response model (return annotation) like FastAPI
+    would; the response carries X-Cache: HIT or MISS. Errors (HTTPException) are not cached.
+
+    Args:
+        tag_param: Path parameter naming the event the response belongs to
+        ttl: Seconds an entry lives (default RESPONSE_CACHE_TTL_SECONDS)
+    """
+    def decorator(fn):
+        signature, wants_request, wants_response = _endpoint_signature(fn)
+        is_async = inspect.iscoroutinefunction(fn)
+        serialize = _serializer(signature)
+
+        async def run(kwargs, response: Response, backend: Optional[CacheBackend], key, tag, encoding) -> Entry:
+            data = await fn(**kwargs) if is_async else await run_in_threadpool(fn, **kwargs)
+            if isinstance(data, Response):
+                raise _Uncacheable(data)
+            body, encoding = await compression.encode(serialize(data), encoding)
+            entry = body, {**_endpoint_headers(response), **compression.headers(encoding)}
+            if backend is not None:
+                try:
+                    await _call(backend, "set", key, entry, ttl or settings.RESPONSE_CACHE_TTL_SECONDS, tag)
+                except Exception as e:
+                    print(f"Response cache store failed: {e}")
+            return entry
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if wants_request else kwargs.pop("request")
+            response: Response = kwargs["response"] if wants_response else kwargs.pop("response")
+            backend = get_backend()
+            if backend is None:
+                return await fn(**kwargs) if is_async else await run_in_threadpool(fn, **kwargs)
+
+            tag = event_tag(kwargs[tag_param])
+            encoding = compression.negotiate(request.headers.get("accept-encoding"))
+            try:
+                generation = await _call(backend, "generations", (tag, ALL_TAG))
+                query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+                # With @conditional above, also the event's version from the database
+                version = getattr(request.state, "data_version", "")
+                key = f"{request.url.path}?{query}#{generation[0]}.{generation[1]}{version}~{encoding}"
+                entry = await _call(backend, "get", key)
+            except Exception as e:
+                print(f"Response cache unavailable: {e}")
+                backend = entry = key = None
+
+            status = "HIT"
+            if entry is None:
+                status = "MISS"
+                try:
+                    entry = await _flight.do(
+                        key or object(), lambda: run(kwargs, response, backend, key, tag, encoding)
+                    )
+                except _Uncacheable as e:
+                    return e.response
+
+            body, headers = entry
+            return Response(body, media_type="application/json", headers={**headers, "X-Cache": status})
+
+        wrapper.__signature__ = signature
+        wrapper.response_vary = compression.VARY
+        return wrapper
+
+    return decorator
+
+
+def compressed():
+    """
+    Compress the endpoint's response for clients that accept it
+
+    Data is serialized through the endpoint's response model, like @cached()
+    does; a Response the endpoint builds itself (the CSV export) has its body
+    compressed. Streaming responses pass through as they are.
+    """
+    def decorator(fn):
+        signature, wants_request, wants_response = _endpoint_signature(fn)
+        is_async = inspect.iscoroutinefunction(fn)
+        serialize = _serializer(signature)
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if wants_request else kwargs.pop("request")
+            response: Response = kwargs["response"] if wants_response else kwargs.pop("response")
+            result = await fn(**kwargs) if is_async else await run_in_threadpool(fn, **kwargs)
+            encoding = compression.negotiate(request.headers.get("accept-encoding"))
+
+            if not isinstance(result, Response):
+                body, encoding = await compression.encode(serialize(result), encoding)
+                headers = {**_endpoint_headers(response), **compression.headers(encoding)}
+                return Response(body, media_type="application/json", headers=headers)
+            if isinstance(getattr(result, "body", None), bytes) and "content-encoding" not in result.headers:
+                body, encoding = await compression.encode(result.body, encoding)
+                result.body = body
+                result.headers["content-length"] = str(len(body))
+                result.headers.update(compression.headers(encoding))
+            return result
+
+        wrapper.__signature__ = signature
+        wrapper.response_vary = compression.VARY
+        return wrapper
+
+    return decorator
+
+
+class _Uncacheable(Exception):
+    """The endpoint returned a Response of its own"""
+
+    def __init__(self, response: Response):
+        self.response = response
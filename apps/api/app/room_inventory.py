@@ -0,0 +1,290 @@
+# services/room_inventory.py
+"""
+Per-room file inventory and the scan-to-upload matching pipeline
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+from datetime import datetime, date
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .models import RoomFile, Upload
+from .file_matcher import FileMatcher
+from . import event_stats
+from .match_memory import recall
+
+EXACT_LOOKUP_BATCH = 500
+
+
+def load_room_uploads(
+    db: Session,
+    room_id: int,
+    event_id: Optional[int] = None,
+    session_date: Optional[date] = None
+) -> List[Upload]:
+    """Uploads expected in a room, optionally filtered by event and session date"""
+    upload_query = db.query(Upload).filter(Upload.room_id == room_id)
+    if event_id:
+        upload_query = upload_query.filter(Upload.event_id == event_id)
+    if session_date:
+        upload_query = upload_query.filter(Upload.session_date == session_date)
+    return upload_query.all()
+
+
+def known_files(db: Session, room_id: int) -> Dict[str, dict]:
+    """Inventory of a room as RoomScanner-style dicts keyed by file_path"""
+    rows = (
+        db.query(RoomFile.file_path, RoomFile.size_bytes, RoomFile.modified_at,
+                 RoomFile.fingerprint, RoomFile.content_hash)
+        .filter(RoomFile.room_id == room_id)
+        .all()
+    )
+    return {
+        path: {
+            "file_size": size,
+            "last_modified": modified_at,
+            "fingerprint": fingerprint,
+            "content_hash": content_hash
+        }
+        for path, size, modified_at, fingerprint, content_hash in rows
+    }
+
+
+def claimed_uploads(db: Session, room_id: int, exclude_paths: Iterable[str] = ()) -> Set[int]:
+    """Uploads matched by the room's inventory, except for the given paths"""
+    # Sessions do not autoflush; earlier batches of this transaction count too
+    db.flush()
+    excluded = set(exclude_paths)
+    rows = (
+        db.query(RoomFile.file_path, RoomFile.upload_id)
+        .filter(RoomFile.room_id == room_id, RoomFile.upload_id.isnot(None))
+        .all()
+    )
+    return {upload_id for path, upload_id in rows if path not in excluded}
+
+
+def find_exact_matches(
+    db: Session,
+    room_id: int,
+    scanned_files: List[dict],
+    event_id: Optional[int] = None,
+    session_date: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Indexed exact lookup of scanned files by content hash, then fingerprint
+
+    Returns:
+        Dict mapping file_path to upload_id
+    """
+    matches: Dict[str, int] = {}
+    for column, key in ((Upload.content_hash, 'content_hash'), (Upload.fingerprint, 'fingerprint')):
+        wanted: Dict[str, List[str]] = {}
+        for scanned_file in scanned_files:
+            value = scanned_file.get(key)
+            if value and scanned_file['file_path'] not in matches:
+                wanted.setdefault(value, []).append(scanned_file['file_path'])
+
+        values = list(wanted)
+        for start in range(0, len(values), EXACT_LOOKUP_BATCH):
+            query = db.query(Upload.id, column).filter(
+                Upload.room_id == room_id,
+                column.in_(values[start:start + EXACT_LOOKUP_BATCH])
+            )
+            if event_id:
+                query = query.filter(Upload.event_id == event_id)
+            if session_date:
+                query = query.filter(Upload.session_date == session_date)
+            for upload_id, value in query.order_by(Upload.id).all():
+                for path in wanted[value]:
+                    matches.setdefault(path, upload_id)
+    return matches
+
+
+def update_inventory(
+    db: Session,
+    room_id: int,
+    scanned_files: List[dict],
+    removed_paths: Iterable[str] = (),
+    full: bool = False
+) -> dict:
+    """
+    Apply scanned files to the room's inventory
+
+    Args:
+        scanned_files: File dicts as produced by RoomScanner (added or changed)
+        removed_paths: Paths that disappeared from the share
+        full: The scan covered the whole share, so anything not in
+              scanned_files is removed
+
+    Returns:
+        Dict mapping file_path to its RoomFile row
+    """
+    paths = [f['file_path'] for f in scanned_files]
+    query = db.query(RoomFile).filter(RoomFile.room_id == room_id)
+    if not full:
+        query = query.filter(RoomFile.file_path.in_(paths + list(removed_paths)))
+    existing = {row.file_path: row for row in query.all()}
+
+    now = datetime.utcnow()
+    rows = {}
+    for scanned_file in scanned_files:
+        row = existing.pop(scanned_file['file_path'], None)
+        if row is None:
+            row = RoomFile(room_id=room_id, file_path=scanned_file['file_path'])
+            db.add(row)
+        row.filename = scanned_file['filename']
+        row.size_bytes = scanned_file['file_size']
+        row.modified_at = scanned_file.get('last_modified')
+        row.has_video = scanned_file.get('has_video', False)
+        row.has_audio = scanned_file.get('has_audio', False)
+        row.fingerprint = scanned_file.get('fingerprint')
+        row.content_hash = scanned_file.get('content_hash')
+        row.seen_at = now
+        rows[row.file_path] = row
+
+    # Whatever is left over was not seen in this scan
+    removed = set(removed_paths)
+    for path, row in existing.items():
+        if full or path in removed:
+            db.delete(row)
+
+    return rows
+
+
+def write_back_uploads(db: Session, changes: Dict[int, dict]) -> int:
+    """
+    Apply scanned file info to matched uploads in one bulk UPDATE
+
+    Current values are read in batches and only rows that actually change
+    are written (executemany by primary key), so large scans hold row
+    locks briefly. The bulk UPDATE bypasses the ORM, so the event_room_stats
+    counters are adjusted here.
+
+    Args:
+        changes: Dict mapping upload_id to the column values to set
+
+    Returns:
+        Number of uploads changed
+    """
+    ids = list(changes)
+    columns = (Upload.size_bytes, Upload.has_video, Upload.has_audio, Upload.uploaded)
+    rows = []
+    event_ids = set()
+    deltas = event_stats.new_deltas()
+    for start in range(0, len(ids), EXACT_LOOKUP_BATCH):
+        current = db.query(Upload.id, Upload.event_id, Upload.room_id, *columns).filter(
+            Upload.id.in_(ids[start:start + EXACT_LOOKUP_BATCH])
+        ).all()
+        for upload_id, upload_event_id, upload_room_id, *values in current:
+            wanted = changes[upload_id]
+            if any(wanted[column.key] != value for column, value in zip(columns, values)):
+                rows.append({"id": upload_id, **wanted})
+                event_ids.add(upload_event_id)
+                old = dict(zip((column.key for column in columns), values))
+                new = {**old, **wanted}
+                event_stats.add_upload(
+                    deltas, upload_event_id, upload_room_id, old["uploaded"], old["size_bytes"], sign=-1
+                )
+                event_stats.add_upload(deltas, upload_event_id, upload_room_id, new["uploaded"], new["size_bytes"])
+
+    if rows:
+        now = datetime.utcnow()
+        for row in rows:
+            row["updated_at"] = now
+        # Rows are matched by primary key; name their events for event_changes
+        db.execute(update(Upload), rows, execution_options={"event_ids": event_ids})
+        event_stats.apply_deltas(db, deltas)
+    return len(rows)
+
+
+def match_scanned_files(
+    db: Session,
+    room_id: int,
+    scanned_files: List[dict],
+    removed_paths: Iterable[str] = (),
+    full: bool = False,
+    event_id: Optional[int] = None,
+    session_date: Optional[date] = None,
+    update_uploads: bool = True
+) -> dict:
+    """
+    Record scanned files in the room inventory and match them to uploads
+
+    Used by full scans (scan_room) as well as incremental change batches
+    (folder watcher). Files are first looked up in the match memory, then
+    exactly by fingerprint; fuzzy filename matching only runs for the rest,
+    as one batch with one-to-one assignment (FileMatcher.match_batch).
+    The caller is responsible for committing.
+
+    Returns:
+        Dict with 'matches' and 'unmatched' lists and the number of
+        'updated_uploads'
+    """
+    inventory = update_inventory(db, room_id, scanned_files, removed_paths, full)
+
+    # Assignments remembered from earlier confirmations win, then exact content matches
+    resolved = recall(db, room_id, scanned_files, event_id, session_date)
+    unresolved = [f for f in scanned_files if f['file_path'] not in resolved]
+    resolved.update(find_exact_matches(db, room_id, unresolved, event_id, session_date))
+
+    # Fuzzy matching only for the rest, and only against uploads that are not
+    # claimed yet; each upload goes to one file at most
+    remaining = [f for f in scanned_files if f['file_path'] not in resolved]
+    fuzzy = {}
+    if remaining:
+        claimed = set(resolved.values())
+        if not full:
+            # A batch only covers part of the share; uploads already matched
+            # to files outside it stay claimed
+            claimed.update(claimed_uploads(db, room_id, inventory.keys() | set(removed_paths)))
+        uploads = [
+            u for u in load_room_uploads(db, room_id, event_id, session_date)
+            if u.id not in claimed
+        ]
+        for scanned_file, match in zip(remaining, FileMatcher.match_batch(remaining, uploads)):
+            if match:
+                fuzzy[scanned_file['file_path']] = match
+
+    matched_uploads = []
+    unmatched_files = []
+    upload_changes = {}
+
+    for scanned_file in scanned_files:
+        upload_id, confidence = resolved.get(scanned_file['file_path']), 1.0
+        if upload_id is None:
+            upload_id, confidence = fuzzy.get(scanned_file['file_path'], (None, 0.0))
+        inventory[scanned_file['file_path']].upload_id = upload_id
+
+        if upload_id:
+            # Found a match
+            matched_uploads.append({
+                "upload_id": upload_id,
+                "filename": scanned_file['filename'],
+                "file_path": scanned_file['file_path'],
+                "file_size": scanned_file['file_size'],
+                "confidence": confidence
+            })
+
+            # Collected for one bulk update below
+            upload_changes[upload_id] = {
+                "size_bytes": scanned_file['file_size'],
+                "has_video": scanned_file['has_video'],
+                "has_audio": scanned_file['has_audio'],
+                "uploaded": True
+            }
+        else:
+            # No match found
+            unmatched_files.append({
+                "filename": scanned_file['filename'],
+                "file_size": scanned_file['file_size'],
+                "file_path": scanned_file['file_path']
+            })
+
+    # Update upload records if requested
+    updated = write_back_uploads(db, upload_changes) if update_uploads and upload_changes else 0
+
+    return {
+        "matches": matched_uploads,
+        "unmatched": unmatched_files,
+        "updated_uploads": updated
+    }
@@ -11,6 +11,8 @@ from typing import List, Optional
 from datetime import datetime
 import mimetypes
 
+from .fingerprint import fingerprint_file
+
 
 class RoomScanner:
     """Service for pinging rooms and scanning for attachments"""
@@ -59,13 +61,98 @@ class RoomScanner:
             return False
     
     @staticmethod
-    def scan_folder(folder_path: str, extensions: Optional[set] = None) -> List[dict]:
+    def build_file_info(file_path: str, size: int, mtime: float) -> dict:
+        """
+        File information dictionary from already known size and mtime
+        
+        Shared by local scans and remote (SFTP) listings; file_path may be
+        a local or a remote POSIX path.
+        """
+        file = os.path.basename(file_path)
+        file_ext = Path(file).suffix.lower()
+        mime_type, _ = mimetypes.guess_type(file)
+        
+        return {
+            "filename": file,
+            "file_path": file_path,
+            "file_size": size,
+            "file_type": mime_type or "application/octet-stream",
+            "file_extension": file_ext,
+            # Second precision, as stored in the room_files inventory
+            "last_modified": datetime.fromtimestamp(int(mtime)),
+            # Detect media type
+            "has_video": file_ext in RoomScanner.VIDEO_EXTENSIONS,
+            "has_audio": file_ext in RoomScanner.AUDIO_EXTENSIONS
+        }
+    
+    @staticmethod
+    def reuse_fingerprint(attachment: dict, previous: Optional[dict]) -> bool:
+        """Copy the previous fingerprint if size and modification time are unchanged"""
+        if (
+            previous
+            and previous.get("fingerprint")
+            and previous.get("file_size") == attachment["file_size"]
+            and previous.get("last_modified") == attachment["last_modified"]
+        ):
+            attachment["fingerprint"] = previous["fingerprint"]
+            attachment["content_hash"] = previous.get("content_hash")
+            return True
+        return False
+    
+    @staticmethod
+    def describe_file(
+        file_path: str,
+        extensions: Optional[set] = None,
+        fingerprint: bool = True,
+        previous: Optional[dict] = None
+    ) -> Optional[dict]:
+        """
+        Build the file information dictionary for a single file
+        
+        Args:
+            file_path: Full path to the file
+            extensions: Set of file extensions to include (default: MEDIA_EXTENSIONS)
+            fingerprint: Compute the content fingerprint (see fingerprint.py)
+            previous: Earlier info for this path; its fingerprint is reused
+                      when size and modification time are unchanged
+            
+        Returns:
+            File information dictionary, or None if the extension is not included
+        """
+        if extensions is None:
+            extensions = RoomScanner.MEDIA_EXTENSIONS
+        
+        file = os.path.basename(file_path)
+        file_ext = Path(file).suffix.lower()
+        
+        # Only include files with specified extensions
+        if file_ext not in extensions:
+            return None
+        
+        stat_info = os.stat(file_path)
+        attachment = RoomScanner.build_file_info(file_path, stat_info.st_size, stat_info.st_mtime)
+        
+        if fingerprint:
+            if not RoomScanner.reuse_fingerprint(attachment, previous):
+                attachment["fingerprint"], attachment["content_hash"] = fingerprint_file(file_path)
+        
+        return attachment
+    
+    @staticmethod
+    def scan_folder(
+        folder_path: str,
+        extensions: Optional[set] = None,
+        known: Optional[dict] = None,
+        fingerprint: bool = True
+    ) -> List[dict]:
         """
         Scan a folder for files
         
         Args:
             folder_path: Path to folder (local or UNC path like \\\\IP\\Share)
             extensions: Set of file extensions to include (default: MEDIA_EXTENSIONS)
+            known: Previous file info by file_path, to skip re-fingerprinting unchanged files
+            fingerprint: Compute content fingerprints
             
         Returns:
             List of file information dictionaries
@@ -82,32 +169,18 @@ class RoomScanner:
             for root, dirs, files in os.walk(folder_path):
                 for file in files:
                     file_path = os.path.join(root, file)
-                    file_ext = Path(file).suffix.lower()
-                    
-                    # Only include files with specified extensions
-                    if file_ext in extensions:
-                        try:
-                            stat_info = os.stat(file_path)
-                            mime_type, _ = mimetypes.guess_type(file_path)
-                            
-                            # Detect media type
-                            has_video = file_ext in RoomScanner.VIDEO_EXTENSIONS
-                            has_audio = file_ext in RoomScanner.AUDIO_EXTENSIONS
-                            
-                            attachment = {
-                                "filename": file,
-                                "file_path": file_path,
-                                "file_size": stat_info.st_size,
-                                "file_type": mime_type or "application/octet-stream",
-                                "file_extension": file_ext,
-                                "last_modified": datetime.fromtimestamp(stat_info.st_mtime),
-                                "has_video": has_video,
-                                "has_audio": has_audio
-                            }
-                            attachments.append(attachment)
-                        except Exception as e:
-                            print(f"Error reading file {file_path}: {str(e)}")
-                            continue
+                    try:
+                        attachment = RoomScanner.describe_file(
+                            file_path,
+                            extensions,
+                            fingerprint=fingerprint,
+                            previous=known.get(file_path) if known else None
+                        )
+                    except Exception as e:
+                        print(f"Error reading file {file_path}: {str(e)}")
+                        continue
+                    if attachment:
+                        attachments.append(attachment)
         
         except PermissionError:
             raise Exception(f"Permission denied accessing folder: {folder_path}")
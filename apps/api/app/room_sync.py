@@ -0,0 +1,408 @@
+# services/room_sync.py
+"""
+Push-sync of expected presentations from storage to room shares
+
+For every upload of a room the engine compares the file on the share with
+the stored file by fingerprint and only transfers what differs:
+
+- missing file: full copy to a temporary name, then rename into place
+- changed large file whose share copy is still the one we pushed last:
+  only blocks whose hash differs from the saved signature are rewritten
+- anything else: full copy
+
+Each upload is pushed under its base name; where several uploads of the
+room share a base name, all but the oldest get their id as a prefix, so
+no two uploads are written to the same file.
+
+There is no process on the room PC to compute checksums, so instead of
+rsync's rolling checksum the engine remembers the block hashes of what it
+last pushed (sync_signatures) and compares fixed-offset blocks against them.
+Every transfer is verified: full copies by re-fingerprinting the file on the
+share (a full content hash with FINGERPRINT_FULL_HASH), delta copies by
+reading the file back and comparing every block hash.
+"""
+
+import hashlib
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .config import get_settings
+from .fingerprint import fingerprint_stream
+from .models import SyncSignature, Upload
+from .remote_scanner import RoomShare, get_sftp_pool
+from .room_inventory import known_files, load_room_uploads, update_inventory
+from .room_scanner import RoomScanner
+from .storage import StorageBackend
+
+COPY_CHUNK = 1024 * 1024
+
+
+class LocalShareSession:
+    """Share access through the local filesystem (mounted folder or UNC path)"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def dirname(self, path: str) -> str:
+        return os.path.dirname(path)
+
+    def stat(self, path: str) -> Optional[Tuple[int, float]]:
+        try:
+            stat_info = os.stat(path)
+        except OSError:
+            return None
+        return stat_info.st_size, stat_info.st_mtime
+
+    def open(self, path: str, mode: str) -> BinaryIO:
+        return open(path, mode)
+
+    def makedirs(self, path: str):
+        os.makedirs(path, exist_ok=True)
+
+    def replace(self, src: str, dst: str):
+        os.replace(src, dst)
+
+
+class SftpShareSession:
+    """Share access over a pooled SFTP connection"""
+
+    def __init__(self, sftp, root: str):
+        self.sftp = sftp
+        self.root = root
+
+    def path(self, name: str) -> str:
+        return posixpath.join(self.root, name)
+
+    def dirname(self, path: str) -> str:
+        return posixpath.dirname(path)
+
+    def stat(self, path: str) -> Optional[Tuple[int, float]]:
+        try:
+            attr = self.sftp.stat(path)
+        except IOError:
+            return None
+        return attr.st_size, attr.st_mtime
+
+    def open(self, path: str, mode: str) -> BinaryIO:
+        f = self.sftp.open(path, mode)
+        if "r" not in mode or "+" in mode:
+            # Don't wait for a server ack after every write
+            f.set_pipelined(True)
+        return f
+
+    def makedirs(self, path: str):
+        current = ""
+        for part in path.split("/"):
+            current = posixpath.join(current, part) if current else (part or "/")
+            if self.stat(current) is None:
+                self.sftp.mkdir(current)
+
+    def replace(self, src: str, dst: str):
+        try:
+            self.sftp.posix_rename(src, dst)
+        except IOError:
+            # Server without the posix-rename extension
+            if self.stat(dst) is not None:
+                self.sftp.remove(dst)
+            self.sftp.rename(src, dst)
+
+
+@contextmanager
+def open_share_session(share: RoomShare):
+    """Share access for a room, mirroring get_remote_scanner's choice of transport"""
+    if share.attachment_folder and os.path.isdir(share.attachment_folder):
+        yield LocalShareSession(share.attachment_folder)
+    elif share.username:
+        with get_sftp_pool().connection(share) as sftp:
+            yield SftpShareSession(sftp, share.remote_root)
+    else:
+        yield LocalShareSession(share.local_path)
+
+
+def _block_hash(block: bytes) -> str:
+    return hashlib.blake2b(block, digest_size=8).hexdigest()
+
+
+def _split_hashes(block_hashes: str) -> List[str]:
+    return [block_hashes[i:i + 16] for i in range(0, len(block_hashes), 16)]
+
+
+def remote_names(uploads: List[Tuple[int, str]]) -> Dict[int, str]:
+    """
+    File name of each upload on the share, from (upload id, stored filename)
+
+    The base name of the stored file; when several uploads share it, the
+    oldest (lowest id) keeps it and the others are prefixed with their id.
+    """
+    names = {}
+    taken = set()
+    for upload_id, filename in sorted(uploads):
+        name = os.path.basename(filename or "")
+        names[upload_id] = name if name not in taken else f"{upload_id}_{name}"
+        taken.add(name)
+    return names
+
+
+def _same_content(a: Tuple[Optional[str], Optional[str]], b: Tuple[Optional[str], Optional[str]]) -> bool:
+    """Compare (fingerprint, content_hash) pairs; content hashes decide when both are known"""
+    if a[0] is None or a[0] != b[0]:
+        return False
+    if a[1] is not None and b[1] is not None:
+        return a[1] == b[1]
+    return True
+
+
+class RoomSyncEngine:
+    """Push a room's presentations from a StorageBackend to its share"""
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        max_parallel: Optional[int] = None,
+        block_size: Optional[int] = None,
+        delta_min_bytes: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.storage = storage
+        self.max_parallel = max_parallel or settings.SYNC_MAX_PARALLEL_FILES
+        self.block_size = block_size or settings.SYNC_BLOCK_SIZE
+        self.delta_min_bytes = delta_min_bytes or settings.SYNC_DELTA_MIN_BYTES
+
+    def sync_room(
+        self,
+        db: Session,
+        room,
+        event_id: Optional[int] = None,
+        session_date: Optional[date] = None
+    ) -> dict:
+        """
+        Sync all expected presentations of a room and record the outcome
+
+        Upload.uploaded is set to whether a verified copy is on the share;
+        a transfer that fails before it could be verified leaves it as it
+        was. The caller is responsible for committing.
+        """
+        share = RoomShare.from_room(room)
+        uploads = [
+            u for u in load_room_uploads(db, room.id, event_id, session_date)
+            if u.filename and u.filename != "placeholder.pptx"
+        ]
+        inventory = known_files(db, room.id)
+        signatures = {
+            s.file_path: s for s in db.query(SyncSignature).filter(SyncSignature.room_id == room.id).all()
+        }
+
+        # Names are assigned over all of the room's uploads, so they don't depend on the filters
+        names = remote_names(db.query(Upload.id, Upload.filename).filter(Upload.room_id == room.id).all())
+
+        # Plain data only from here on: transfers run in worker threads
+        items = [
+            {
+                "upload_id": upload.id,
+                "key": upload.filename,
+                "name": names[upload.id],
+                "fingerprint": upload.fingerprint,
+                "content_hash": upload.content_hash,
+            }
+            for upload in uploads
+        ]
+        signature_data = {
+            path: (s.fingerprint, s.block_size, s.block_hashes) for path, s in signatures.items()
+        }
+
+        def _run(item: dict) -> dict:
+            try:
+                return self._sync_file(share, item, inventory, signature_data)
+            except Exception as e:
+                return {"upload_id": item["upload_id"], "filename": item["name"], "action": "failed",
+                        "verified": False, "bytes_sent": 0, "error": str(e)}
+
+        if items:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(items))) as executor:
+                results = list(executor.map(_run, items))
+        else:
+            results = []
+
+        self._record_results(db, room.id, uploads, results, signatures)
+
+        summary = {"copied": 0, "delta": 0, "skipped": 0, "failed": 0, "missing_source": 0}
+        for result in results:
+            summary[result["action"]] = summary.get(result["action"], 0) + 1
+        return {
+            "room_id": room.id,
+            "sync_date": datetime.utcnow().isoformat(),
+            "total": len(results),
+            **summary,
+            "bytes_sent": sum(r["bytes_sent"] for r in results),
+            "files": [{k: v for k, v in r.items() if not k.startswith("_")} for r in results],
+        }
+
+    # ---- per-file transfer (worker threads) ----
+
+    def _sync_file(self, share: RoomShare, item: dict, inventory: Dict[str, dict], signatures: dict) -> dict:
+        result = {"upload_id": item["upload_id"], "filename": item["name"], "action": "skipped",
+                  "verified": False, "bytes_sent": 0, "error": None}
+
+        size = self.storage.size(item["key"])
+        if size is None:
+            result.update(action="missing_source", error="File not found in storage")
+            return result
+
+        full_hash = get_settings().FINGERPRINT_FULL_HASH
+        with self.storage.open(item["key"]) as source:
+            if item["fingerprint"] and (item["content_hash"] or not full_hash):
+                source_id = (item["fingerprint"], item["content_hash"])
+            else:
+                source_id = fingerprint_stream(source, size)
+            source.seek(0)
+
+            with open_share_session(share) as session:
+                remote_path = session.path(item["name"])
+                remote_stat = session.stat(remote_path)
+                remote_id = self._remote_fingerprint(session, remote_path, remote_stat, inventory)
+
+                if _same_content(remote_id, source_id):
+                    result["verified"] = True
+                else:
+                    signature = signatures.get(remote_path)
+                    if (
+                        remote_stat is not None
+                        and size >= self.delta_min_bytes
+                        and signature is not None
+                        and signature[0] == remote_id[0]
+                        and signature[1] == self.block_size
+                    ):
+                        block_hashes, sent = self._delta_copy(session, source, remote_path, size, signature[2])
+                        result["action"] = "delta"
+                    else:
+                        block_hashes, sent = self._full_copy(session, source, remote_path)
+                        result["action"] = "copied"
+                    result["bytes_sent"] = sent
+                    result["_signature"] = (source_id[0], block_hashes)
+
+                    # Verify what is on the share now
+                    remote_stat = session.stat(remote_path)
+                    remote_id = self._remote_fingerprint(session, remote_path, remote_stat, None)
+                    result["verified"] = _same_content(remote_id, source_id)
+                    if result["verified"] and result["action"] == "delta":
+                        # Rewritten blocks may sit between the fingerprinted head and tail
+                        result["verified"] = self._remote_block_hashes(session, remote_path) == block_hashes
+                    # Checked and found wrong, unlike a transfer that raised
+                    result["_checked"] = True
+                    if not result["verified"]:
+                        result.update(action="failed", error="Verification failed after copy")
+
+                if remote_stat is not None and result["verified"]:
+                    info = RoomScanner.build_file_info(remote_path, remote_stat[0], remote_stat[1])
+                    info["fingerprint"], info["content_hash"] = remote_id
+                    result["_file_info"] = info
+        return result
+
+    def _remote_fingerprint(
+        self, session, remote_path: str, remote_stat, inventory: Optional[dict]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """(fingerprint, content_hash) of the file on the share; content_hash only with FINGERPRINT_FULL_HASH"""
+        if remote_stat is None:
+            return None, None
+        info = RoomScanner.build_file_info(remote_path, remote_stat[0], remote_stat[1])
+        if inventory and RoomScanner.reuse_fingerprint(info, inventory.get(remote_path)):
+            if info["content_hash"] or not get_settings().FINGERPRINT_FULL_HASH:
+                return info["fingerprint"], info["content_hash"]
+        with session.open(remote_path, "rb") as f:
+            return fingerprint_stream(f, remote_stat[0])
+
+    def _remote_block_hashes(self, session, remote_path: str) -> str:
+        """Block hashes of the file on the share, read back in full"""
+        hashes = []
+        with session.open(remote_path, "rb") as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                hashes.append(_block_hash(block))
+        return "".join(hashes)
+
+    def _full_copy(self, session, source: BinaryIO, remote_path: str) -> Tuple[str, int]:
+        """Copy to a temporary name and rename over the target"""
+        directory = session.dirname(remote_path)
+        if directory:
+            session.makedirs(directory)
+        partial_path = remote_path + ".partial"
+        hashes = []
+        sent = 0
+        with session.open(partial_path, "wb") as target:
+            while True:
+                block = source.read(self.block_size)
+                if not block:
+                    break
+                target.write(block)
+                hashes.append(_block_hash(block))
+                sent += len(block)
+        session.replace(partial_path, remote_path)
+        return "".join(hashes), sent
+
+    def _delta_copy(self, session, source: BinaryIO, remote_path: str, size: int, old_hashes: str) -> Tuple[str, int]:
+        """Rewrite only the blocks that differ from the last pushed revision"""
+        old = _split_hashes(old_hashes)
+        hashes = []
+        sent = 0
+        with session.open(remote_path, "r+b") as target:
+            index = 0
+            while True:
+                block = source.read(self.block_size)
+                if not block:
+                    break
+                block_hash = _block_hash(block)
+                if index >= len(old) or old[index] != block_hash:
+                    target.seek(index * self.block_size)
+                    target.write(block)
+                    sent += len(block)
+                hashes.append(block_hash)
+                index += 1
+            target.truncate(size)
+        return "".join(hashes), sent
+
+    # ---- write-back (request thread) ----
+
+    def _record_results(self, db: Session, room_id: int, uploads: List[Upload], results: List[dict], signatures: dict):
+        uploads_by_id = {u.id: u for u in uploads}
+        file_infos = []
+
+        for result in results:
+            upload = uploads_by_id[result["upload_id"]]
+            # A transfer error says nothing about what is on the share
+            if result["verified"] or result.get("_checked"):
+                upload.uploaded = result["verified"]
+
+            info = result.get("_file_info")
+            if info:
+                info["_upload_id"] = upload.id
+                file_infos.append(info)
+
+            if "_signature" in result and result["verified"]:
+                fingerprint, block_hashes = result["_signature"]
+                if not upload.fingerprint:
+                    upload.fingerprint = fingerprint
+                path = info["file_path"]
+                signature = signatures.get(path)
+                if signature is None:
+                    signature = SyncSignature(room_id=room_id, file_path=path)
+                    db.add(signature)
+                    signatures[path] = signature
+                signature.fingerprint = fingerprint
+                signature.block_size = self.block_size
+                signature.block_hashes = block_hashes
+
+        if file_infos:
+            rows = update_inventory(db, room_id, file_infos)
+            for info in file_infos:
+                rows[info["file_path"]].upload_id = info["_upload_id"]
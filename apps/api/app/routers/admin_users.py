@@ -1,34 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from ..db import get_db
 from ..models import User
 from ..deps import require_roles
+from ..listing import ListParams, as_dicts, list_params, paginate
+from ..schemas import ModelRoute, UserOut
 from ..security import hash_password  # you should already have this
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 
-@router.get("/", dependencies=[Depends(require_roles("admin"))])
-def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).order_by(User.created_at.desc()).all()
+USER_FIELDS = {
+    "id": User.id,
+    "email": User.email,
+    "role": User.role,
+    "is_active": User.is_active,
+    "created_at": User.created_at,
+}
+
 
-    return [
-        {
-            "id": u.id,
-            "email": u.email,
-            "role": u.role,
-            "is_active": u.is_active,
-            "created_at": u.created_at,
-        }
-        for u in users
-    ]
+@router.get("/", dependencies=[Depends(require_roles("admin"))])
+def list_users(
+    response: Response,
+    role: Optional[str] = None,
+    page: ListParams = Depends(list_params),
+    db: Session = Depends(get_db)
+) -> List[UserOut]:
+    fields = page.select(USER_FIELDS) or USER_FIELDS
+    query = db.query(*fields.values())
+    if role:
+        query = query.filter(User.role == role)
+    # Newest first
+    rows = paginate(query, page, [(User.created_at, True), (User.id, True)], response)
+    return as_dicts(list(fields), rows)
 
 
 @router.post("/", dependencies=[Depends(require_roles("admin"))])
-def create_user(payload: dict = Body(...), db: Session = Depends(get_db)):
+def create_user(payload: dict = Body(...), db: Session = Depends(get_db)) -> UserOut:
     required_fields = ["email", "password", "role"]
     for field in required_fields:
         if field not in payload:
@@ -58,7 +69,7 @@ def create_user(payload: dict = Body(...), db: Session = Depends(get_db)):
     }
 
 @router.put("/{user_id}", dependencies=[Depends(require_roles("admin"))])
-def update_user(user_id: int, payload: dict, db: Session = Depends(get_db)):
+def update_user(user_id: int, payload: dict, db: Session = Depends(get_db)) -> UserOut:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from ..db import get_db
 from ..models import Attendee
@@ -6,9 +6,11 @@ from ..models import Upload  # <-- you need this
 from typing import List, Optional
 from sqlalchemy import or_
 from ..deps import require_roles
+from ..listing import ListParams, as_dicts, list_params, model_fields, paginate
+from ..schemas import AttendeeDetailOut, AttendeeOut, ModelRoute, StatusOut
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 class AttendeeCreate(BaseModel):
     name: str
@@ -17,12 +19,12 @@ class AttendeeCreate(BaseModel):
     
 # 🔍 Search attendees by name
 @router.get("/search")
-def search_attendees(q: str, db: Session = Depends(get_db)):
+def search_attendees(q: str, db: Session = Depends(get_db)) -> List[AttendeeOut]:
     if not q:
         return []
 
     rows = (
-        db.query(Attendee)
+        db.query(Attendee.id, Attendee.name, Attendee.email)
         .filter(Attendee.name.ilike(f"%{q}%"))
         .order_by(Attendee.name.asc())
         .all()
@@ -39,14 +41,20 @@ def search_attendees(q: str, db: Session = Depends(get_db)):
 
 # 📌 Get attendee with session + upload status
 @router.get("/{attendee_id}")
-def get_attendee(attendee_id: int, db: Session = Depends(get_db)):
-    attendee = db.query(Attendee).filter(Attendee.id == attendee_id).first()
+def get_attendee(attendee_id: int, db: Session = Depends(get_db)) -> AttendeeDetailOut:
+    attendee = db.query(
+        Attendee.id, Attendee.name, Attendee.email,
+        Attendee.session_title, Attendee.venue, Attendee.presentation_time
+    ).filter(Attendee.id == attendee_id).first()
     if not attendee:
         raise HTTPException(status_code=404, detail="Attendee not found")
 
     # fetch uploads for this attendee
     uploads = (
-        db.query(Upload)
+        db.query(
+            Upload.id, Upload.filename, Upload.has_video, Upload.has_audio, Upload.needs_internet,
+            Upload.updated_at, Upload.event_id, Upload.speaker_id
+        )
         .filter(Upload.attendee_id == attendee_id)
         .order_by(Upload.updated_at.desc())
         .all()
@@ -83,12 +91,23 @@ def get_attendee(attendee_id: int, db: Session = Depends(get_db)):
 
 # ✅ List all attendees
 @router.get("/")
-def list_attendees(db: Session = Depends(get_db), user=Depends(require_roles("admin"))):
-    return db.query(Attendee).all()
+def list_attendees(
+    response: Response,
+    event_id: Optional[int] = None,
+    page: ListParams = Depends(list_params),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("admin"))
+) -> List[AttendeeOut]:
+    fields = page.select(model_fields(Attendee)) or model_fields(Attendee)
+    query = db.query(*fields.values())
+    if event_id:
+        query = query.filter(Attendee.event_id == event_id)
+    rows = paginate(query, page, [(Attendee.id, False)], response)
+    return as_dicts(list(fields), rows)
 
 # ✅ Add attendee
 @router.post("/")
-def create_attendee(payload: AttendeeCreate, db: Session = Depends(get_db), user=Depends(require_roles("admin"))):
+def create_attendee(payload: AttendeeCreate, db: Session = Depends(get_db), user=Depends(require_roles("admin"))) -> AttendeeOut:
     # Combine first and last name into one string
     attendee = Attendee(**payload.dict())
     db.add(attendee)
@@ -104,7 +123,7 @@ def create_attendee(payload: AttendeeCreate, db: Session = Depends(get_db), user
 
 # ✅ Update attendee
 @router.put("/{attendee_id}")
-def update_attendee(attendee_id: int, payload: dict, db: Session = Depends(get_db), user=Depends(require_roles("admin"))):
+def update_attendee(attendee_id: int, payload: dict, db: Session = Depends(get_db), user=Depends(require_roles("admin"))) -> AttendeeOut:
     attendee = db.query(Attendee).filter(Attendee.id == attendee_id).first()
     if not attendee:
         raise HTTPException(status_code=404, detail="Attendee not found")
@@ -117,7 +136,7 @@ def update_attendee(attendee_id: int, payload: dict, db: Session = Depends(get_d
 
 # ✅ Delete attendee
 @router.delete("/{attendee_id}")
-def delete_attendee(attendee_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin"))):
+def delete_attendee(attendee_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin"))) -> StatusOut:
     attendee = db.query(Attendee).filter(Attendee.id == attendee_id).first()
     if not attendee:
         raise HTTPException(status_code=404, detail="Attendee not found")
@@ -1,21 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from ..db import get_db, Base, engine
+from ..db import get_db
 from ..models import User
 from ..security import verify_password, create_access_token
+from ..schemas import ModelRoute, TokenOut
 from pydantic import BaseModel
 
-router = APIRouter()
-
-# dev helper — create tables on first run
-Base.metadata.create_all(bind=engine)
+router = APIRouter(route_class=ModelRoute)
 
 class LoginRequest(BaseModel):
     email: str
     password: str
 
 @router.post("/login")
-def login(req: LoginRequest, db: Session = Depends(get_db)):
+def login(req: LoginRequest, db: Session = Depends(get_db)) -> TokenOut:
     user = db.query(User).filter(User.email == req.email).first()
     if not user or not verify_password(req.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -3,11 +3,12 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from ..db import get_db
 from ..models import Device
+from ..schemas import ModelRoute, OkOut
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 @router.post("/heartbeat")
-def heartbeat(name: str, room_id: int | None = None, db: Session = Depends(get_db)):
+def heartbeat(name: str, room_id: int | None = None, db: Session = Depends(get_db)) -> OkOut:
     d = db.query(Device).filter(Device.name == name).first()
     if not d:
         d = Device(name=name, room_id=room_id, active=True, last_seen=datetime.utcnow())
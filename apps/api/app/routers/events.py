@@ -1,22 +1,18 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 from io import StringIO
 import csv
-import shutil
-from pathlib import Path
-from sqlalchemy import func, Table, MetaData
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_db
-from ..models import Event, Speaker, Room, Upload, Session as SessionModel
-
-router = APIRouter()
-
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+from ..db import get_async_read_db, get_db, get_read_db
+from ..models import Event, Speaker, Room, Upload, EventRoomStats, Session as SessionModel, event_speakers, event_rooms
+from .. import event_stats, response_cache, schemas
+from ..listing import ListParams, as_dicts, list_params, model_fields, paginate, paginate_async
 
+router = APIRouter(route_class=schemas.ModelRoute)
 
 def safe_getattr(obj, attr, default=None):
     try:
@@ -28,20 +24,25 @@ def safe_getattr(obj, attr, default=None):
 # ============ EVENT ENDPOINTS ============
 
 @router.get("/")
-def get_events(db: Session = Depends(get_db)):
-    return db.query(Event).all()
+def get_events(
+    response: Response, page: ListParams = Depends(list_params), db: Session = Depends(get_db)
+) -> List[schemas.EventOut]:
+    fields = page.select(model_fields(Event)) or model_fields(Event)
+    rows = paginate(db.query(*fields.values()), page, [(Event.id, False)], response)
+    return as_dicts(list(fields), rows)
 
 
 @router.get("/{event_id}")
-def get_event(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(Event).filter(Event.id == event_id).first()
+@response_cache.conditional()
+def get_event(event_id: int, db: Session = Depends(get_db)) -> schemas.EventOut:
+    event = db.query(*model_fields(Event).values()).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     return event
 
 
 @router.post("/")
-def create_event(event: dict, db: Session = Depends(get_db)):
+def create_event(event: dict, db: Session = Depends(get_db)) -> schemas.EventOut:
     db_event = Event(**event)
     db.add(db_event)
     db.commit()
@@ -50,7 +51,7 @@ def create_event(event: dict, db: Session = Depends(get_db)):
 
 
 @router.put("/{event_id}")
-def update_event(event_id: int, event: dict, db: Session = Depends(get_db)):
+def update_event(event_id: int, event: dict, db: Session = Depends(get_db)) -> schemas.EventOut:
     db_event = db.query(Event).filter(Event.id == event_id).first()
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -63,7 +64,7 @@ def update_event(event_id: int, event: dict, db: Session = Depends(get_db)):
 
 
 @router.delete("/{event_id}")
-def delete_event(event_id: int, db: Session = Depends(get_db)):
+def delete_event(event_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     db_event = db.query(Event).filter(Event.id == event_id).first()
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -75,28 +76,36 @@ def delete_event(event_id: int, db: Session = Depends(get_db)):
 # ============ FIX #1: SPEAKERS PER EVENT ============
 
 @router.get("/{event_id}/speakers")
-def get_event_speakers(event_id: int, search: Optional[str] = None, db: Session = Depends(get_db)):
+@response_cache.conditional()
+@response_cache.cached()
+async def get_event_speakers(
+    event_id: int, search: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)
+) -> List[schemas.EventSpeakerOut]:
     """Get ONLY speakers assigned to this specific event"""
-    metadata = MetaData()
-    event_speakers = Table('event_speakers', metadata, autoload_with=db.get_bind())
-    query = db.query(Speaker).join(
+    query = select(Speaker.id, Speaker.name, Speaker.email, Speaker.bio, Speaker.title).join(
         event_speakers, Speaker.id == event_speakers.c.speaker_id
-    ).filter(event_speakers.c.event_id == event_id)
+    ).where(event_speakers.c.event_id == event_id)
 
     if search:
-        query = query.filter(Speaker.name.ilike(f"%{search}%"))
+        query = query.where(Speaker.name.ilike(f"%{search}%"))
 
-    speakers = query.all()
+    speakers = (await db.execute(query)).all()
 
     # FIX #7: Include session count and upload count per speaker
+    # (one aggregate for all speakers of the event)
+    counts = {
+        speaker_id: (total, uploaded or 0)
+        for speaker_id, total, uploaded in (await db.execute(
+            select(
+                Upload.speaker_id,
+                func.count(Upload.id),
+                func.sum(case((Upload.uploaded.is_(True), 1), else_=0))
+            ).where(Upload.event_id == event_id).group_by(Upload.speaker_id)
+        )).all()
+    }
     result = []
     for speaker in speakers:
-        sessions = db.query(Upload).filter(
-            Upload.speaker_id == speaker.id,
-            Upload.event_id == event_id
-        ).all()
-        total_sessions = len(sessions)
-        uploaded_count = sum(1 for s in sessions if s.uploaded)
+        total_sessions, uploaded_count = counts.get(speaker.id, (0, 0))
         result.append({
             "id": speaker.id,
             "name": speaker.name,
@@ -110,7 +119,7 @@ def get_event_speakers(event_id: int, search: Optional[str] = None, db: Session
 
 
 @router.post("/{event_id}/speakers/{speaker_id}")
-def assign_speaker_to_event(event_id: int, speaker_id: int, db: Session = Depends(get_db)):
+def assign_speaker_to_event(event_id: int, speaker_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Assign an existing speaker to an event"""
     event = db.query(Event).filter(Event.id == event_id).first()
     if not event:
@@ -119,8 +128,6 @@ def assign_speaker_to_event(event_id: int, speaker_id: int, db: Session = Depend
     if not speaker:
         raise HTTPException(status_code=404, detail="Speaker not found")
 
-    metadata = MetaData()
-    event_speakers = Table('event_speakers', metadata, autoload_with=db.get_bind())
     # Check not already assigned
     existing = db.execute(
         event_speakers.select().where(
@@ -135,10 +142,8 @@ def assign_speaker_to_event(event_id: int, speaker_id: int, db: Session = Depend
 
 
 @router.delete("/{event_id}/speakers/{speaker_id}")
-def remove_speaker_from_event(event_id: int, speaker_id: int, db: Session = Depends(get_db)):
+def remove_speaker_from_event(event_id: int, speaker_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Remove a speaker from an event (does not delete the speaker)"""
-    metadata = MetaData()
-    event_speakers = Table('event_speakers', metadata, autoload_with=db.get_bind())
     db.execute(
         event_speakers.delete().where(
             (event_speakers.c.event_id == event_id) &
@@ -152,17 +157,19 @@ def remove_speaker_from_event(event_id: int, speaker_id: int, db: Session = Depe
 # ============ FIX #1: ROOMS PER EVENT ============
 
 @router.get("/{event_id}/rooms")
-def get_event_rooms(event_id: int, db: Session = Depends(get_db)):
+@response_cache.conditional()
+@response_cache.cached()
+def get_event_rooms(event_id: int, db: Session = Depends(get_db)) -> List[schemas.EventRoomOut]:
     """Get ONLY rooms assigned to this specific event"""
-    metadata = MetaData()
+    columns = (Room.id, Room.name, Room.capacity, Room.location, Room.layout, Room.equipment, Room.ip_address, Room.status)
     try:
-        event_rooms = Table('event_rooms', metadata, autoload_with=db.get_bind())
-        rooms = db.query(Room).join(
+        rooms = db.query(*columns).join(
             event_rooms, Room.id == event_rooms.c.room_id
         ).filter(event_rooms.c.event_id == event_id).all()
     except Exception:
         # Fallback if event_rooms table doesn't exist yet
-        rooms = db.query(Room).all()
+        db.rollback()
+        rooms = db.query(*columns).all()
 
     return [
         {
@@ -180,7 +187,7 @@ def get_event_rooms(event_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{event_id}/rooms/{room_id}")
-def assign_room_to_event(event_id: int, room_id: int, db: Session = Depends(get_db)):
+def assign_room_to_event(event_id: int, room_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Assign an existing room to an event"""
     event = db.query(Event).filter(Event.id == event_id).first()
     if not event:
@@ -189,8 +196,6 @@ def assign_room_to_event(event_id: int, room_id: int, db: Session = Depends(get_
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    metadata = MetaData()
-    event_rooms = Table('event_rooms', metadata, autoload_with=db.get_bind())
     existing = db.execute(
         event_rooms.select().where(
             (event_rooms.c.event_id == event_id) &
@@ -204,10 +209,8 @@ def assign_room_to_event(event_id: int, room_id: int, db: Session = Depends(get_
 
 
 @router.delete("/{event_id}/rooms/{room_id}")
-def remove_room_from_event(event_id: int, room_id: int, db: Session = Depends(get_db)):
+def remove_room_from_event(event_id: int, room_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Remove a room from an event"""
-    metadata = MetaData()
-    event_rooms = Table('event_rooms', metadata, autoload_with=db.get_bind())
     db.execute(
         event_rooms.delete().where(
             (event_rooms.c.event_id == event_id) &
@@ -221,9 +224,19 @@ def remove_room_from_event(event_id: int, room_id: int, db: Session = Depends(ge
 # ============ FIX #2: ROOM SESSIONS (time slots) ============
 
 @router.get("/{event_id}/room-sessions")
-def get_room_sessions(event_id: int, room_id: Optional[int] = None, db: Session = Depends(get_db)):
+@response_cache.conditional()
+@response_cache.cached()
+def get_room_sessions(
+    event_id: int, room_id: Optional[int] = None, db: Session = Depends(get_db)
+) -> List[schemas.RoomSessionOut]:
     """Get all sessions (time slots) for an event, optionally filtered by room"""
-    query = db.query(SessionModel).filter(SessionModel.event_id == event_id)
+    query = db.query(
+        SessionModel.id, SessionModel.event_id, SessionModel.room_id, SessionModel.speaker_id,
+        SessionModel.session_name, SessionModel.start_time, SessionModel.end_time,
+        Room.name.label("room_name"), Speaker.name.label("speaker_name")
+    ).outerjoin(Room, SessionModel.room_id == Room.id).outerjoin(
+        Speaker, SessionModel.speaker_id == Speaker.id
+    ).filter(SessionModel.event_id == event_id)
     if room_id:
         query = query.filter(SessionModel.room_id == room_id)
     sessions = query.order_by(SessionModel.start_time).all()
@@ -234,9 +247,9 @@ def get_room_sessions(event_id: int, room_id: Optional[int] = None, db: Session
             "id": s.id,
             "event_id": s.event_id,
             "room_id": s.room_id,
-            "room_name": s.room.name if s.room else None,
+            "room_name": s.room_name,
             "speaker_id": s.speaker_id,
-            "speaker_name": s.speaker.name if s.speaker else None,
+            "speaker_name": s.speaker_name,
             "session_name": s.session_name,
             "start_time": s.start_time.isoformat() if s.start_time is not None else None,
             "end_time": s.end_time.isoformat() if s.end_time is not None else None,
@@ -245,7 +258,7 @@ def get_room_sessions(event_id: int, room_id: Optional[int] = None, db: Session
 
 
 @router.post("/{event_id}/room-sessions")
-def create_room_session(event_id: int, payload: dict, db: Session = Depends(get_db)):
+def create_room_session(event_id: int, payload: dict, db: Session = Depends(get_db)) -> schemas.RoomSessionOut:
     """Create a session/time slot for a room in an event"""
     event = db.query(Event).filter(Event.id == event_id).first()
     if not event:
@@ -273,7 +286,9 @@ def create_room_session(event_id: int, payload: dict, db: Session = Depends(get_
 
 
 @router.put("/{event_id}/room-sessions/{session_id}")
-def update_room_session(event_id: int, session_id: int, payload: dict, db: Session = Depends(get_db)):
+def update_room_session(
+    event_id: int, session_id: int, payload: dict, db: Session = Depends(get_db)
+) -> schemas.RoomSessionOut:
     session = db.query(SessionModel).filter(
         SessionModel.id == session_id,
         SessionModel.event_id == event_id
@@ -295,7 +310,7 @@ def update_room_session(event_id: int, session_id: int, payload: dict, db: Sessi
 
 
 @router.delete("/{event_id}/room-sessions/{session_id}")
-def delete_room_session(event_id: int, session_id: int, db: Session = Depends(get_db)):
+def delete_room_session(event_id: int, session_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     session = db.query(SessionModel).filter(
         SessionModel.id == session_id,
         SessionModel.event_id == event_id
@@ -309,45 +324,79 @@ def delete_room_session(event_id: int, session_id: int, db: Session = Depends(ge
 
 # ============ UPLOAD SESSIONS (speaker presentations) ============
 
+# Output fields of event sessions and the columns each is built from
+SESSION_FIELDS = {
+    "id": (Upload.id,),
+    "event_id": (Upload.event_id,),
+    "speaker_id": (Upload.speaker_id,),
+    "room_id": (Upload.room_id,),
+    "session_date": (Upload.session_date,),
+    "session_time": (Upload.session_time,),
+    "tech_notes": (
+        Upload.own_machine, Upload.has_video_with_audio, Upload.has_video_without_audio,
+        Upload.has_audio_only, Upload.no_ppt,
+    ),
+    "uploaded": (Upload.uploaded,),
+    "upload_file_path": (Upload.filename,),
+    "speaker_name": (Speaker.name,),
+    "room_name": (Room.name,),
+    "event_name": (),
+}
+
+
 @router.get("/{event_id}/sessions")
-def get_event_sessions(
+@response_cache.conditional()
+@response_cache.compressed()
+async def get_event_sessions(
     event_id: int,
+    response: Response,
     day: Optional[str] = None,
     room_id: Optional[int] = None,
-    db: Session = Depends(get_db)
-):
-    query = db.query(Upload).filter(Upload.event_id == event_id)
+    uploaded: Optional[bool] = None,
+    page: ListParams = Depends(list_params),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> List[schemas.UploadSessionOut]:
+    fields = page.select(SESSION_FIELDS) or SESSION_FIELDS
+    # Only the columns behind the requested fields are selected (the id always, for an empty selection)
+    columns = list(dict.fromkeys([Upload.id] + [c for cols in fields.values() for c in cols]))
+    query = select(*columns).where(Upload.event_id == event_id)
+    # Speaker and room names come along in the same query; the event is the same for every row
+    if Speaker.name in columns:
+        query = query.outerjoin(Speaker, Upload.speaker_id == Speaker.id)
+    if Room.name in columns:
+        query = query.outerjoin(Room, Upload.room_id == Room.id)
     if day:
-        query = query.filter(Upload.session_date == day)
+        query = query.where(Upload.session_date == day)
     if room_id:
-        query = query.filter(Upload.room_id == room_id)
+        query = query.where(Upload.room_id == room_id)
+    if uploaded is not None:
+        query = query.where(Upload.uploaded.is_(uploaded))
 
-    sessions = query.order_by(Upload.session_time).all()
+    rows = await paginate_async(db, query, page, [(Upload.session_time, False), (Upload.id, False)], response)
+    event_title = (
+        await db.scalar(select(Event.title).where(Event.id == event_id)) if "event_name" in fields else None
+    )
     enriched = []
-    for session in sessions:
-        session_dict = {
-            "id": session.id,
-            "event_id": session.event_id,
-            "speaker_id": session.speaker_id,
-            "room_id": safe_getattr(session, "room_id"),
-            "session_date": str(safe_getattr(session, "session_date")) if safe_getattr(session, "session_date") else None,
-            "session_time": str(safe_getattr(session, "session_time")) if safe_getattr(session, "session_time") else None,
-            "tech_notes": {
-                "own_machine": session.own_machine,
-                "video_with_audio": session.has_video_with_audio,
-                "video_without_audio": session.has_video_without_audio,
-                "audio_only": session.has_audio_only,
-                "no_ppt": session.no_ppt,
-            },
-            "uploaded": safe_getattr(session, "uploaded", False),
-            "upload_file_path": session.filename,
-        }
-        if session.speaker:
-            session_dict["speaker_name"] = session.speaker.name
-        if session.room:
-            session_dict["room_name"] = session.room.name
-        if session.event:
-            session_dict["event_name"] = session.event.title
+    for row in rows:
+        values = dict(zip(columns, row if len(columns) > 1 else (row,)))
+        session_dict = {}
+        for name, cols in fields.items():
+            if name in ("session_date", "session_time"):
+                value = values[cols[0]]
+                session_dict[name] = str(value) if value else None
+            elif name == "tech_notes":
+                session_dict[name] = dict(zip(
+                    ("own_machine", "video_with_audio", "video_without_audio", "audio_only", "no_ppt"),
+                    (values[c] for c in cols)
+                ))
+            elif name in ("speaker_name", "room_name"):
+                if values[cols[0]] is not None:
+                    session_dict[name] = values[cols[0]]
+            elif name == "event_name":
+                if event_title is not None:
+                    session_dict[name] = event_title
+            else:
+                session_dict[name] = values[cols[0]]
         enriched.append(session_dict)
     return enriched
 
@@ -355,62 +404,104 @@ def get_event_sessions(
 # ============ FIX #9: UPLOADS PAGE - presentations per event per room ============
 
 @router.get("/{event_id}/stats")
-def get_event_stats(event_id: int, db: Session = Depends(get_db)):
-    rows = (
-        db.query(Upload, Room)
-        .outerjoin(Room, Upload.room_id == Room.id)
-        .filter(Upload.event_id == event_id)
-        .all()
+@response_cache.conditional()
+@response_cache.cached()
+async def get_event_stats(
+    event_id: int,
+    include_presentations: bool = False,
+    room_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_read_db)
+) -> schemas.EventStatsOut:
+    """
+    Upload readiness of an event per room
+
+    Counts come from the event_room_stats counters (one row per room). The
+    individual presentations are only listed with include_presentations,
+    optionally only those of one room (room_id, 0 for unassigned) and paged
+    with limit/offset.
+    """
+    stats_query = (
+        select(EventRoomStats, Room.name)
+        .outerjoin(Room, EventRoomStats.room_id == Room.id)
+        .where(EventRoomStats.event_id == event_id, EventRoomStats.total > 0)
     )
 
-    total = len(rows)
-    uploaded_count = sum(1 for u, _ in rows if u.uploaded)
-
-    # Group by room
+    # Rooms by id, uploads without (an existing) room last as "Unassigned"
     by_room: dict = {}
-    for upload, room in rows:
-        room_name = room.name if room else "Unassigned"
-        room_id = room.id if room else None
-        if room_name not in by_room:
-            by_room[room_name] = {"room_id": room_id, "total": 0, "uploaded": 0, "presentations": []}
-        by_room[room_name]["total"] += 1
-        if upload.uploaded:
-            by_room[room_name]["uploaded"] += 1
-        by_room[room_name]["presentations"].append({
-            "id": upload.id,
-            "filename": upload.filename,
-            "uploaded": upload.uploaded,
-            "speaker_id": upload.speaker_id,
-            "speaker_name": upload.speaker.name if upload.speaker else None,
-        })
+    stats_rows = (await db.execute(stats_query)).all()
+    for stats, room_name in sorted(stats_rows, key=lambda r: (r[1] is None, r[0].room_id)):
+        name = room_name if room_name is not None else "Unassigned"
+        if name not in by_room:
+            by_room[name] = {
+                "room_name": name,
+                "room_id": stats.room_id if room_name is not None else None,
+                "total": 0,
+                "uploaded": 0,
+            }
+            if include_presentations:
+                by_room[name]["presentations"] = []
+        by_room[name]["total"] += stats.total
+        by_room[name]["uploaded"] += stats.uploaded
+
+    if include_presentations:
+        presentations = (
+            select(Upload.id, Upload.filename, Upload.uploaded, Upload.speaker_id,
+                   Speaker.name.label("speaker_name"), Room.name.label("room_name"))
+            .outerjoin(Speaker, Upload.speaker_id == Speaker.id)
+            .outerjoin(Room, Upload.room_id == Room.id)
+            .where(Upload.event_id == event_id)
+            .order_by(Upload.id)
+        )
+        if room_id is not None:
+            presentations = presentations.where(
+                Upload.room_id.is_(None) if room_id == event_stats.UNASSIGNED_ROOM else Upload.room_id == room_id
+            )
+        if offset:
+            presentations = presentations.offset(offset)
+        if limit is not None:
+            presentations = presentations.limit(limit)
+        for p in (await db.execute(presentations)).all():
+            room = by_room.get(p.room_name or "Unassigned")
+            if room is None:
+                continue
+            room["presentations"].append({
+                "id": p.id,
+                "filename": p.filename,
+                "uploaded": p.uploaded,
+                "speaker_id": p.speaker_id,
+                "speaker_name": p.speaker_name,
+            })
 
     return {
         "event_id": event_id,
-        "total_presentations": total,
-        "total_uploaded": uploaded_count,
-        "rooms": [
-            {
-                "room_name": name,
-                "room_id": data["room_id"],
-                "total": data["total"],
-                "uploaded": data["uploaded"],
-                "presentations": data["presentations"],
-            }
-            for name, data in by_room.items()
-        ]
+        "total_presentations": sum(r["total"] for r in by_room.values()),
+        "total_uploaded": sum(r["uploaded"] for r in by_room.values()),
+        "rooms": list(by_room.values()),
     }
 
 
-@router.get("/{event_id}/export/csv")
-def export_csv(event_id: int, db: Session = Depends(get_db)):
-    sessions = db.query(Upload).filter(Upload.event_id == event_id).all()
+@router.get("/{event_id}/export/csv", response_class=Response)
+@response_cache.compressed()
+def export_csv(event_id: int, db: Session = Depends(get_read_db)):
+    sessions = (
+        db.query(
+            Upload.session_date, Upload.session_time, Upload.uploaded,
+            Speaker.name.label("speaker_name"), Room.name.label("room_name")
+        )
+        .outerjoin(Speaker, Upload.speaker_id == Speaker.id)
+        .outerjoin(Room, Upload.room_id == Room.id)
+        .filter(Upload.event_id == event_id)
+        .all()
+    )
+    event_name = db.query(Event.title).filter(Event.id == event_id).scalar() or "Unknown"
     output = StringIO()
     writer = csv.writer(output)
     writer.writerow(["Event Name", "Day", "Room", "Time", "Date", "Presenter Name", "Uploaded"])
     for session in sessions:
-        speaker_name = session.speaker.name if session.speaker else "Unknown"
-        room_name = session.room.name if session.room else "Unknown"
-        event_name = session.event.title if session.event else "Unknown"
+        speaker_name = session.speaker_name or "Unknown"
+        room_name = session.room_name or "Unknown"
         try:
             session_date = safe_getattr(session, "session_date")
             if isinstance(session_date, str):
@@ -435,36 +526,36 @@ def export_csv(event_id: int, db: Session = Depends(get_db)):
             formatted_date, speaker_name,
             "Yes" if session.uploaded else "No"
         ])
-    output.seek(0)
-    return StreamingResponse(
-        output,
+    # Built in memory anyway; a plain Response lets it be compressed as a whole
+    return Response(
+        output.getvalue(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=event_{event_id}_sessions.csv"}
     )
 
 
 @router.get("/{event_id}/room-status")
-def get_room_status(event_id: int, db: Session = Depends(get_db)):
+@response_cache.conditional()
+async def get_room_status(
+    event_id: int, db: AsyncSession = Depends(get_async_read_db)
+) -> List[schemas.RoomStatusOut]:
     try:
-        room_ids = db.query(Upload.room_id).filter(
-            Upload.event_id == event_id,
-            Upload.room_id.isnot(None)
-        ).distinct().all()
-        result = []
-        for (room_id,) in room_ids:
-            room = db.query(Room).filter(Room.id == room_id).first()
-            if room:
-                presentation_count = db.query(Upload).filter(
-                    Upload.room_id == room.id,
-                    Upload.event_id == event_id
-                ).count()
-                result.append({
-                    "room_id": room.id,
-                    "room_name": room.name,
-                    "ip_address": getattr(room, 'ip_address', None),
-                    "status": room.status or "offline",
-                    "presentation_count": presentation_count
-                })
-        return result
+        rooms = (await db.execute(
+            select(Room.id, Room.name, Room.ip_address, Room.status, func.count(Upload.id))
+            .join(Upload, Upload.room_id == Room.id)
+            .where(Upload.event_id == event_id)
+            .group_by(Room.id, Room.name, Room.ip_address, Room.status)
+            .order_by(Room.id)
+        )).all()
+        return [
+            {
+                "room_id": room_id,
+                "room_name": name,
+                "ip_address": ip_address,
+                "status": status or "offline",
+                "presentation_count": presentation_count
+            }
+            for room_id, name, ip_address, status, presentation_count in rooms
+        ]
     except AttributeError:
         return []
\ No newline at end of file
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException, Body
+from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException, Body, Response
 from fastapi import Path as PathParam
 from fastapi.responses import StreamingResponse
 from pathlib import Path 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -10,20 +12,24 @@ from pathlib import Path
 import shutil
 import logging
 
-from app.db import get_db
+from app.db import get_async_read_db, get_db
 from app.models import Upload, Event
 from app.deps import require_roles
+from app import schemas
+from app.listing import ListParams, as_dicts, list_params, paginate_async
+from app.response_cache import cached, conditional
 from app.storage import get_storage
+from app.fingerprint import fingerprint_bytes, fingerprint_file
 
 router = APIRouter(
       # <-- add this
-    tags=["uploads"]
+    tags=["uploads"],
+    route_class=schemas.ModelRoute,
 )
 
 logger = logging.getLogger("uvicorn.error")
 
 UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # --------------------------
 # Pydantic DTOs
@@ -77,7 +83,7 @@ async def upload_files(
     needs_internet: bool = Form(False),
     files: List[UploadFile] = File(default=[]),  # Made optional - can be empty list
     db: Session = Depends(get_db),    
-):
+) -> schemas.UploadedFilesOut:
     storage = get_storage()
     uploaded = []
     
@@ -97,6 +103,7 @@ async def upload_files(
                     continue
                 data = await file.read()
                 meta = storage.save(file.filename, data)
+                fingerprint, content_hash = fingerprint_bytes(data)
                 up = Upload(
                     attendee_id=attendee_id,  
                     event_id=event_id,
@@ -109,6 +116,8 @@ async def upload_files(
                     has_audio=has_audio,
                     needs_internet=needs_internet,
                     etag=meta.get("etag"),
+                    fingerprint=fingerprint,
+                    content_hash=content_hash,
                 )
                 db.add(up)
                 uploaded.append(up)
@@ -147,7 +156,7 @@ def update_upload_tech_notes(
     upload_id: int = PathParam(...),
     payload: UploadTechNotesDTO = Body(...),
     db: Session = Depends(get_db),
-):
+) -> schemas.UploadStatusOut:
     up = db.query(Upload).filter(Upload.id == upload_id).first()
     if not up:
         raise HTTPException(status_code=404, detail="Upload not found")
@@ -164,17 +173,43 @@ def update_upload_tech_notes(
 # --------------------------
 # Manifest endpoint (optional)
 # --------------------------
+MANIFEST_FIELDS = {
+    "id": Upload.id,
+    "key": Upload.filename,
+    "etag": Upload.etag,
+    "updated_at": Upload.updated_at,
+}
+
+
 @router.get("/manifest/{event_id}")
-def manifest(event_id: int, db: Session = Depends(get_db)):
-    rows = db.query(Upload).filter(Upload.event_id == event_id).all()
-    return [{"id": r.id, "key": r.filename, "etag": r.etag, "updated_at": r.updated_at} for r in rows]
+@conditional()
+@cached()
+async def manifest(
+    event_id: int,
+    response: Response,
+    room_id: Optional[int] = None,
+    day: Optional[str] = None,
+    uploaded: Optional[bool] = None,
+    page: ListParams = Depends(list_params),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> List[schemas.ManifestEntryOut]:
+    fields = page.select(MANIFEST_FIELDS) or MANIFEST_FIELDS
+    query = select(*fields.values()).where(Upload.event_id == event_id)
+    if room_id:
+        query = query.where(Upload.room_id == room_id)
+    if day:
+        query = query.where(Upload.session_date == day)
+    if uploaded is not None:
+        query = query.where(Upload.uploaded.is_(uploaded))
+    rows = await paginate_async(db, query, page, [(Upload.id, False)], response)
+    return as_dicts(list(fields), rows)
 
 
 @router.post("/")
 async def create_session(
     session: SessionCreate,  # Changed from Form(...) parameters
     db: Session = Depends(get_db)
-):
+) -> schemas.CreatedSessionOut:
     """Create new session/upload - validates date within event period"""
     
     # Validate event exists
@@ -217,7 +252,7 @@ async def create_session(
     return {"id": db_session.id, **session_data}
 
 @router.put("/{session_id}")
-def update_session(session_id: int, session: dict, db: Session = Depends(get_db)):
+def update_session(session_id: int, session: dict, db: Session = Depends(get_db)) -> schemas.UploadOut:
     """Update session/upload"""
     db_session = db.query(Upload).filter(Upload.id == session_id).first()
     if not db_session:
@@ -252,7 +287,7 @@ def update_session(session_id: int, session: dict, db: Session = Depends(get_db)
     return db_session
 
 @router.delete("/{session_id}")
-def delete_session(session_id: int, db: Session = Depends(get_db)):
+def delete_session(session_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Delete session/upload"""
     session = db.query(Upload).filter(Upload.id == session_id).first()
     if not session:
@@ -263,7 +298,9 @@ def delete_session(session_id: int, db: Session = Depends(get_db)):
     return {"message": "Session deleted"}
 
 @router.post("/{session_id}/upload")
-def upload_presentation(session_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+def upload_presentation(
+    session_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)
+) -> schemas.FileSavedOut:
     """Upload presentation file for a session"""
     session = db.query(Upload).filter(Upload.id == session_id).first()
     if not session:
@@ -276,6 +313,7 @@ def upload_presentation(session_id: int, file: UploadFile = File(...), db: Sessi
     
     # Save file - filename is now guaranteed to be str
     file_path = UPLOAD_DIR / f"{session_id}_{filename}"
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
     
@@ -286,6 +324,7 @@ def upload_presentation(session_id: int, file: UploadFile = File(...), db: Sessi
     session.uploaded = True
     session.filename = filename  # type: ignore[assignment]
     session.size_bytes = file_size  # type: ignore[assignment]
+    session.fingerprint, session.content_hash = fingerprint_file(file_path)
     db.commit()
     
     return {"message": "File uploaded successfully", "file_path": str(file_path)}
@@ -293,7 +332,7 @@ def upload_presentation(session_id: int, file: UploadFile = File(...), db: Sessi
 
 # Add this endpoint to get unassigned files
 @router.get("/{event_id}/unassigned-files")
-def get_unassigned_files(event_id: int, db: Session = Depends(get_db)):
+def get_unassigned_files(event_id: int, db: Session = Depends(get_db)) -> List[schemas.UnassignedFileOut]:
     """Get list of files in uploads folder that haven't been assigned to sessions"""
     upload_dir = Path("uploads")
     if not upload_dir.exists():
@@ -330,7 +369,7 @@ def get_unassigned_files(event_id: int, db: Session = Depends(get_db)):
 
 # Add this endpoint to sessions.py
 @router.post("/{session_id}/assign-file")
-def assign_file_to_session(session_id: int, data: dict, db: Session = Depends(get_db)):
+def assign_file_to_session(session_id: int, data: dict, db: Session = Depends(get_db)) -> schemas.FileAssignedOut:
     """Assign an uploaded file to a specific session"""
     filename = data.get("filename")
     
@@ -353,6 +392,7 @@ def assign_file_to_session(session_id: int, data: dict, db: Session = Depends(ge
     session.filename = filename  # type: ignore[assignment]
     session.uploaded = True  # type: ignore[assignment]
     session.size_bytes = file_path.stat().st_size  # type: ignore[assignment]
+    session.fingerprint, session.content_hash = fingerprint_file(file_path)
     
     db.commit()
     
@@ -369,7 +409,7 @@ async def update_upload(
     session_time: Optional[str] = Form(None),  # ADD THIS
     files: Optional[list[UploadFile]] = File(None),
     db: Session = Depends(get_db)
-):
+) -> schemas.UploadStatusOut:
     print("PUT /files/uploads/{upload_id} called with:", upload_id)
     print("Form data received:", attendee_id, event_id, speaker_id, room_id, session_date, session_time)
     print("Number of files uploaded:", len(files) if files else 0)
@@ -401,6 +441,7 @@ async def update_upload(
                 shutil.copyfileobj(file.file, buffer)
             upload.filename = file.filename # type: ignore[assignment]
             upload.size_bytes = file.size # type: ignore[assignment]
+            upload.fingerprint, upload.content_hash = fingerprint_file(file_path)
     
     db.commit()
     db.refresh(upload)
@@ -417,7 +458,7 @@ async def create_upload(
     session_time: Optional[str] = Form(None),
     files: Optional[List[UploadFile]] = File(None),
     db: Session = Depends(get_db)
-):
+) -> schemas.UploadsCreatedOut:
     logger.info("=== /uploads endpoint hit ===")
     logger.info(f"attendee_id={attendee_id}")
     logger.info(f"event_id={event_id}")
@@ -438,6 +479,7 @@ async def create_upload(
             file_path = f"uploads/{event_id}_{file.filename}"
             with open(file_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
+            fingerprint, content_hash = fingerprint_file(file_path)
 
             upload = Upload(
                 attendee_id=attendee_id,
@@ -449,6 +491,8 @@ async def create_upload(
                 filename=file.filename,
                 size_bytes=file.size,
                 uploaded=True,
+                fingerprint=fingerprint,
+                content_hash=content_hash,
             )
 
             db.add(upload)
@@ -477,7 +521,7 @@ async def bulk_upload_files(
     has_audio: bool = Form(False),
     needs_internet: bool = Form(False),
     db: Session = Depends(get_db),
-):
+) -> schemas.BulkUploadOut:
     """
     Bulk upload multiple files for a given event/session/speaker.
     Filenames are saved as eventId_sessionId_originalFilename
@@ -496,11 +540,13 @@ async def bulk_upload_files(
         file_path = UPLOAD_DIR / safe_filename
 
         # Save the file
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        # Get file size
+        # Get file size and fingerprint
         size_bytes = file_path.stat().st_size
+        fingerprint, content_hash = fingerprint_file(file_path)
 
         # Store in DB
         upload_record = Upload(
@@ -515,6 +561,8 @@ async def bulk_upload_files(
             has_video=has_video,
             has_audio=has_audio,
             needs_internet=needs_internet,
+            fingerprint=fingerprint,
+            content_hash=content_hash,
         )
 
         db.add(upload_record)
@@ -534,7 +582,7 @@ async def bulk_upload_files(
 
 
 @router.delete("/uploads/{upload_id}")
-def delete_upload(upload_id: int, db: Session = Depends(get_db)):
+def delete_upload(upload_id: int, db: Session = Depends(get_db)) -> schemas.StatusOut:
     upload = db.query(Upload).filter(Upload.id == upload_id).first()
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
@@ -545,12 +593,11 @@ def delete_upload(upload_id: int, db: Session = Depends(get_db)):
     return {"status": "deleted"}
 
 UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@router.get("/events/{event_id}/download/{upload_id}")
+@router.get("/events/{event_id}/download/{upload_id}", response_class=StreamingResponse)
 def download_upload(event_id: int, upload_id: int, db: Session = Depends(get_db)):
     """
     Download a specific uploaded file by its ID for an event
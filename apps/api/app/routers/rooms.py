@@ -1,52 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from ..db import get_db
-from ..models import Room, Upload
+from ..db import get_db, get_read_db
+from ..models import EventRoomStats, Room, RoomFile, Upload, event_rooms
 from ..deps import require_roles
 
 from pathlib import Path
 from typing import List, Optional
 from fastapi import HTTPException
-import paramiko
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+import hmac
+import json
+from ..config import get_settings
 from ..room_scanner import RoomScanner
-from ..file_matcher import FileMatcher
+from ..remote_scanner import RoomShare, get_remote_scanner, scan_rooms
+from ..room_sync import RoomSyncEngine
+from ..storage import get_storage
+from ..room_inventory import known_files, match_scanned_files
+from ..single_flight import SingleFlight, advisory_lock
+from ..match_memory import forget, remember
+from .. import response_cache, schemas
+from ..listing import ListParams, as_dicts, list_params, paginate
 
 
-router = APIRouter()
+router = APIRouter(route_class=schemas.ModelRoute)
+
+
+# --------------------------
+# Pydantic DTOs
+# --------------------------
+class InventoryEntryDTO(BaseModel):
+    path: str  # relative to the agent's folder, "/"-separated
+    size: int
+    mtime: float  # seconds since the epoch
+    fingerprint: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+class InventoryBatchDTO(BaseModel):
+    agent_id: str = Field(..., max_length=64)
+    seq: int
+    full: bool = False  # complete listing; anything not in it was removed
+    added: List[InventoryEntryDTO] = []
+    changed: List[InventoryEntryDTO] = []
+    removed: List[str] = []
+
+
+class MatchAssignmentDTO(BaseModel):
+    file_path: str
+    upload_id: int
+
+ROOM_FIELDS = {
+    "id": Room.id,
+    "name": Room.name,
+    "capacity": Room.capacity,
+    "location": Room.location,
+    "layout": Room.layout,
+    "equipment": Room.equipment,
+    "ip_address": Room.ip_address,
+    "status": Room.status,
+    # Counts from event_room_stats (of event_id, or of all events)
+    "presentation_count": None,
+    "uploaded_count": None,
+    "missing_count": None,
+}
+
+PRESENTATION_FIELDS = {
+    "id": Upload.id,
+    "fileName": Upload.filename,
+    "event_id": Upload.event_id,
+    "speaker_id": Upload.speaker_id,
+    "session_date": Upload.session_date,
+    "session_time": Upload.session_time,
+    "uploaded": Upload.uploaded,
+    "size_bytes": Upload.size_bytes,
+}
 
 @router.get("/")
-def list_rooms(db: Session = Depends(get_db)):
-    rooms = (
-        db.query(Room)
-        .options(joinedload(Room.uploads))
-        .all()
-    )
+@response_cache.conditional()
+def list_rooms(
+    response: Response,
+    event_id: Optional[int] = None,
+    status: Optional[str] = None,
+    page: ListParams = Depends(list_params),
+    db: Session = Depends(get_db)
+) -> List[schemas.RoomOut]:
+    """
+    Rooms with their presentation counts
 
-    return [
-    {
-        "id": r.id,
-        "name": r.name,
-        "capacity": r.capacity,
-        "location": r.location,
-        "layout": r.layout,
-        "equipment": r.equipment,
-        "ip_address": r.ip_address,
-        "status": r.status, 
-        "presentations": [
-            {
-                "id": u.id,
-                "fileName": u.filename
-            }
-            for u in r.uploads
-        ]
-    }
-    for r in rooms
-]
+    With event_id only the event's rooms are listed and counted. The
+    presentations themselves are listed per room by GET /{room_id}/presentations.
+    """
+    fields = page.select(ROOM_FIELDS) or ROOM_FIELDS
+    columns = {name: column for name, column in fields.items() if column is not None}
+    query = db.query(Room.id, *columns.values())
+    if event_id:
+        query = query.join(event_rooms, event_rooms.c.room_id == Room.id).filter(event_rooms.c.event_id == event_id)
+    if status:
+        query = query.filter(Room.status == status)
+    rows = paginate(query, page, [(Room.id, False)], response)
+    rooms = [(row[0], dict(zip(columns, row[1:]))) for row in rows]
+
+    count_fields = [name for name in fields if fields[name] is None]
+    if count_fields and rooms:
+        counts_query = db.query(
+            EventRoomStats.room_id, func.sum(EventRoomStats.total), func.sum(EventRoomStats.uploaded)
+        ).filter(EventRoomStats.room_id.in_([room_id for room_id, _ in rooms]))
+        if event_id:
+            counts_query = counts_query.filter(EventRoomStats.event_id == event_id)
+        counts = {
+            room_id: (int(total), int(uploaded))
+            for room_id, total, uploaded in counts_query.group_by(EventRoomStats.room_id)
+        }
+        for room_id, room in rooms:
+            total, uploaded = counts.get(room_id, (0, 0))
+            for name, value in (("presentation_count", total), ("uploaded_count", uploaded), ("missing_count", total - uploaded)):
+                if name in count_fields:
+                    room[name] = value
+
+    return [room for _, room in rooms]
+
+@router.get("/{room_id}/presentations")
+def list_room_presentations(
+    room_id: int,
+    response: Response,
+    event_id: Optional[int] = None,
+    uploaded: Optional[bool] = None,
+    page: ListParams = Depends(list_params),
+    db: Session = Depends(get_read_db)
+) -> List[schemas.RoomPresentationOut]:
+    """Presentations assigned to one room, optionally of one event; pageable like the other lists"""
+    fields = page.select(PRESENTATION_FIELDS) or PRESENTATION_FIELDS
+    query = db.query(*fields.values()).filter(Upload.room_id == room_id)
+    if event_id:
+        query = query.filter(Upload.event_id == event_id)
+    if uploaded is not None:
+        query = query.filter(Upload.uploaded.is_(uploaded))
+    rows = paginate(query, page, [(Upload.id, False)], response)
+    return as_dicts(list(fields), rows)
 
 @router.post("/")
-def create_room(room: dict, db: Session = Depends(get_db)):
+def create_room(room: dict, db: Session = Depends(get_db)) -> schemas.RoomOut:
     """Add new room"""
     room_data = {k: v for k, v in room.items() if k != "event_id"}
 
@@ -90,7 +186,7 @@ def create_room(room: dict, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Failed to create room")
 
 @router.put("/{room_id}")
-def update_room(room_id: int, room: dict, db: Session = Depends(get_db)):
+def update_room(room_id: int, room: dict, db: Session = Depends(get_db)) -> schemas.RoomOut:
     """Update room (assign IP address, change status)"""
     db_room = db.query(Room).filter(Room.id == room_id).first()
     if not db_room:
@@ -117,7 +213,7 @@ def update_room(room_id: int, room: dict, db: Session = Depends(get_db)):
     return db_room
 
 @router.delete("/{room_id}")
-def delete_room(room_id: int, db: Session = Depends(get_db)):
+def delete_room(room_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     """Remove room from event"""
     room = db.query(Room).filter(Room.id == room_id).first()
     if not room:
@@ -128,7 +224,7 @@ def delete_room(room_id: int, db: Session = Depends(get_db)):
     return {"message": "Room deleted"}
 
 @router.put("/{room_id}/ping")
-def ping_room(room_id: int, db: Session = Depends(get_db)):
+def ping_room(room_id: int, db: Session = Depends(get_db)) -> schemas.RoomPingOut:
     """
     Ping a room to check if it's online
     Updates room status to green (online) or red (offline)
@@ -157,6 +253,143 @@ def ping_room(room_id: int, db: Session = Depends(get_db)):
     }
 
 
+# Concurrent PUT /{room_id}/scan calls in this process join the running scan
+_scan_flights = SingleFlight()
+
+
+def _scan_params(event_id: Optional[int], session_date: Optional[date], update_uploads: bool) -> list:
+    return [event_id, session_date.isoformat() if session_date else None, update_uploads]
+
+
+def _recent_scan(room: Room, params: list) -> Optional[dict]:
+    """The room's last scan summary if it is recent enough and used the same parameters"""
+    window = get_settings().SCAN_RESULT_CACHE_SECONDS
+    if window <= 0 or not room.last_scan_at or not room.last_scan_result:
+        return None
+    if datetime.utcnow() - room.last_scan_at > timedelta(seconds=window):
+        return None
+    stored = json.loads(room.last_scan_result)
+    if stored.get("params") != params:
+        return None
+    return {**stored["result"], "cached": True}
+
+
+def _apply_scan(
+    db: Session,
+    room: Room,
+    scanned_files: List[dict],
+    event_id: Optional[int],
+    session_date: Optional[date],
+    update_uploads: bool
+) -> dict:
+    """Record scanned files, match them to uploads and build the scan summary"""
+    # Record the inventory and match files to uploads
+    result = match_scanned_files(
+        db,
+        room.id,
+        scanned_files,
+        full=True,
+        event_id=event_id,
+        session_date=session_date,
+        update_uploads=update_uploads
+    )
+    matched_uploads = result["matches"]
+    unmatched_files = result["unmatched"]
+    
+    scan_date = datetime.utcnow()
+    summary = {
+        "status": "ok",
+        "room_id": room.id,
+        "ip_address": room.ip_address,
+        "scan_date": scan_date.isoformat(),
+        "total_files": len(scanned_files),
+        "matched_uploads": len(matched_uploads),
+        "unmatched_files": len(unmatched_files),
+        "updated_uploads": result["updated_uploads"],
+        "matches": matched_uploads,
+        "unmatched": unmatched_files
+    }
+    
+    # Let other workers reuse this result for SCAN_RESULT_CACHE_SECONDS
+    room.last_scan_at = scan_date
+    room.last_scan_result = json.dumps({
+        "params": _scan_params(event_id, session_date, update_uploads),
+        "result": summary
+    })
+    db.commit()
+    
+    return summary
+
+
+@router.post("/scan")
+def scan_multiple_rooms(
+    room_ids: List[int] = Body(..., embed=True),
+    event_id: Optional[int] = Query(None, description="Filter uploads by event"),
+    session_date: Optional[date] = Query(None, description="Filter uploads by session date"),
+    update_uploads: bool = Query(True, description="Update matched upload records"),
+    db: Session = Depends(get_db)
+) -> List[schemas.ScanSummaryOut]:
+    """
+    Scan several rooms at once
+    
+    Rooms are pinged and listed concurrently (SCAN_MAX_PARALLEL_ROOMS),
+    then matched one by one. Rooms scanned within SCAN_RESULT_CACHE_SECONDS
+    return that result instead. Returns one scan summary per room.
+    """
+    settings = get_settings()
+    params = _scan_params(event_id, session_date, update_uploads)
+    rooms = db.query(Room).filter(Room.id.in_(room_ids)).all()
+    scannable = [r for r in rooms if r.ip_address is not None]
+    cached = {r.id: _recent_scan(r, params) for r in scannable}
+    to_scan = [r for r in scannable if cached[r.id] is None]
+    
+    results = scan_rooms(
+        [RoomShare.from_room(r) for r in to_scan],
+        known_by_room={r.id: known_files(db, r.id) for r in to_scan}
+    )
+    
+    summaries = []
+    for room_id in room_ids:
+        room = next((r for r in scannable if r.id == room_id), None)
+        if room is None:
+            summaries.append({
+                "status": "error",
+                "room_id": room_id,
+                "error": "Room not found or has no IP address configured"
+            })
+            continue
+        
+        if cached[room.id] is not None:
+            summaries.append(cached[room.id])
+            continue
+        
+        result = results[room.id]
+        room.status = "offline" if result["status"] == "offline" else "online"
+        db.commit()
+        
+        if result["status"] == "offline":
+            summaries.append({
+                "status": "offline",
+                "room_id": room.id,
+                "ip_address": room.ip_address,
+                "message": "Room is not reachable"
+            })
+        elif result["status"] == "error":
+            summaries.append({"status": "error", "room_id": room.id, "error": result["error"]})
+        else:
+            try:
+                # Serialize the writes with a PUT /{room_id}/scan running elsewhere
+                with advisory_lock(db.get_bind(), f"room_scan:{room.id}", settings.SCAN_LOCK_TIMEOUT_SECONDS):
+                    summaries.append(
+                        _apply_scan(db, room, result["files"], event_id, session_date, update_uploads)
+                    )
+            except Exception as e:
+                db.rollback()
+                summaries.append({"status": "error", "room_id": room.id, "error": f"Scan failed: {str(e)}"})
+    
+    return summaries
+
+
 @router.put("/{room_id}/scan")
 def scan_room(
     room_id: int,
@@ -164,7 +397,7 @@ def scan_room(
     session_date: Optional[date] = Query(None, description="Filter uploads by session date"),
     update_uploads: bool = Query(True, description="Update matched upload records"),
     db: Session = Depends(get_db)
-):
+) -> schemas.ScanSummaryOut:
     """
     Scan room for files and match them with expected uploads
     
@@ -175,7 +408,28 @@ def scan_room(
     4. Optionally update upload records with file info
     
     Returns summary of scan results
+    
+    Concurrent scans of the same room are collapsed: callers in this process
+    join the running scan, other workers wait on a database lock and then
+    reuse its result if it is at most SCAN_RESULT_CACHE_SECONDS old.
     """
+    params = _scan_params(event_id, session_date, update_uploads)
+    return _scan_flights.do(
+        (room_id, *params),
+        lambda: _scan_room_once(db, room_id, event_id, session_date, update_uploads)
+    )
+
+
+def _scan_room_once(
+    db: Session,
+    room_id: int,
+    event_id: Optional[int],
+    session_date: Optional[date],
+    update_uploads: bool
+) -> dict:
+    settings = get_settings()
+    params = _scan_params(event_id, session_date, update_uploads)
+    
     # Get room
     room = db.query(Room).filter(Room.id == room_id).first()
     if not room:
@@ -184,6 +438,10 @@ def scan_room(
     if room.ip_address is None:
         raise HTTPException(status_code=400, detail="Room has no IP address configured")
     
+    cached = _recent_scan(room, params)
+    if cached:
+        return cached
+    
     # Ping the room
     scanner = RoomScanner()
     is_online = scanner.ping_host(room.ip_address)
@@ -200,87 +458,167 @@ def scan_room(
             "message": "Room is not reachable"
         }
     
-    try:
-        # Determine folder path
-        if room.attachment_folder:
-            folder_path = room.attachment_folder
-        elif room.share_path:
-            folder_path = f"\\\\{room.ip_address}\\{room.share_path}"
-        else:
-            folder_path = f"\\\\{room.ip_address}\\Attachments"
-        
-        # Scan for files
-        scanned_files = scanner.scan_folder(folder_path)
+    with advisory_lock(db.get_bind(), f"room_scan:{room_id}", settings.SCAN_LOCK_TIMEOUT_SECONDS) as acquired:
+        # Another worker may have finished a scan while we waited for the lock
+        # (room was expired by the commit above, so this reads fresh values)
+        cached = _recent_scan(room, params)
+        if cached:
+            return cached
+        if not acquired:
+            return {
+                "status": "busy",
+                "room_id": room_id,
+                "message": "Another scan of this room is still running"
+            }
         
-        # Get uploads to match against
-        upload_query = db.query(Upload).filter(Upload.room_id == room_id)
-        if event_id:
-            upload_query = upload_query.filter(Upload.event_id == event_id)
-        if session_date:
-            upload_query = upload_query.filter(Upload.session_date == session_date)
-        uploads = upload_query.all()
+        try:
+            # Scan the share (mounted folder, SFTP or UNC path)
+            share = RoomShare.from_room(room)
+            scanned_files = get_remote_scanner(share).scan(share, known=known_files(db, room_id))
+            
+            return _apply_scan(db, room, scanned_files, event_id, session_date, update_uploads)
+            
+        except FileNotFoundError as e:
+            return {
+                "status": "error",
+                "room_id": room_id,
+                "error": f"Folder not found: {str(e)}"
+            }
+        except Exception as e:
+            db.rollback()
+            return {
+                "status": "error",
+                "room_id": room_id,
+                "error": f"Scan failed: {str(e)}"
+            }
+
+
+@router.post("/{room_id}/inventory")
+def push_inventory(
+    room_id: int,
+    batch: InventoryBatchDTO,
+    event_id: Optional[int] = Query(None, description="Filter uploads by event"),
+    session_date: Optional[date] = Query(None, description="Filter uploads by session date"),
+    x_agent_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+) -> schemas.InventoryResultOut:
+    """
+    Apply an inventory delta pushed by the agent on a room PC
+    
+    Batches are numbered per agent. A batch that does not follow the last
+    applied one (or comes from an unknown agent) is rejected with 409 and
+    the agent answers with a full listing. A re-sent batch that was already
+    applied is acknowledged without applying it again. Only the files in
+    the batch are matched to uploads. Requests must carry ROOM_AGENT_TOKEN
+    as X-Agent-Token; without a configured token the endpoint is disabled.
+    """
+    settings = get_settings()
+    if not settings.ROOM_AGENT_TOKEN:
+        # Agents reach this through NAT without a user login; never run it unauthenticated
+        raise HTTPException(status_code=503, detail="Room agents are not configured (ROOM_AGENT_TOKEN)")
+    if not hmac.compare_digest(x_agent_token or "", settings.ROOM_AGENT_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid agent token")
+    
+    with advisory_lock(db.get_bind(), f"room_scan:{room_id}", settings.SCAN_LOCK_TIMEOUT_SECONDS) as acquired:
+        if not acquired:
+            raise HTTPException(status_code=503, detail="Room is busy, retry later")
         
-        # Match files to uploads
-        matcher = FileMatcher()
-        matched_uploads = []
-        unmatched_files = []
+        room = db.query(Room).filter(Room.id == room_id).first()
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
         
-        for scanned_file in scanned_files:
-            upload_id = matcher.match_file_to_upload(scanned_file, uploads)
-            
-            if upload_id:
-                # Found a match
-                matched_uploads.append({
-                    "upload_id": upload_id,
-                    "filename": scanned_file['filename'],
-                    "file_path": scanned_file['file_path'],
-                    "file_size": scanned_file['file_size']
-                })
-                
-                # Update upload record if requested
-                if update_uploads:
-                    upload = db.query(Upload).filter(Upload.id == upload_id).first()
-                    if upload:
-                        upload.size_bytes = scanned_file['file_size']
-                        upload.has_video = scanned_file['has_video']
-                        upload.has_audio = scanned_file['has_audio']
-                        upload.uploaded = True
-                        upload.updated_at = datetime.utcnow()
-            else:
-                # No match found
-                unmatched_files.append({
-                    "filename": scanned_file['filename'],
-                    "file_size": scanned_file['file_size'],
-                    "file_path": scanned_file['file_path']
-                })
+        if not batch.full:
+            if room.agent_id != batch.agent_id or room.agent_seq is None:
+                raise HTTPException(status_code=409, detail="Unknown agent, send a full inventory")
+            if batch.seq <= room.agent_seq:
+                return {"status": "duplicate", "room_id": room_id, "seq": room.agent_seq}
+            if batch.seq != room.agent_seq + 1:
+                raise HTTPException(status_code=409, detail="Missed a batch, send a full inventory")
         
-        if update_uploads:
-            db.commit()
+        scanned_files = []
+        for entry in batch.added + batch.changed:
+            if Path(entry.path).suffix.lower() not in RoomScanner.MEDIA_EXTENSIONS:
+                continue
+            scanned_file = RoomScanner.build_file_info(entry.path, entry.size, entry.mtime)
+            scanned_file["fingerprint"] = entry.fingerprint
+            scanned_file["content_hash"] = entry.content_hash
+            scanned_files.append(scanned_file)
         
-        return {
-            "status": "ok",
-            "room_id": room_id,
-            "ip_address": room.ip_address,
-            "scan_date": datetime.utcnow().isoformat(),
-            "total_files": len(scanned_files),
-            "matched_uploads": len(matched_uploads),
-            "unmatched_files": len(unmatched_files),
-            "matches": matched_uploads,
-            "unmatched": unmatched_files
-        }
+        result = match_scanned_files(
+            db,
+            room_id,
+            scanned_files,
+            removed_paths=batch.removed,
+            full=batch.full,
+            event_id=event_id,
+            session_date=session_date
+        )
         
-    except FileNotFoundError as e:
-        return {
-            "status": "error",
-            "room_id": room_id,
-            "error": f"Folder not found: {str(e)}"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "room_id": room_id,
-            "error": f"Scan failed: {str(e)}"
-        }
+        room.agent_id = batch.agent_id
+        room.agent_seq = batch.seq
+        room.agent_seen_at = datetime.utcnow()
+        room.status = "online"
+        db.commit()
+    
+    return {
+        "status": "ok",
+        "room_id": room_id,
+        "seq": batch.seq,
+        "total_files": len(scanned_files),
+        "removed_files": len(batch.removed),
+        "matched_uploads": len(result["matches"]),
+        "unmatched_files": len(result["unmatched"]),
+        "updated_uploads": result["updated_uploads"],
+        "matches": result["matches"],
+        "unmatched": result["unmatched"]
+    }
+
+
+@router.post("/{room_id}/matches")
+def assign_file(
+    room_id: int, assignment: MatchAssignmentDTO, db: Session = Depends(get_db)
+) -> schemas.MatchAssignmentOut:
+    """
+    Confirm a scan match, or assign a file on the share to an upload by hand
+    
+    The assignment is remembered, so later scans resolve the file (by
+    fingerprint, or by path while unchanged) without fuzzy matching.
+    """
+    room_file = db.query(RoomFile).filter(
+        RoomFile.room_id == room_id,
+        RoomFile.file_path == assignment.file_path
+    ).first()
+    if not room_file:
+        raise HTTPException(status_code=404, detail="File not found in room inventory")
+    
+    upload = db.query(Upload).filter(Upload.id == assignment.upload_id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    source = "confirmed" if room_file.upload_id == upload.id else "manual"
+    remember(db, room_id, room_file.file_path, room_file.fingerprint, upload.id, source)
+    room_file.upload_id = upload.id
+    upload.uploaded = True
+    upload.updated_at = datetime.utcnow()
+    db.commit()
+    
+    return {
+        "status": "ok",
+        "room_id": room_id,
+        "file_path": room_file.file_path,
+        "upload_id": upload.id,
+        "source": source
+    }
+
+
+@router.delete("/{room_id}/matches")
+def forget_match(
+    room_id: int, file_path: str = Query(...), db: Session = Depends(get_db)
+) -> schemas.MatchForgottenOut:
+    """Drop a remembered assignment; the next scan matches the file from scratch"""
+    forgotten = forget(db, room_id, file_path)
+    db.commit()
+    return {"status": "ok", "room_id": room_id, "file_path": file_path, "forgotten": forgotten}
 
 
 @router.post("/{room_id}/verify-uploads")
@@ -289,7 +627,7 @@ def verify_uploads(
     event_id: Optional[int] = Query(None, description="Filter by event"),
     session_date: Optional[date] = Query(None, description="Filter by session date"),
     db: Session = Depends(get_db)
-):
+) -> schemas.VerifyUploadsOut:
     """
     Check which expected uploads are missing from the room
     Useful for pre-event verification
@@ -297,12 +635,14 @@ def verify_uploads(
     This does NOT scan the room - it uses the 'uploaded' flag
     from previous scans to determine what's missing
     """
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = db.query(Room.name).filter(Room.id == room_id).first()
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     
     # Get expected uploads
-    upload_query = db.query(Upload).filter(Upload.room_id == room_id)
+    upload_query = db.query(
+        Upload.id, Upload.filename, Upload.speaker_id, Upload.size_bytes, Upload.uploaded
+    ).filter(Upload.room_id == room_id)
     if event_id:
         upload_query = upload_query.filter(Upload.event_id == event_id)
     if session_date:
@@ -337,6 +677,38 @@ def verify_uploads(
     }
 
 
+@router.post("/{room_id}/sync")
+def sync_room(
+    room_id: int,
+    event_id: Optional[int] = Query(None, description="Filter uploads by event"),
+    session_date: Optional[date] = Query(None, description="Filter uploads by session date"),
+    db: Session = Depends(get_db)
+) -> schemas.SyncResultOut:
+    """
+    Push the room's missing or outdated presentations to its share
+    
+    Files already on the share (same fingerprint) are skipped, revisions
+    of large files only send changed blocks, and every copy is verified.
+    Upload.uploaded reflects whether a verified copy is on the share.
+    """
+    room = db.query(Room).filter(Room.id == room_id).first()
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    
+    try:
+        result = RoomSyncEngine(get_storage()).sync_room(db, room, event_id, session_date)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        return {
+            "status": "error",
+            "room_id": room_id,
+            "error": f"Sync failed: {str(e)}"
+        }
+    
+    return {"status": "ok", **result}
+
+
 @router.put("/{room_id}/credentials")
 def update_credentials(
     room_id: int,
@@ -345,7 +717,7 @@ def update_credentials(
     share_path: Optional[str] = None,
     attachment_folder: Optional[str] = None,
     db: Session = Depends(get_db)
-):
+) -> schemas.MessageOut:
     """Update room network credentials"""
     room = db.query(Room).filter(Room.id == room_id).first()
     if not room:
@@ -1,19 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
 from sqlalchemy.orm import Session
 from ..db import get_db
-from ..models import Speaker, Upload, Room, Event
+from ..models import Speaker, Upload, Room, Event, event_speakers
 from ..deps import require_roles
 from pydantic import BaseModel
 from typing import List, Optional
-from sqlalchemy import Table, MetaData, insert
+from sqlalchemy import insert
 import shutil
 from pathlib import Path
 from datetime import datetime
+from ..fingerprint import fingerprint_bytes
+from .. import event_stats, response_cache, schemas
+from ..listing import ListParams, as_dicts, list_params, model_fields, paginate
 
-router = APIRouter()
+router = APIRouter(route_class=schemas.ModelRoute)
 
 UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 
 class SpeakerBulkItem(BaseModel):
@@ -36,14 +38,26 @@ def safe_getattr(obj, attr, default=None):
 # ============ SPEAKER ENDPOINTS ============
 
 @router.get("/", include_in_schema=True)
-def list_speakers(db: Session = Depends(get_db)):
-    return db.query(Speaker).all()
+@response_cache.conditional()
+def list_speakers(
+    response: Response,
+    event_id: Optional[int] = None,
+    page: ListParams = Depends(list_params),
+    db: Session = Depends(get_db)
+) -> List[schemas.SpeakerOut]:
+    fields = page.select(model_fields(Speaker)) or model_fields(Speaker)
+    query = db.query(*fields.values())
+    if event_id:
+        query = query.join(event_speakers, event_speakers.c.speaker_id == Speaker.id).filter(
+            event_speakers.c.event_id == event_id
+        )
+    rows = paginate(query, page, [(Speaker.id, False)], response)
+    return as_dicts(list(fields), rows)
 
 
 @router.post("/")
-def create_speaker(speaker: dict, db: Session = Depends(get_db)):
+def create_speaker(speaker: dict, db: Session = Depends(get_db)) -> schemas.SpeakerOut:
     """Add new speaker and optionally link to an event"""
-    from sqlalchemy import Table, MetaData, insert
     event_id = speaker.pop("event_id", None)
     db_speaker = Speaker(**speaker)
     db.add(db_speaker)
@@ -51,8 +65,6 @@ def create_speaker(speaker: dict, db: Session = Depends(get_db)):
     db.refresh(db_speaker)
 
     if event_id:
-        metadata = MetaData()
-        event_speakers = Table('event_speakers', metadata, autoload_with=db.get_bind())
         stmt = insert(event_speakers).values(event_id=event_id, speaker_id=db_speaker.id)
         db.execute(stmt)
         db.commit()
@@ -61,15 +73,15 @@ def create_speaker(speaker: dict, db: Session = Depends(get_db)):
 
 
 @router.get("/{speaker_id}")
-def get_speaker(speaker_id: int, db: Session = Depends(get_db)):
-    speaker = db.query(Speaker).filter(Speaker.id == speaker_id).first()
+def get_speaker(speaker_id: int, db: Session = Depends(get_db)) -> schemas.SpeakerOut:
+    speaker = db.query(*model_fields(Speaker).values()).filter(Speaker.id == speaker_id).first()
     if not speaker:
         raise HTTPException(status_code=404, detail="Speaker not found")
     return speaker
 
 
 @router.put("/{speaker_id}")
-def update_speaker(speaker_id: int, speaker: dict, db: Session = Depends(get_db)):
+def update_speaker(speaker_id: int, speaker: dict, db: Session = Depends(get_db)) -> schemas.SpeakerOut:
     db_speaker = db.query(Speaker).filter(Speaker.id == speaker_id).first()
     if not db_speaker:
         raise HTTPException(status_code=404, detail="Speaker not found")
@@ -82,10 +94,12 @@ def update_speaker(speaker_id: int, speaker: dict, db: Session = Depends(get_db)
 
 
 @router.delete("/{speaker_id}")
-def delete_speaker(speaker_id: int, db: Session = Depends(get_db)):
+def delete_speaker(speaker_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     speaker = db.query(Speaker).filter(Speaker.id == speaker_id).first()
     if not speaker:
         raise HTTPException(status_code=404, detail="Speaker not found")
+    # Bulk delete skips the ORM flush hooks, so take the uploads out of the counters first
+    event_stats.subtract_uploads(db, Upload.speaker_id == speaker_id)
     db.query(Upload).filter(Upload.speaker_id == speaker_id).delete()
     db.delete(speaker)
     db.commit()
@@ -94,12 +108,26 @@ def delete_speaker(speaker_id: int, db: Session = Depends(get_db)):
 
 # FIX #7: Sessions with session_count and upload counts
 @router.get("/{speaker_id}/sessions")
-def get_speaker_sessions(speaker_id: int, event_id: Optional[int] = None, db: Session = Depends(get_db)):
+def get_speaker_sessions(
+    speaker_id: int, event_id: Optional[int] = None, db: Session = Depends(get_db)
+) -> List[schemas.UploadSessionOut]:
     """Get all sessions/uploads for a speaker, optionally filtered by event"""
-    query = db.query(Upload).filter(Upload.speaker_id == speaker_id)
+    # Room and event names come along in the same query; the speaker is the same for every row
+    query = (
+        db.query(
+            Upload.id, Upload.event_id, Upload.speaker_id, Upload.room_id, Upload.session_date,
+            Upload.session_time, Upload.own_machine, Upload.has_video_with_audio,
+            Upload.has_video_without_audio, Upload.has_audio_only, Upload.no_ppt, Upload.uploaded,
+            Upload.filename, Room.name.label("room_name"), Event.title.label("event_title")
+        )
+        .outerjoin(Room, Upload.room_id == Room.id)
+        .outerjoin(Event, Upload.event_id == Event.id)
+        .filter(Upload.speaker_id == speaker_id)
+    )
     if event_id:
         query = query.filter(Upload.event_id == event_id)
     sessions = query.all()
+    speaker_name = db.query(Speaker.name).filter(Speaker.id == speaker_id).scalar()
 
     enriched = []
     for session in sessions:
@@ -124,14 +152,12 @@ def get_speaker_sessions(speaker_id: int, event_id: Optional[int] = None, db: Se
             "uploaded": safe_getattr(session, "uploaded", False),
             "upload_file_path": session.filename if str(session.filename) != "placeholder.pptx" else None,
         }
-        if session.speaker is not None:
-            session_dict["speaker_name"] = session.speaker.name
-        if session.room_id is not None:
-            room = db.query(Room).filter(Room.id == session.room_id).first()
-            if room is not None:
-                session_dict["room_name"] = room.name
-        if session.event is not None:
-            session_dict["event_name"] = session.event.title
+        if speaker_name is not None:
+            session_dict["speaker_name"] = speaker_name
+        if session.room_name is not None:
+            session_dict["room_name"] = session.room_name
+        if session.event_title is not None:
+            session_dict["event_name"] = session.event_title
 
         enriched.append(session_dict)
 
@@ -140,7 +166,7 @@ def get_speaker_sessions(speaker_id: int, event_id: Optional[int] = None, db: Se
 
 # FIX #3: Create session WITHOUT auto-creating a presentation
 @router.post("/{speaker_id}/sessions")
-def create_speaker_session(speaker_id: int, payload: dict, db: Session = Depends(get_db)):
+def create_speaker_session(speaker_id: int, payload: dict, db: Session = Depends(get_db)) -> schemas.UploadSessionOut:
     """
     Create a session for a speaker.
     - Does NOT auto-create an upload record.
@@ -194,7 +220,7 @@ async def upload_session_presentation(
     session_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
-):
+) -> schemas.SessionUploadedOut:
     """Upload a presentation file for an existing session"""
     session = db.query(Upload).filter(
         Upload.id == session_id,
@@ -207,6 +233,7 @@ async def upload_session_presentation(
     safe_filename = f"{session.event_id}_{speaker_id}_{session_id}_{file.filename}"
     file_path = UPLOAD_DIR / safe_filename
     data = await file.read()
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     with open(file_path, "wb") as f:
         f.write(data)
 
@@ -214,6 +241,7 @@ async def upload_session_presentation(
     session.filename = safe_filename  # type: ignore[assignment]
     session.size_bytes = len(data)  # type: ignore[assignment]
     session.uploaded = True  # type: ignore[assignment]
+    session.fingerprint, session.content_hash = fingerprint_bytes(data)
     session.updated_at = datetime.utcnow()  # type: ignore[assignment]
     db.commit()
     db.refresh(session)
@@ -222,7 +250,9 @@ async def upload_session_presentation(
 
 
 @router.put("/{speaker_id}/sessions/{session_id}")
-def update_speaker_session(speaker_id: int, session_id: int, payload: dict, db: Session = Depends(get_db)):
+def update_speaker_session(
+    speaker_id: int, session_id: int, payload: dict, db: Session = Depends(get_db)
+) -> schemas.SessionUpdatedOut:
     """Update a session's details"""
     session = db.query(Upload).filter(
         Upload.id == session_id,
@@ -272,7 +302,7 @@ def update_speaker_session(speaker_id: int, session_id: int, payload: dict, db:
 
 
 @router.delete("/{speaker_id}/sessions/{session_id}")
-def delete_speaker_session(speaker_id: int, session_id: int, db: Session = Depends(get_db)):
+def delete_speaker_session(speaker_id: int, session_id: int, db: Session = Depends(get_db)) -> schemas.MessageOut:
     session = db.query(Upload).filter(
         Upload.id == session_id,
         Upload.speaker_id == speaker_id
@@ -285,12 +315,10 @@ def delete_speaker_session(speaker_id: int, session_id: int, db: Session = Depen
 
 
 @router.post("/bulk")
-def bulk_add_speakers(speakers: List[dict], db: Session = Depends(get_db)):
+def bulk_add_speakers(speakers: List[dict], db: Session = Depends(get_db)) -> schemas.SpeakersAddedOut:
     if not speakers:
         raise HTTPException(status_code=400, detail="No speakers provided")
 
-    metadata = MetaData()
-    event_speakers = Table('event_speakers', metadata, autoload_with=db.get_bind())
 
     added_count = 0
     for s in speakers:
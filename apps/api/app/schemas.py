@@ -0,0 +1,479 @@
+"""
+Response models of the API routes
+
+Endpoints declare them as return annotations; FastAPI validates what the
+endpoint returns (dicts, rows or ORM objects, read by attribute) against the
+model and serializes it in pydantic-core, and ORJSONResponse writes the
+bytes. Only the declared fields are read, so no relationship is lazy loaded
+while serializing and columns such as room credentials never leak.
+
+Routers use ModelRoute: fields the endpoint did not set are left out of the
+response, which keeps ?fields= selections and optional keys (speaker_name
+of a session without speaker, ...) as before. Fields are therefore optional
+in the models that back a ?fields= list.
+"""
+
+from datetime import datetime, time
+from typing import Any, List, Optional
+
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ConfigDict
+
+
+class ModelRoute(APIRoute):
+    """APIRoute serializing responses with exclude_unset"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs["response_model_exclude_unset"] = True
+        super().__init__(*args, **kwargs)
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+# --------------------------
+# Common
+# --------------------------
+class MessageOut(Schema):
+    message: str
+
+
+class StatusOut(Schema):
+    status: str
+
+
+class OkOut(Schema):
+    ok: bool
+
+
+# --------------------------
+# Auth and users
+# --------------------------
+class TokenOut(Schema):
+    access_token: str
+    token_type: str
+    role: str
+
+
+class UserOut(Schema):
+    id: Optional[int] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+
+# --------------------------
+# Attendees
+# --------------------------
+class AttendeeOut(Schema):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    user_id: Optional[int] = None
+    event_id: Optional[int] = None
+    session_title: Optional[str] = None
+    venue: Optional[str] = None
+    presentation_time: Optional[datetime] = None
+
+
+class AttendeeSessionOut(Schema):
+    title: Optional[str] = None
+    venue: Optional[str] = None
+    time: Optional[datetime] = None
+
+
+class AttendeeUploadOut(Schema):
+    id: int
+    filename: Optional[str] = None
+    has_video: bool
+    has_audio: bool
+    needs_internet: bool
+    updated_at: Optional[datetime] = None
+    event_id: Optional[int] = None
+    speaker_id: Optional[int] = None
+
+
+class AttendeeDetailOut(Schema):
+    delegate: AttendeeOut
+    session: AttendeeSessionOut
+    uploads: List[AttendeeUploadOut]
+
+
+# --------------------------
+# Events
+# --------------------------
+class EventOut(Schema):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    location: Optional[str] = None
+    created_by: Optional[int] = None
+
+
+class EventSpeakerOut(Schema):
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    bio: Optional[str] = None
+    title: Optional[str] = None
+    session_count: int
+    uploads_loaded: int
+
+
+class EventRoomOut(Schema):
+    id: int
+    name: Optional[str] = None
+    capacity: Optional[int] = None
+    location: Optional[str] = None
+    layout: Optional[str] = None
+    equipment: Optional[str] = None
+    ip_address: Optional[str] = None
+    status: Optional[str] = None
+
+
+class RoomSessionOut(Schema):
+    """Room time slot (sessions table); writes answer with a subset"""
+    id: int
+    event_id: Optional[int] = None
+    room_id: Optional[int] = None
+    room_name: Optional[str] = None
+    speaker_id: Optional[int] = None
+    speaker_name: Optional[str] = None
+    session_name: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+
+
+class TechNotesOut(Schema):
+    own_machine: Optional[bool] = None
+    video_with_audio: Optional[bool] = None
+    video_without_audio: Optional[bool] = None
+    audio_only: Optional[bool] = None
+    no_ppt: Optional[bool] = None
+
+
+class UploadSessionOut(Schema):
+    """Speaker presentation slot (uploads table) of an event or speaker"""
+    id: Optional[int] = None
+    event_id: Optional[int] = None
+    speaker_id: Optional[int] = None
+    room_id: Optional[int] = None
+    session_date: Optional[str] = None
+    session_time: Optional[str] = None
+    time_start: Optional[str] = None
+    tech_notes: Optional[TechNotesOut] = None
+    uploaded: Optional[bool] = None
+    upload_file_path: Optional[str] = None
+    speaker_name: Optional[str] = None
+    room_name: Optional[str] = None
+    event_name: Optional[str] = None
+
+
+class StatsPresentationOut(Schema):
+    id: int
+    filename: Optional[str] = None
+    uploaded: Optional[bool] = None
+    speaker_id: Optional[int] = None
+    speaker_name: Optional[str] = None
+
+
+class RoomStatsOut(Schema):
+    room_name: str
+    room_id: Optional[int] = None
+    total: int
+    uploaded: int
+    presentations: Optional[List[StatsPresentationOut]] = None
+
+
+class EventStatsOut(Schema):
+    event_id: int
+    total_presentations: int
+    total_uploaded: int
+    rooms: List[RoomStatsOut]
+
+
+class RoomStatusOut(Schema):
+    room_id: int
+    room_name: Optional[str] = None
+    ip_address: Optional[str] = None
+    status: str
+    presentation_count: int
+
+
+# --------------------------
+# Files and uploads
+# --------------------------
+class UploadOut(Schema):
+    id: int
+    event_id: Optional[int] = None
+    speaker_id: Optional[int] = None
+    attendee_id: Optional[int] = None
+    room_id: Optional[int] = None
+    session_id: Optional[int] = None
+    session_date: Optional[datetime] = None
+    session_time: Optional[time] = None
+    filename: Optional[str] = None
+    size_bytes: Optional[int] = None
+    has_video: Optional[bool] = None
+    has_audio: Optional[bool] = None
+    has_video_with_audio: Optional[bool] = None
+    has_video_without_audio: Optional[bool] = None
+    has_audio_only: Optional[bool] = None
+    own_machine: Optional[bool] = None
+    no_ppt: Optional[bool] = None
+    needs_internet: Optional[bool] = None
+    uploaded: Optional[bool] = None
+    etag: Optional[str] = None
+    fingerprint: Optional[str] = None
+    content_hash: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class ManifestEntryOut(Schema):
+    id: Optional[int] = None
+    key: Optional[str] = None
+    etag: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class UploadedFilesOut(Schema):
+    uploaded: List[str]
+
+
+class UploadStatusOut(Schema):
+    status: str
+    upload_id: int
+
+
+class CreatedSessionOut(Schema):
+    id: int
+    event_id: int
+    speaker_id: int
+    room_id: Optional[int] = None
+    session_date: Optional[str] = None
+    session_time: Optional[str] = None
+    has_video: bool
+    has_audio: bool
+    needs_internet: bool
+    filename: str
+    attendee_id: Optional[int] = None
+
+
+class FileSavedOut(Schema):
+    message: str
+    file_path: str
+
+
+class UnassignedFileOut(Schema):
+    filename: str
+    display_name: str
+    path: str
+    assigned: bool
+    size: int
+
+
+class FileAssignedOut(Schema):
+    message: str
+    session_id: int
+    filename: str
+
+
+class UploadsCreatedOut(Schema):
+    status: str
+    files_uploaded: int
+    room_id: Optional[int] = None
+    session_date: Optional[str] = None
+    session_time: Optional[str] = None
+
+
+class BulkUploadOut(Schema):
+    status: str
+    files_uploaded: int
+    uploaded_files: List[str]
+    event_id: int
+    session_id: int
+
+
+# --------------------------
+# Rooms
+# --------------------------
+class RoomOut(Schema):
+    """Room as listed and edited; share credentials are never returned"""
+    id: Optional[int] = None
+    name: Optional[str] = None
+    capacity: Optional[int] = None
+    location: Optional[str] = None
+    layout: Optional[str] = None
+    equipment: Optional[str] = None
+    ip_address: Optional[str] = None
+    status: Optional[str] = None
+    presentation_count: Optional[int] = None
+    uploaded_count: Optional[int] = None
+    missing_count: Optional[int] = None
+
+
+class RoomPresentationOut(Schema):
+    id: Optional[int] = None
+    fileName: Optional[str] = None
+    event_id: Optional[int] = None
+    speaker_id: Optional[int] = None
+    session_date: Optional[datetime] = None
+    session_time: Optional[time] = None
+    uploaded: Optional[bool] = None
+    size_bytes: Optional[int] = None
+
+
+class RoomPingOut(Schema):
+    room_id: int
+    name: Optional[str] = None
+    ip_address: Optional[str] = None
+    status: str
+    is_online: bool
+
+
+class ScanMatchOut(Schema):
+    upload_id: int
+    filename: str
+    file_path: str
+    file_size: Optional[int] = None
+    confidence: float
+
+
+class ScanFileOut(Schema):
+    filename: str
+    file_size: Optional[int] = None
+    file_path: str
+
+
+class ScanSummaryOut(Schema):
+    """Scan of one room: ok, offline, busy or error, with the fields of that outcome"""
+    status: str
+    room_id: int
+    ip_address: Optional[str] = None
+    scan_date: Optional[str] = None
+    total_files: Optional[int] = None
+    matched_uploads: Optional[int] = None
+    unmatched_files: Optional[int] = None
+    updated_uploads: Optional[int] = None
+    matches: Optional[List[ScanMatchOut]] = None
+    unmatched: Optional[List[ScanFileOut]] = None
+    cached: Optional[bool] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+
+
+class InventoryResultOut(Schema):
+    status: str
+    room_id: int
+    seq: int
+    total_files: Optional[int] = None
+    removed_files: Optional[int] = None
+    matched_uploads: Optional[int] = None
+    unmatched_files: Optional[int] = None
+    updated_uploads: Optional[int] = None
+    matches: Optional[List[ScanMatchOut]] = None
+    unmatched: Optional[List[ScanFileOut]] = None
+
+
+class MatchAssignmentOut(Schema):
+    status: str
+    room_id: int
+    file_path: str
+    upload_id: int
+    source: str
+
+
+class MatchForgottenOut(Schema):
+    status: str
+    room_id: int
+    file_path: str
+    forgotten: bool
+
+
+class VerifiedUploadOut(Schema):
+    id: int
+    filename: Optional[str] = None
+    speaker_id: Optional[int] = None
+    size_bytes: Optional[int] = None
+
+
+class VerifyUploadsOut(Schema):
+    room_id: int
+    room_name: Optional[str] = None
+    total_expected: int
+    found: int
+    missing: int
+    found_uploads: List[VerifiedUploadOut]
+    missing_uploads: List[VerifiedUploadOut]
+
+
+class SyncFileOut(Schema):
+    upload_id: int
+    filename: Optional[str] = None
+    action: str
+    verified: bool
+    bytes_sent: int
+    error: Optional[str] = None
+
+
+class SyncResultOut(Schema):
+    status: str
+    room_id: int
+    error: Optional[str] = None
+    sync_date: Optional[str] = None
+    total: Optional[int] = None
+    copied: Optional[int] = None
+    delta: Optional[int] = None
+    skipped: Optional[int] = None
+    failed: Optional[int] = None
+    missing_source: Optional[int] = None
+    bytes_sent: Optional[int] = None
+    files: Optional[List[SyncFileOut]] = None
+
+
+# --------------------------
+# Speakers
+# --------------------------
+class SpeakerOut(Schema):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    title: Optional[str] = None
+    bio: Optional[str] = None
+    email: Optional[str] = None
+
+
+class SessionUploadedOut(Schema):
+    status: str
+    filename: str
+    uploaded: bool
+
+
+class SessionUpdatedOut(Schema):
+    id: int
+    status: str
+
+
+class SpeakersAddedOut(Schema):
+    added: int
+
+
+# --------------------------
+# Health
+# --------------------------
+class RootOut(Schema):
+    message: str
+    environment: str
+
+
+class HealthOut(Schema):
+    status: str
+    database: Optional[str] = None
+    error: Optional[str] = None
+
+
+# Metrics whose keys depend on the configured pools and cache backend
+MetricsOut = dict[str, Any]
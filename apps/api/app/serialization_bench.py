@@ -0,0 +1,152 @@
+"""
+Serialization benchmark of the API responses (old path vs response models)
+
+Serializes synthetic payloads shaped like the polled endpoints (event
+sessions, event stats with presentations, the manifest) the way FastAPI
+did before the endpoints had response models - jsonable_encoder and the
+standard library's json - and the way it does now: validation against the
+response model in pydantic-core, then ORJSONResponse. The cached endpoints
+(response_cache) serialize with TypeAdapter.dump_json, measured as well.
+
+Run from apps/api:
+    python -m app.serialization_bench                  100 rows, 200 repeats
+    python -m app.serialization_bench --rows 2000 --repeat 50
+
+Only the serialization is measured, not the queries or the transport.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from .schemas import EventStatsOut, ManifestEntryOut, UploadSessionOut
+
+
+def sessions_payload(rows: int) -> List[Dict[str, Any]]:
+    """GET /api/events/{id}/sessions"""
+    return [
+        {
+            "id": i,
+            "event_id": 1,
+            "speaker_id": i % 50,
+            "room_id": i % 8 or None,
+            "session_date": "2026-01-01 00:00:00",
+            "session_time": f"{9 + i % 8:02d}:00:00",
+            "time_start": f"{9 + i % 8:02d}:00:00",
+            "tech_notes": {
+                "own_machine": bool(i % 2),
+                "video_with_audio": bool(i % 3),
+                "video_without_audio": False,
+                "audio_only": False,
+                "no_ppt": False,
+            },
+            "uploaded": bool(i % 2),
+            "upload_file_path": f"presentation_{i}.pptx",
+            "speaker_name": f"Speaker {i % 50}",
+            "room_name": f"Room {i % 8}",
+            "event_name": "Event",
+        }
+        for i in range(rows)
+    ]
+
+
+def stats_payload(rows: int) -> Dict[str, Any]:
+    """GET /api/events/{id}/stats?include_presentations=true"""
+    rooms = []
+    for room_id in range(8):
+        presentations = [
+            {"id": i, "filename": f"presentation_{i}.pptx", "uploaded": bool(i % 2),
+             "speaker_id": i % 50, "speaker_name": f"Speaker {i % 50}"}
+            for i in range(room_id, rows, 8)
+        ]
+        uploaded = sum(1 for p in presentations if p["uploaded"])
+        rooms.append({"room_name": f"Room {room_id}", "room_id": room_id, "total": len(presentations),
+                      "uploaded": uploaded, "presentations": presentations})
+    return {
+        "event_id": 1,
+        "total_presentations": rows,
+        "total_uploaded": sum(room["uploaded"] for room in rooms),
+        "rooms": rooms,
+    }
+
+
+def manifest_payload(rows: int) -> List[Dict[str, Any]]:
+    """GET /api/files/manifest/{id}"""
+    start = datetime(2026, 1, 1, 9)
+    return [
+        {"id": i, "key": f"presentation_{i}.pptx", "etag": f"{i:032x}", "updated_at": start + timedelta(seconds=i)}
+        for i in range(rows)
+    ]
+
+
+PAYLOADS: List[Tuple[str, Callable[[int], Any], Any]] = [
+    ("sessions", sessions_payload, List[UploadSessionOut]),
+    ("stats", stats_payload, EventStatsOut),
+    ("manifest", manifest_payload, List[ManifestEntryOut]),
+]
+
+
+def _old(data) -> bytes:
+    return JSONResponse(jsonable_encoder(data)).body
+
+
+def _serializers(model) -> Dict[str, Callable[[Any], bytes]]:
+    adapter = TypeAdapter(model)
+
+    def response_model(data) -> bytes:
+        # What FastAPI does for a route with a response model
+        value = adapter.validate_python(data, from_attributes=True)
+        return ORJSONResponse(adapter.dump_python(value, mode="json", exclude_unset=True)).body
+
+    def dump_json(data) -> bytes:
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True), exclude_unset=True)
+
+    return {"jsonable_encoder + json": _old, "response model + orjson": response_model, "response model dump_json": dump_json}
+
+
+def _time(fn: Callable[[Any], bytes], data, repeat: int) -> float:
+    """Best of three runs, in ms per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(data)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+def run(rows: int, repeat: int) -> bool:
+    ok = True
+    print(f"Serialization per response, {rows} rows, best of 3 x {repeat}\n")
+    for name, build, model in PAYLOADS:
+        data = build(rows)
+        serializers = _serializers(model)
+        bodies = {label: fn(data) for label, fn in serializers.items()}
+        size = len(bodies["jsonable_encoder + json"])
+        print(f"{name} ({size / 1024:.1f} KB):")
+        baseline = None
+        for label, fn in serializers.items():
+            ms = _time(fn, data, repeat)
+            baseline = baseline or ms
+            print(f"  {ms:8.3f} ms  {baseline / ms:5.1f}x  {label}")
+        # Same document whichever path serialized it
+        documents = [json.loads(body) for body in bodies.values()]
+        if any(document != documents[0] for document in documents):
+            ok = False
+            print(f"  ✗ {name}: the serializers disagree")
+        print()
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare response serialization with and without response models")
+    parser.add_argument("--rows", type=int, default=100, help="Rows (sessions, presentations, manifest entries) per payload")
+    parser.add_argument("--repeat", type=int, default=200, help="Serializations per timed run")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.rows, args.repeat) else 1)
@@ -0,0 +1,132 @@
+# services/single_flight.py
+"""
+Collapse concurrent work on the same key into a single execution
+
+SingleFlight coordinates threads of one process: the first caller runs the
+function and callers arriving while it runs wait for it and get the same
+result. AsyncSingleFlight does the same for coroutines on one event loop.
+
+advisory_lock extends this across workers and Lambdas with MySQL's
+GET_LOCK. The lock lives on a dedicated connection, so it is released when
+that connection closes even if the holder dies mid-way.
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Join concurrent calls with the same key within one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Args:
+            key: Identifies the work (e.g. room id plus scan parameters)
+            fn: The work itself; exceptions are re-raised in every waiting caller
+
+        Returns:
+            fn's result, possibly from a call started by another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Join concurrent awaits with the same key on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() once for all concurrent callers with the same key
+
+        A waiter that is cancelled (client gone) does not cancel the shared
+        call; the leader being cancelled cancels it for the waiters too.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so a call without waiters is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+@contextmanager
+def advisory_lock(engine: Engine, name: str, timeout: int = 0):
+    """
+    Named lock shared by all workers using the same MySQL server
+
+    Yields True when the lock was acquired within timeout seconds, False
+    otherwise. Databases without advisory locks (SQLite in development)
+    always yield True; SingleFlight still covers the single process there.
+    """
+    if engine.dialect.name != "mysql":
+        yield True
+        return
+
+    # MySQL limits lock names to 64 characters
+    name = name[:64]
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+        ).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
@@ -1,7 +1,9 @@
 import os
+import io
 import hashlib
 from abc import ABC, abstractmethod
-from typing import Optional
+from functools import lru_cache
+from typing import BinaryIO, Optional
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends"""
@@ -10,6 +12,16 @@ class StorageBackend(ABC):
     def save(self, filename: str, data: bytes) -> dict:
         pass
 
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a stored file for reading (seekable)"""
+        pass
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Size of a stored file in bytes, or None if it does not exist"""
+        pass
+
 class LocalStorage(StorageBackend):
     """Local filesystem storage for development"""
     
@@ -34,6 +46,15 @@ class LocalStorage(StorageBackend):
         print(f"Saved to: {file_path}")
         return {"key": key, "etag": etag}
 
+    def open(self, key: str) -> BinaryIO:
+        return open(os.path.join(self.base_path, key), "rb")
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(os.path.join(self.base_path, key))
+        except OSError:
+            return None
+
 class S3Storage(StorageBackend):
     """S3 storage for production"""
     
@@ -63,15 +84,84 @@ class S3Storage(StorageBackend):
         print(f"Saved to S3: s3://{self.bucket_name}/{key}")
         return {"key": key, "etag": etag}
     
+    def open(self, key: str) -> BinaryIO:
+        size = self.size(key)
+        if size is None:
+            raise FileNotFoundError(f"s3://{self.bucket_name}/{key}")
+        return S3RangeReader(self.s3_client, self.bucket_name, key, size)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except self.s3_client.exceptions.ClientError:
+            return None
+        return response['ContentLength']
+
     def _get_content_type(self, filename: str) -> str:
         import mimetypes
         content_type, _ = mimetypes.guess_type(filename)
         return content_type or 'application/octet-stream'
 
+class S3RangeReader(io.RawIOBase):
+    """Seekable read-only view of an S3 object using ranged GETs"""
+
+    def __init__(self, s3_client, bucket_name: str, key: str, size: int, buffer_size: int = 8 * 1024 * 1024):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.length = size
+        self.buffer_size = buffer_size
+        self._pos = 0
+        self._buffer = b""
+        self._buffer_start = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.length
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.length - self._pos
+        n = min(n, self.length - self._pos)
+        if n <= 0:
+            return b""
+
+        buffer_end = self._buffer_start + len(self._buffer)
+        if not (self._buffer_start <= self._pos and self._pos + n <= buffer_end):
+            # Read ahead so sequential block reads don't cost one GET each
+            end = min(self.length, self._pos + max(n, self.buffer_size)) - 1
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name, Key=self.key, Range=f"bytes={self._pos}-{end}"
+            )
+            self._buffer = response['Body'].read()
+            self._buffer_start = self._pos
+
+        start = self._pos - self._buffer_start
+        data = self._buffer[start:start + n]
+        self._pos += len(data)
+        return data
+
+
+@lru_cache()
 def get_storage() -> StorageBackend:
     """
     Returns appropriate storage based on environment.
     Set STORAGE_TYPE env variable: 'local' or 's3'
+
+    Cached: the S3 client is created once per process (or warm Lambda).
     """
     storage_type = os.getenv("STORAGE_TYPE", "local")
     print(f"=== get_storage() called, type={storage_type} ===")
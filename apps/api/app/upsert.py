@@ -0,0 +1,60 @@
+# services/upsert.py
+"""
+Counter upserts: insert a row, or add to the counters of the existing one
+
+One statement on each supported database: MySQL's INSERT ... ON DUPLICATE
+KEY UPDATE, ON CONFLICT DO UPDATE on PostgreSQL and SQLite. Used by the
+event_room_stats counters and the event_versions rows. Any other database is
+refused when its engine is created (db.create_pooled_engine), not by the
+first write that needs an upsert.
+"""
+
+from typing import Iterable, List
+
+from sqlalchemy import Table, func
+from sqlalchemy.orm import Session
+
+SUPPORTED_DIALECTS = ("mysql", "postgresql", "sqlite")
+
+
+def check_dialect(dialect: str):
+    """Raise ValueError for a database increment() has no statement for"""
+    if dialect not in SUPPORTED_DIALECTS:
+        raise ValueError(
+            f"Unsupported database {dialect!r}: counter upserts need one of {', '.join(SUPPORTED_DIALECTS)}"
+        )
+
+
+def increment(db, table: Table, rows: List[dict], keys: Iterable[str], counters: Iterable[str],
+              touch: Iterable[str] = ()):
+    """
+    Insert rows, or add their counter values to the existing rows with the same keys
+
+    Args:
+        db: Session or Connection; runs in its transaction
+        table: Target table
+        rows: Values of the key and counter columns, one dict per row
+        keys: Columns of the primary key or unique constraint the rows collide on
+        counters: Columns whose values are added to the existing ones
+        touch: Columns set to now() when an existing row is updated
+    """
+    if not rows:
+        return
+    dialect = (db.get_bind() if isinstance(db, Session) else db).dialect.name
+    check_dialect(dialect)
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as upsert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+
+    stmt = upsert(table).values(rows)
+    new = stmt.inserted if dialect == "mysql" else stmt.excluded
+    values = {column: table.c[column] + new[column] for column in counters}
+    values.update({column: func.now() for column in touch})
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update(**values)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c[key] for key in keys], set_=values)
+    db.execute(stmt)
@@ -0,0 +1,96 @@
+# services/warmup.py
+"""
+Warm-up of the lazily initialized parts of the API
+
+Importing the app connects to nothing: the database password (SSM), the
+engines and their first connections, the SQLAlchemy mappers and the storage
+client are all created on first use. warm_up does that ahead of traffic:
+
+- Lambda: a scheduled event {"warmup": true} (see template.yaml) is answered
+  by main.handler with warm_up() instead of going through Mangum, so the
+  container, its pooled connections and clients stay hot between requests.
+- uvicorn / docker: with LAZY_INIT=false it runs on startup.
+
+Every step is independent; a failing one is reported and the rest still run.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from . import db
+
+
+def _prime_engine():
+    # First call fetches the password and builds the engine; the SELECT
+    # opens (or pre-pings) the pooled connection
+    with db.get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _prime_replica():
+    read_engine = db.get_read_engine()
+    if read_engine is not None:
+        db.replica_health.is_healthy(read_engine)
+
+
+async def _prime_async_engine():
+    async with db.get_async_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+def _prime_storage():
+    from .storage import get_storage
+
+    get_storage()
+
+
+def _configure_mappers():
+    from . import models  # noqa: F401
+
+    configure_mappers()
+
+
+STEPS: Dict[str, Callable[[], None]] = {
+    "mappers": _configure_mappers,
+    "engine": _prime_engine,
+    "replica": _prime_replica,
+    "storage": _prime_storage,
+}
+
+
+def warm_up(loop: Optional[asyncio.AbstractEventLoop] = None) -> dict:
+    """
+    Run the warm-up steps; returns milliseconds (or the error) per step
+
+    With loop the async engine's connection is primed too; it must be the
+    loop later requests run on (aiomysql connections belong to one loop),
+    so it is only passed from the Lambda handler, where Mangum reuses it.
+    """
+    started = time.perf_counter()
+    report = {}
+    steps = list(STEPS.items())
+    if loop is not None:
+        steps.append(("async_engine", lambda: loop.run_until_complete(_prime_async_engine())))
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            report[name] = f"error: {e}"
+            continue
+        report[name] = round(1000 * (time.perf_counter() - step_started), 1)
+    report["total"] = round(1000 * (time.perf_counter() - started), 1)
+    print(f"Warm-up done: {report}")
+    return report
+
+
+def is_warmup_event(event) -> bool:
+    """A scheduled keep-warm invocation rather than an API Gateway request"""
+    return isinstance(event, dict) and (
+        event.get("warmup") is True or event.get("source") == "serverless-plugin-warmup"
+    )
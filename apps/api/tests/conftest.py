@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+
+# Before anything imports app.config: an in-memory SQLite database and no
+# shared caches between tests
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DB_POOL_PROFILE", "test")
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "off")
+os.environ.setdefault("LAZY_INIT", "true")
+
+import pytest
+
+from app import event_stats, event_versions  # noqa: F401  (register their session hooks)
+from app.db import SessionLocal, get_engine
+from app.models import Base, Event, Room, Speaker, Upload
+
+
+@pytest.fixture
+def db():
+    """Session on an empty schema"""
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def make_event(db):
+    def make(title="Event"):
+        event = Event(title=title, start_time=datetime(2026, 5, 4), end_time=datetime(2026, 5, 5))
+        db.add(event)
+        db.flush()
+        return event
+    return make
+
+
+@pytest.fixture
+def make_speaker(db):
+    def make(name="Speaker"):
+        speaker = Speaker(name=name)
+        db.add(speaker)
+        db.flush()
+        return speaker
+    return make
+
+
+@pytest.fixture
+def make_room(db):
+    def make(name="Room", **columns):
+        room = Room(name=name, **columns)
+        db.add(room)
+        db.flush()
+        return room
+    return make
+
+
+@pytest.fixture
+def make_upload(db):
+    def make(event, speaker, filename="deck.pptx", room=None, **columns):
+        upload = Upload(event_id=event.id, speaker_id=speaker.id, room_id=room.id if room else None,
+                        filename=filename, **columns)
+        db.add(upload)
+        db.flush()
+        return upload
+    return make
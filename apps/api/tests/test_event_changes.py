@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import and_, bindparam, delete, insert, or_, update
+
+from app import event_changes
+from app.event_changes import ALL_EVENTS
+from app.models import Upload
+
+ALL = {ALL_EVENTS}
+
+
+@pytest.fixture
+def uploads(db, make_event, make_speaker, make_upload):
+    events = [make_event(f"Event {i}") for i in range(3)]
+    speaker = make_speaker()
+    for event in events:
+        make_upload(event, speaker, filename=f"deck_{event.id}.pptx")
+    db.commit()
+    return events
+
+
+def touched_by(db, statement, *args, **kwargs):
+    db.info.pop("touched_events", None)
+    db.execute(statement, *args, **kwargs)
+    ids = set(event_changes.touched(db))
+    db.rollback()
+    return ids
+
+
+@pytest.mark.parametrize("where, expected", [
+    (Upload.event_id == 1, {1}),
+    (Upload.event_id.in_([2, 3]), {2, 3}),
+    (and_(Upload.event_id == 2, Upload.uploaded.is_(False)), {2}),
+    (and_(Upload.event_id.in_([1, 2]), Upload.event_id == 2), {2}),
+    (or_(Upload.event_id == 1, Upload.event_id == 3), {1, 3}),
+    (Upload.event_id != 1, ALL),
+    (Upload.event_id > 1, ALL),
+    (Upload.event_id.not_in([1]), ALL),
+    (or_(Upload.event_id == 1, Upload.speaker_id == 1), ALL),
+    (Upload.speaker_id == 1, ALL),
+])
+def test_update_attributed_from_where_clause(db, uploads, where, expected):
+    assert touched_by(db, update(Upload).where(where).values(uploaded=True)) == expected
+    assert touched_by(db, delete(Upload).where(where)) == expected
+
+
+def test_update_moving_rows_counts_both_events(db, uploads):
+    statement = update(Upload).where(Upload.event_id == 1).values(event_id=2)
+    assert touched_by(db, statement) == {1, 2}
+
+
+def test_update_by_primary_key_is_all_events(db, uploads):
+    assert touched_by(db, update(Upload).where(Upload.id == 1).values(uploaded=True)) == ALL
+
+
+def test_bindparam_filled_per_row(db, uploads):
+    statement = update(Upload.__table__).where(Upload.__table__.c.event_id == bindparam("e")).values(uploaded=True)
+    assert touched_by(db, statement, [{"e": 1}, {"e": 3}]) == {1, 3}
+
+
+def test_insert_values(db, uploads):
+    rows = [{"event_id": 2, "speaker_id": 1, "filename": "a.pptx"},
+            {"event_id": 3, "speaker_id": 1, "filename": "b.pptx"}]
+    assert touched_by(db, insert(Upload).values(rows)) == {2, 3}
+
+
+def test_named_event_ids_win(db, uploads):
+    statement = update(Upload).where(Upload.id == 1).values(uploaded=True)
+    assert touched_by(db, statement, execution_options={"event_ids": {1}}) == {1}
+
+
+def test_orm_flush_counts_old_and_new_event(db, uploads):
+    upload = db.get(Upload, 1)
+    db.info.pop("touched_events", None)
+    upload.event_id = 2
+    db.flush()
+    assert event_changes.touched(db) == {1, 2}
+
+
+def test_listeners_run_after_commit_only(db, uploads):
+    seen = []
+    event_changes._commit_listeners.append(seen.append)
+    try:
+        db.execute(update(Upload).where(Upload.event_id == 3).values(uploaded=True))
+        db.rollback()
+        assert seen == []
+        db.execute(update(Upload).where(Upload.event_id == 3).values(uploaded=True))
+        db.commit()
+        assert seen == [{3}]
+    finally:
+        event_changes._commit_listeners.remove(seen.append)
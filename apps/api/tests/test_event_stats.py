@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from app import event_stats
+from app.models import EventRoomStats, Upload
+from app.room_inventory import match_scanned_files
+from app.room_scanner import RoomScanner
+from app.routers.speakers import delete_speaker
+
+
+def counters(db):
+    return {
+        (row.event_id, row.room_id): (row.total, row.uploaded, row.bytes)
+        for row in db.query(EventRoomStats).all()
+        if row.total or row.uploaded or row.bytes
+    }
+
+
+def assert_consistent(db):
+    """The incrementally kept counters equal a rebuild from the uploads table"""
+    db.flush()
+    kept = counters(db)
+    event_stats.rebuild(db)
+    assert kept == counters(db)
+    return kept
+
+
+@pytest.fixture
+def setup(db, make_event, make_speaker, make_room, make_upload):
+    event = make_event()
+    speakers = [make_speaker("Ada"), make_speaker("Grace")]
+    rooms = [make_room("Hall A"), make_room("Hall B")]
+    uploads = [
+        make_upload(event, speakers[i % 2], filename=f"talk_{i}.pptx", room=rooms[i % 2], size_bytes=100 * (i + 1))
+        for i in range(4)
+    ]
+    uploads.append(make_upload(event, speakers[0], filename="keynote.pptx", size_bytes=50))
+    db.commit()
+    return event, speakers, rooms, uploads
+
+
+def test_orm_changes(db, setup):
+    event, speakers, rooms, uploads = setup
+    assert assert_consistent(db)[(event.id, rooms[0].id)] == (2, 0, 400)
+
+    uploads[0].uploaded = True
+    uploads[1].room_id = rooms[0].id
+    uploads[2].size_bytes = 1000
+    db.delete(uploads[3])
+    db.commit()
+    assert assert_consistent(db) == {
+        (event.id, rooms[0].id): (3, 1, 100 + 200 + 1000),
+        (event.id, event_stats.UNASSIGNED_ROOM): (1, 0, 50),
+    }
+
+
+def test_deleting_a_room_moves_its_uploads_to_unassigned(db, setup):
+    event, _, rooms, _ = setup
+    db.delete(rooms[1])
+    db.commit()
+    assert assert_consistent(db)[(event.id, event_stats.UNASSIGNED_ROOM)] == (3, 0, 50 + 200 + 400)
+
+
+def test_scan_write_back(db, setup):
+    event, _, rooms, uploads = setup
+    scanned = [
+        RoomScanner.build_file_info(f"/share/{name}", size, datetime(2026, 5, 4).timestamp())
+        for name, size in (("talk_0.pptx", 150), ("Talk 2.pptx", 300), ("unrelated.mp4", 10))
+    ]
+    result = match_scanned_files(db, rooms[0].id, scanned, full=True)
+    db.commit()
+
+    assert {m["upload_id"] for m in result["matches"]} == {uploads[0].id, uploads[2].id}
+    assert result["updated_uploads"] == 2
+    assert assert_consistent(db)[(event.id, rooms[0].id)] == (2, 2, 150 + 300)
+
+
+def test_bulk_speaker_delete(db, setup):
+    event, speakers, rooms, _ = setup
+    delete_speaker(speakers[0].id, db=db)
+    assert assert_consistent(db) == {(event.id, rooms[1].id): (2, 0, 200 + 400)}
+    assert db.query(Upload).count() == 2
@@ -0,0 +1,120 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app.file_matcher import FileMatcher, MatcherIndex
+
+UPLOAD_NAMES = [
+    "intro.pptx", "Keynote - Opening.pptx", "keynote_closing.pptx", "Panel discussion.pdf",
+    "q3-results-final.pptx", "Q3 results draft.pptx", "workshop_part_1.key", "workshop_part_2.key",
+    "demo video.mp4", "sponsor_loop.mp4", "agenda.pdf", "lightning-talk-jones.pptx",
+]
+
+SCANNED_NAMES = [
+    "1_2_3_intro.pptx", "intro (1).pptx", "KEYNOTE opening v2.pptx", "keynote-closing.pptx",
+    "panel_discussion_final.pdf", "q3 results FINAL.pptx", "Q3_results_draft_old.pptx",
+    "workshop part 1.key", "Workshop Part 2 (copy).key", "demo_video_1080p.mp4", "sponsor loop.mp4",
+    "agenda_day_2.pdf", "jones lightning talk.pptx", "completely unrelated.docx", "notes.txt",
+]
+
+
+def uploads(names, sizes=None):
+    return [
+        SimpleNamespace(id=i + 1, filename=name, size_bytes=(sizes or {}).get(name, 1000 + i), fingerprint=None)
+        for i, name in enumerate(names)
+    ]
+
+
+def scanned(name, size=1):
+    return {"filename": name, "file_size": size}
+
+
+def first_come(files, pool, threshold=0.6):
+    """Files matched one by one, each taking the best upload still free"""
+    index = MatcherIndex(pool)
+    names = {u.id: u.filename for u in pool}
+    fingerprints = {u.id: u.fingerprint for u in pool}
+    claimed, results = set(), []
+    for scanned_file in files:
+        upload_id = index.match(scanned_file, threshold, exclude=claimed)
+        if upload_id is None:
+            results.append(None)
+            continue
+        claimed.add(upload_id)
+        if scanned_file.get("fingerprint") and scanned_file["fingerprint"] == fingerprints[upload_id]:
+            confidence = 1.0
+        else:
+            confidence = FileMatcher.calculate_similarity(scanned_file["filename"], names[upload_id])
+        results.append((upload_id, round(confidence, 3)))
+    return results
+
+
+def test_prefixed_name_matches_on_both_paths():
+    pool = uploads(["intro.pptx"])
+    assert FileMatcher.match_file_to_upload(scanned("1_2_3_intro.pptx"), pool) == 1
+    assert FileMatcher.match_batch([scanned("1_2_3_intro.pptx")], pool) == [(1, 0.625)]
+
+
+@pytest.mark.parametrize("name", SCANNED_NAMES)
+def test_single_file_matches_like_match_file_to_upload(name):
+    pool = uploads(UPLOAD_NAMES)
+    expected = FileMatcher.match_file_to_upload(scanned(name), pool)
+    match = FileMatcher.match_batch([scanned(name)], pool)[0]
+    assert (match[0] if match else None) == expected
+    if match:
+        assert match[1] == round(FileMatcher.calculate_similarity(name, UPLOAD_NAMES[expected - 1]), 3)
+
+
+def test_batch_agrees_with_sequential_when_files_do_not_compete():
+    # No two files are after the same upload; when they are, the batch
+    # assigns the best pairs overall and sequential matching the first come
+    files = [scanned(name) for name in SCANNED_NAMES if name != "intro (1).pptx"]
+    pool = uploads(UPLOAD_NAMES)
+    sequential = first_come(files, pool)
+    winners = [match[0] for match in sequential if match]
+    assert len(winners) == len(set(winners)) > 8
+    assert FileMatcher.match_batch(files, pool) == sequential
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.6, 0.8])
+def test_threshold_means_the_same_on_both_paths(threshold):
+    pool = uploads(UPLOAD_NAMES)
+    for name, upload in itertools.product(SCANNED_NAMES, pool):
+        single = [upload]
+        expected = FileMatcher.match_file_to_upload(scanned(name), single, threshold)
+        match = FileMatcher.match_batch([scanned(name)], single, threshold)[0]
+        assert (match[0] if match else None) == expected, (name, upload.filename)
+
+
+def test_size_bonus_and_fingerprints():
+    pool = uploads(["talk.pptx", "talk_v2.pptx"], sizes={"talk_v2.pptx": 4242})
+    pool[0].fingerprint = "fp"
+    files = [{"filename": "talk-v2.pptx", "file_size": 4242}, {"filename": "renamed.pptx", "file_size": 9, "fingerprint": "fp"}]
+    assert FileMatcher.match_batch(files, pool) == [(2, 1.0), (1, 1.0)]
+    assert first_come(files, pool) == [(2, 1.0), (1, 1.0)]
+
+
+def test_competing_files_get_the_best_pairs_overall():
+    # Sequentially "intro (1)" would take intro.pptx and leave "intro" unmatched
+    pool = uploads(["intro.pptx", "intro 1 backup.pptx"])
+    files = [scanned("intro (1).pptx"), scanned("intro.pptx")]
+    assert first_come(files, pool) == [(1, 0.714), None]
+    assert FileMatcher.match_batch(files, pool) == [(2, 0.609), (1, 1.0)]
+
+
+def test_only_shortlisted_uploads_are_scored(monkeypatch):
+    pool = uploads(UPLOAD_NAMES)
+    scored = []
+    original = MatcherIndex.candidates
+
+    def candidates(self, normalized, file_size):
+        shortlist = original(self, normalized, file_size)
+        scored.append(len(shortlist))
+        return shortlist
+
+    monkeypatch.setattr(MatcherIndex, "candidates", candidates)
+    monkeypatch.setattr("app.file_matcher.SHORTLIST_SIZE", 2)
+    FileMatcher.match_batch([scanned(name) for name in SCANNED_NAMES], pool)
+    assert len(scored) == len(SCANNED_NAMES)
+    assert max(scored) <= 2 + 1
@@ -0,0 +1,99 @@
+import pytest
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.models import RoomFile
+from app.routers.rooms import InventoryBatchDTO, push_inventory
+
+TOKEN = "agent-secret"
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ROOM_AGENT_TOKEN", TOKEN)
+    return TOKEN
+
+
+@pytest.fixture
+def room(make_room):
+    return make_room()
+
+
+def push(db, room, seq, full=False, added=(), removed=(), agent_id="agent-1", token=TOKEN):
+    batch = InventoryBatchDTO(
+        agent_id=agent_id,
+        seq=seq,
+        full=full,
+        added=[{"path": path, "size": 100, "mtime": 1700000000.0} for path in added],
+        removed=list(removed),
+    )
+    return push_inventory(room.id, batch, event_id=None, session_date=None, x_agent_token=token, db=db)
+
+
+def inventory(db, room):
+    return sorted(path for (path,) in db.query(RoomFile.file_path).filter(RoomFile.room_id == room.id))
+
+
+def test_refused_without_configured_token(db, room, monkeypatch):
+    monkeypatch.setattr(get_settings(), "ROOM_AGENT_TOKEN", None)
+    with pytest.raises(HTTPException) as error:
+        push(db, room, 1, full=True, added=["a.pptx"], token=None)
+    assert error.value.status_code == 503
+    assert inventory(db, room) == []
+
+
+@pytest.mark.parametrize("sent", [None, "", "wrong"])
+def test_refused_with_wrong_token(db, room, token, sent):
+    with pytest.raises(HTTPException) as error:
+        push(db, room, 1, full=True, added=["a.pptx"], token=sent)
+    assert error.value.status_code == 401
+    assert inventory(db, room) == []
+
+
+def test_delta_from_unknown_agent_asks_for_full(db, room, token):
+    with pytest.raises(HTTPException) as error:
+        push(db, room, 1, added=["a.pptx"])
+    assert error.value.status_code == 409
+
+    push(db, room, 1, full=True, added=["a.pptx"])
+    with pytest.raises(HTTPException) as error:
+        push(db, room, 2, added=["b.pptx"], agent_id="agent-2")
+    assert error.value.status_code == 409
+
+
+def test_deltas_apply_in_sequence(db, room, token):
+    assert push(db, room, 1, full=True, added=["a.pptx", "b.pptx"])["status"] == "ok"
+    assert push(db, room, 2, added=["c.pptx"], removed=["a.pptx"])["seq"] == 2
+    assert inventory(db, room) == ["b.pptx", "c.pptx"]
+    db.refresh(room)
+    assert (room.agent_id, room.agent_seq, room.status) == ("agent-1", 2, "online")
+
+
+def test_gap_is_a_409_and_not_applied(db, room, token):
+    push(db, room, 1, full=True, added=["a.pptx"])
+    with pytest.raises(HTTPException) as error:
+        push(db, room, 3, added=["c.pptx"])
+    assert error.value.status_code == 409
+    assert inventory(db, room) == ["a.pptx"]
+    db.refresh(room)
+    assert room.agent_seq == 1
+
+
+def test_replayed_batch_is_acknowledged_once(db, room, token):
+    push(db, room, 1, full=True, added=["a.pptx"])
+    push(db, room, 2, removed=["a.pptx"])
+    # The response to batch 2 got lost; the agent re-sends it, then an older one
+    assert push(db, room, 2, removed=["a.pptx"]) == {"status": "duplicate", "room_id": room.id, "seq": 2}
+    assert push(db, room, 1, full=False, added=["a.pptx"])["status"] == "duplicate"
+    assert inventory(db, room) == []
+
+
+def test_full_resync_replaces_inventory_and_sequence(db, room, token):
+    push(db, room, 1, full=True, added=["a.pptx", "b.pptx"])
+    push(db, room, 2, added=["c.pptx"])
+    # After a 409 the agent starts over with a full listing (any seq, even a new agent)
+    result = push(db, room, 7, full=True, added=["b.pptx", "d.pptx"], agent_id="agent-2")
+    assert (result["status"], result["seq"]) == ("ok", 7)
+    assert inventory(db, room) == ["b.pptx", "d.pptx"]
+    assert push(db, room, 8, added=["e.pptx"], agent_id="agent-2")["status"] == "ok"
+    assert inventory(db, room) == ["b.pptx", "d.pptx", "e.pptx"]
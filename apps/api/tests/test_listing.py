@@ -0,0 +1,66 @@
+from datetime import datetime, time
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.listing import NEXT_CURSOR_HEADER, ListParams, decode_cursor, encode_cursor, paginate
+from app.models import Upload
+
+
+@pytest.fixture
+def uploads(db, make_event, make_speaker, make_upload):
+    event, speaker = make_event(), make_speaker()
+    # Repeated and missing times, so pages are cut inside ties and NULLs
+    times = [None, time(9), time(9), None, time(10), time(11), time(9), time(11), None, time(10)]
+    for i, session_time in enumerate(times):
+        make_upload(event, speaker, filename=f"deck_{i}.pptx", session_time=session_time)
+    db.commit()
+    return event
+
+
+def all_pages(db, ordering, limit):
+    """Ids of every page in order, following X-Next-Cursor"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = Response()
+        rows = paginate(db.query(Upload.id), ListParams(limit, cursor), ordering, response)
+        ids.extend(rows)
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 3, 4, 10])
+def test_pages_cover_the_list_once_in_order(db, uploads, descending, limit):
+    ordering = [(Upload.session_time, descending), (Upload.id, False)]
+    everything = paginate(db.query(Upload.id), ListParams(), ordering, Response())
+    ids, pages = all_pages(db, ordering, limit)
+    assert ids == everything
+    assert len(ids) == 10
+    # No empty trailing page when the last page is full
+    assert pages == -(-10 // limit)
+
+
+def test_rows_inserted_before_the_cursor_are_not_repeated(db, uploads, make_speaker, make_upload):
+    ordering = [(Upload.id, False)]
+    response = Response()
+    first = paginate(db.query(Upload.id), ListParams(4), ordering, response)
+    make_upload(uploads, make_speaker(), filename="late.pptx")
+    db.commit()
+    rest = paginate(db.query(Upload.id), ListParams(100, response.headers[NEXT_CURSOR_HEADER]), ordering, Response())
+    assert first == [1, 2, 3, 4]
+    assert rest == list(range(5, 12))
+
+
+def test_cursor_round_trips_dates_and_times():
+    values = [datetime(2026, 5, 4, 9, 30), time(9, 15), None, 7]
+    assert decode_cursor(encode_cursor(values), 4) == values
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor([1, 2])])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 1)
+    assert error.value.status_code == 400
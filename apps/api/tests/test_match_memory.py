@@ -0,0 +1,106 @@
+import pytest
+
+from app.match_memory import recall, remember
+from app.models import MatchMemory
+from app.room_inventory import match_scanned_files
+
+
+def scanned(filename, fingerprint=None, folder="/share"):
+    return {
+        "filename": filename,
+        "file_path": f"{folder}/{filename}",
+        "file_size": 1000,
+        "last_modified": None,
+        "has_video": False,
+        "has_audio": False,
+        "fingerprint": fingerprint,
+        "content_hash": None,
+    }
+
+
+@pytest.fixture
+def setup(db, make_event, make_speaker, make_room, make_upload):
+    event, speaker, room = make_event(), make_speaker(), make_room()
+    upload = make_upload(event, speaker, filename="keynote.pptx", room=room)
+    remember(db, room.id, "/share/final_v7.pptx", "fp-1", upload.id)
+    db.commit()
+    return room, upload
+
+
+def remembered(db):
+    return db.query(MatchMemory.upload_id).count()
+
+
+def test_deleting_the_upload_forgets_it(db, setup):
+    room, upload = setup
+    db.delete(upload)
+    db.commit()
+    assert remembered(db) == 0
+
+
+@pytest.mark.parametrize("attr, value", [
+    ("filename", "keynote_v2.pptx"),
+    ("fingerprint", "fp-2"),
+    ("content_hash", "hash-2"),
+])
+def test_changed_upload_content_or_name_forgets_it(db, setup, attr, value):
+    room, upload = setup
+    upload.fingerprint, upload.content_hash = "fp-1", "hash-1"
+    db.commit()
+    assert remembered(db) == 1
+
+    setattr(upload, attr, value)
+    db.commit()
+    assert remembered(db) == 0
+
+
+def test_moving_the_upload_to_another_room_forgets_it(db, setup, make_room):
+    room, upload = setup
+    upload.room_id = make_room("Other").id
+    db.commit()
+    assert remembered(db) == 0
+
+
+def test_first_fingerprint_and_other_columns_keep_it(db, setup):
+    room, upload = setup
+    upload.fingerprint = "fp-1"
+    upload.uploaded = True
+    upload.size_bytes = 4242
+    db.commit()
+    assert remembered(db) == 1
+
+
+def test_recall_by_path_and_by_fingerprint(db, setup):
+    room, upload = setup
+    files = [
+        scanned("final_v7.pptx"),                           # same path, no fingerprint to compare
+        scanned("moved.pptx", fingerprint="fp-1", folder="/share/old"),  # moved, same content
+    ]
+    assert recall(db, room.id, files) == {
+        "/share/final_v7.pptx": upload.id,
+        "/share/old/moved.pptx": upload.id,
+    }
+    # Same path with other content is not the remembered file
+    assert recall(db, room.id, [scanned("final_v7.pptx", fingerprint="fp-9")]) == {}
+
+
+def test_recall_resolves_before_fuzzy_matching(db, setup, make_upload):
+    room, remembered_upload = setup
+    # Fuzzy matching alone would pick the upload with the same name
+    same_name = make_upload(
+        remembered_upload.event, remembered_upload.speaker, filename="final_v7.pptx", room=room
+    )
+    result = match_scanned_files(db, room.id, [scanned("final_v7.pptx", fingerprint="fp-1")])
+    assert result["matches"] == [{
+        "upload_id": remembered_upload.id,
+        "filename": "final_v7.pptx",
+        "file_path": "/share/final_v7.pptx",
+        "file_size": 1000,
+        "confidence": 1.0,
+    }]
+
+    # Once the memory is gone, the file is matched by name again
+    db.delete(remembered_upload)
+    db.flush()
+    result = match_scanned_files(db, room.id, [scanned("final_v7.pptx", fingerprint="fp-1")])
+    assert [m["upload_id"] for m in result["matches"]] == [same_name.id]
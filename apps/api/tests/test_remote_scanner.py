@@ -0,0 +1,136 @@
+import os
+import socket
+import threading
+
+import paramiko
+import pytest
+
+from app.remote_scanner import RoomShare, SftpConnectionPool, SftpScanner
+
+USERNAME, PASSWORD = "tech", "secret"
+
+
+class _Server(paramiko.ServerInterface):
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (USERNAME, PASSWORD):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+class _Folder(paramiko.SFTPServerInterface):
+    """Read-only SFTP view of a local folder"""
+    root = None
+
+    def _local(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def list_folder(self, path):
+        entries = []
+        for name in os.listdir(self._local(path)):
+            attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(self._local(path), name)))
+            attr.filename = name
+            entries.append(attr)
+        return entries
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+
+@pytest.fixture
+def sftp_server(tmp_path):
+    """(port, host key) of an SFTP server on localhost serving tmp_path/share"""
+    share = tmp_path / "share"
+    share.mkdir()
+    (share / "keynote.pptx").write_bytes(b"slides")
+    folder = type("Folder", (_Folder,), {"root": str(tmp_path)})
+    host_key = paramiko.RSAKey.generate(2048)
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    transports = []
+
+    def serve():
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(connection)
+            transport.add_server_key(host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, folder)
+            transports.append(transport)
+            try:
+                transport.start_server(server=_Server())
+            except (paramiko.SSHException, EOFError):
+                pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname()[1], host_key
+    listener.close()
+    for transport in transports:
+        transport.close()
+
+
+def _share(port):
+    return RoomShare(room_id=1, ip_address="127.0.0.1", username=USERNAME, password=PASSWORD,
+                     share_path="share", port=port)
+
+
+def _known_hosts(tmp_path, port, host_key):
+    path = tmp_path / "known_hosts"
+    host_keys = paramiko.HostKeys()
+    host_keys.add(f"[127.0.0.1]:{port}", host_key.get_name(), host_key)
+    host_keys.save(str(path))
+    return str(path)
+
+
+def test_unknown_host_is_refused_by_default(sftp_server, monkeypatch, tmp_path):
+    port, _ = sftp_server
+    monkeypatch.setenv("HOME", str(tmp_path))  # no system known_hosts
+    pool = SftpConnectionPool(connect_timeout=5)
+    with pytest.raises(paramiko.SSHException, match="not found in known_hosts"):
+        SftpScanner(pool, fingerprint=False).scan(_share(port))
+
+
+def test_host_in_known_hosts_is_scanned(sftp_server, monkeypatch, tmp_path):
+    port, host_key = sftp_server
+    monkeypatch.setenv("HOME", str(tmp_path))
+    pool = SftpConnectionPool(connect_timeout=5, known_hosts=_known_hosts(tmp_path, port, host_key))
+    try:
+        files = SftpScanner(pool, fingerprint=False).scan(_share(port))
+    finally:
+        pool.close_all()
+    assert [f["filename"] for f in files] == ["keynote.pptx"]
+
+
+def test_changed_host_key_is_refused(sftp_server, monkeypatch, tmp_path):
+    port, _ = sftp_server
+    monkeypatch.setenv("HOME", str(tmp_path))
+    other_key = paramiko.RSAKey.generate(2048)
+    pool = SftpConnectionPool(connect_timeout=5, known_hosts=_known_hosts(tmp_path, port, other_key),
+                              allow_unknown_hosts=True)
+    with pytest.raises(paramiko.BadHostKeyException):
+        SftpScanner(pool, fingerprint=False).scan(_share(port))
+
+
+def test_unknown_hosts_allowed_when_opted_out(sftp_server, monkeypatch, tmp_path):
+    port, _ = sftp_server
+    monkeypatch.setenv("HOME", str(tmp_path))
+    pool = SftpConnectionPool(connect_timeout=5, allow_unknown_hosts=True)
+    try:
+        files = SftpScanner(pool, fingerprint=False).scan(_share(port))
+    finally:
+        pool.close_all()
+    assert [f["filename"] for f in files] == ["keynote.pptx"]
@@ -0,0 +1,256 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import response_cache
+from app.db import get_db
+from app.routers import events
+from app.response_cache import ALL_TAG, MemoryCache, cached, event_tag
+from app.single_flight import AsyncSingleFlight
+
+
+def entry(size: int):
+    return b"x" * size, {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for TTL tests"""
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = MemoryCache(max_bytes=10_000)
+    cache.set("a", entry(10), ttl=5, tag="event:1")
+    clock[0] += 4.9
+    assert cache.get("a") == entry(10)
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_least_recently_used_is_evicted_first():
+    # Each entry is 1 (key) + 99 (body) bytes; room for three
+    cache = MemoryCache(max_bytes=300)
+    for key in "abc":
+        cache.set(key, entry(99), ttl=60, tag="event:1")
+    cache.get("a")
+    cache.set("d", entry(99), ttl=60, tag="event:1")
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_is_kept():
+    cache = MemoryCache(max_bytes=1000)
+    for i in range(50):
+        cache.set(f"k{i:02}", (b"x" * 60, {"X-Next-Cursor": "abc"}), ttl=60, tag="event:1")
+        assert cache.stats()["bytes"] <= 1000
+    # 3 (key) + 60 (body) + 13 + 3 (header) = 79 bytes per entry
+    assert cache.stats()["entries"] == 1000 // 79
+    assert cache.stats()["bytes"] == 79 * (1000 // 79)
+
+
+def test_entry_larger_than_budget_is_not_stored():
+    cache = MemoryCache(max_bytes=100)
+    cache.set("small", entry(50), ttl=60, tag="event:1")
+    cache.set("big", entry(200), ttl=60, tag="event:1")
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+
+
+def test_replacing_an_entry_counts_its_bytes_once():
+    cache = MemoryCache(max_bytes=1000)
+    cache.set("a", entry(100), ttl=60, tag="event:1")
+    cache.set("a", entry(40), ttl=60, tag="event:1")
+    assert cache.stats()["bytes"] == 41
+
+
+def test_invalidate_bumps_generation_and_drops_tagged_entries():
+    cache = MemoryCache(max_bytes=10_000)
+    cache.set("one", entry(10), ttl=60, tag=event_tag(1))
+    cache.set("two", entry(10), ttl=60, tag=event_tag(2))
+
+    cache.invalidate([event_tag(1)])
+    assert cache.generations([event_tag(1), event_tag(2), ALL_TAG]) == (1, 0, 0)
+    assert cache.get("one") is None
+    assert cache.get("two") is not None
+
+    cache.invalidate([ALL_TAG])
+    assert cache.generations([event_tag(1), event_tag(2), ALL_TAG]) == (1, 0, 1)
+    assert cache.get("two") is None
+
+
+def test_commit_invalidates_the_changed_event(db, monkeypatch, make_event):
+    cache = MemoryCache(max_bytes=10_000)
+    monkeypatch.setattr(response_cache, "get_backend", lambda: cache)
+    first, second = make_event("First"), make_event("Second")
+    db.commit()
+    before = cache.generations([event_tag(first.id), event_tag(second.id)])
+
+    first.title = "Renamed"
+    db.commit()
+    after = cache.generations([event_tag(first.id), event_tag(second.id)])
+    assert after[0] == before[0] + 1
+    assert after[1] == before[1]
+
+
+def test_single_flight_coalesces_concurrent_awaits():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return {"value": 42}
+
+        tasks = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        # The key is free again once the call finished
+        again = await flight.do("key", work)
+        return calls, results, again
+
+    calls, results, again = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert results == [{"value": 42}] * 5
+    assert again == {"value": 42}
+
+
+def test_single_flight_shares_errors_and_survives_cancelled_waiters():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        leader = asyncio.create_task(flight.do("key", failing))
+        waiter = asyncio.create_task(flight.do("key", failing))
+        gone = asyncio.create_task(flight.do("key", failing))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(leader, waiter, gone, return_exceptions=True)
+
+    leader, waiter, gone = asyncio.run(scenario())
+    assert isinstance(leader, RuntimeError) and isinstance(waiter, RuntimeError)
+    assert isinstance(gone, asyncio.CancelledError)
+
+
+@pytest.fixture
+def cached_app(monkeypatch):
+    cache = MemoryCache(max_bytes=100_000)
+    monkeypatch.setattr(response_cache, "get_backend", lambda: cache)
+    calls = []
+    app = FastAPI()
+
+    @app.get("/events/{event_id}/stats")
+    @cached()
+    def stats(event_id: int, limit: int = 10):
+        calls.append((event_id, limit))
+        return {"event_id": event_id, "limit": limit, "call": len(calls)}
+
+    return TestClient(app), cache, calls
+
+
+def test_cached_endpoint_hits_until_its_event_is_invalidated(cached_app):
+    client, cache, calls = cached_app
+    first = client.get("/events/1/stats")
+    second = client.get("/events/1/stats")
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert first.json() == second.json() == {"event_id": 1, "limit": 10, "call": 1}
+
+    # Other query strings and events have entries of their own
+    assert client.get("/events/1/stats?limit=5").headers["X-Cache"] == "MISS"
+    assert client.get("/events/2/stats").headers["X-Cache"] == "MISS"
+
+    cache.invalidate([event_tag(2)])
+    assert client.get("/events/1/stats").headers["X-Cache"] == "HIT"
+    assert client.get("/events/2/stats").json()["call"] == 4
+    assert len(calls) == 4
+
+
+@pytest.fixture
+def conditional_app(db, make_event, monkeypatch):
+    cache = MemoryCache(max_bytes=100_000)
+    monkeypatch.setattr(response_cache, "get_backend", lambda: cache)
+    event = make_event()
+    db.commit()
+    calls = []
+    app = FastAPI()
+    app.include_router(events.router, prefix="/api/events")
+    app.dependency_overrides[get_db] = lambda: db
+
+    @app.get("/stats/{event_id}")
+    @response_cache.conditional()
+    @response_cache.cached()
+    def stats(event_id: int, db: Session = Depends(get_db)):
+        calls.append(event_id)
+        # Large enough to be compressed
+        return {"event_id": event_id, "rows": ["x" * 40] * 100}
+
+    return TestClient(app), event, calls
+
+
+def test_etag_round_trip(db, conditional_app):
+    client, event, calls = conditional_app
+    first = client.get(f"/stats/{event.id}")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(f"/stats/{event.id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert calls == [event.id]
+
+    # Weak comparison, lists and *
+    for header in (etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        assert client.get(f"/stats/{event.id}", headers={"If-None-Match": header}).status_code == 304
+    assert client.get(f"/stats/{event.id}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # A commit changing the event gives a new version, so the old ETag no longer matches
+    event.title = "Renamed"
+    db.commit()
+    changed = client.get(f"/stats/{event.id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert client.get(f"/stats/{event.id}", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 304
+
+
+def test_not_modified_repeats_vary_of_compressed_response(conditional_app):
+    client, event, calls = conditional_app
+    full = client.get(f"/stats/{event.id}", headers={"Accept-Encoding": "gzip"})
+    assert full.headers["Content-Encoding"] == "gzip"
+    assert full.headers["Vary"] == "Accept-Encoding"
+
+    not_modified = client.get(
+        f"/stats/{event.id}", headers={"Accept-Encoding": "gzip", "If-None-Match": full.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Vary"] == "Accept-Encoding"
+
+
+def test_event_endpoint_answers_304_without_vary(conditional_app):
+    client, event, calls = conditional_app
+    full = client.get(f"/api/events/{event.id}")
+    assert full.status_code == 200 and full.json()["id"] == event.id
+    assert "Vary" not in full.headers
+
+    not_modified = client.get(f"/api/events/{event.id}", headers={"If-None-Match": full.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert "Vary" not in not_modified.headers
@@ -0,0 +1,57 @@
+from app.models import RoomFile
+from app.room_inventory import match_scanned_files
+
+
+def scanned(filename, size=1000):
+    return {
+        "filename": filename,
+        "file_path": f"/share/{filename}",
+        "file_size": size,
+        "last_modified": None,
+        "has_video": False,
+        "has_audio": False,
+        "fingerprint": None,
+        "content_hash": None,
+    }
+
+
+def test_later_batch_does_not_claim_matched_upload(db, make_event, make_speaker, make_room, make_upload):
+    event, speaker, room = make_event(), make_speaker("Smith"), make_room()
+    upload = make_upload(event, speaker, filename="smith_keynote.pptx", room=room)
+
+    first = match_scanned_files(db, room.id, [scanned("smith_keynote.pptx")])
+    assert [m["upload_id"] for m in first["matches"]] == [upload.id]
+
+    second = match_scanned_files(db, room.id, [scanned("smith_keynote (1).pptx")])
+    assert second["matches"] == []
+    assert [f["filename"] for f in second["unmatched"]] == ["smith_keynote (1).pptx"]
+    assert db.query(RoomFile.upload_id).filter(RoomFile.file_path == "/share/smith_keynote.pptx").scalar() == upload.id
+
+
+def test_rescanned_path_keeps_its_match(db, make_event, make_speaker, make_room, make_upload):
+    event, speaker, room = make_event(), make_speaker("Smith"), make_room()
+    upload = make_upload(event, speaker, filename="smith_keynote.pptx", room=room)
+
+    match_scanned_files(db, room.id, [scanned("smith_keynote.pptx")])
+    again = match_scanned_files(db, room.id, [scanned("smith_keynote.pptx", size=2000)])
+    assert [m["upload_id"] for m in again["matches"]] == [upload.id]
+
+
+def test_removed_file_releases_its_upload(db, make_event, make_speaker, make_room, make_upload):
+    event, speaker, room = make_event(), make_speaker("Smith"), make_room()
+    upload = make_upload(event, speaker, filename="smith_keynote.pptx", room=room)
+
+    match_scanned_files(db, room.id, [scanned("smith_keynote.pptx")])
+    moved = match_scanned_files(
+        db, room.id, [scanned("smith_keynote (1).pptx")], removed_paths=["/share/smith_keynote.pptx"]
+    )
+    assert [m["upload_id"] for m in moved["matches"]] == [upload.id]
+
+
+def test_full_scan_rematches_from_scratch(db, make_event, make_speaker, make_room, make_upload):
+    event, speaker, room = make_event(), make_speaker("Smith"), make_room()
+    upload = make_upload(event, speaker, filename="smith_keynote.pptx", room=room)
+
+    match_scanned_files(db, room.id, [scanned("smith_keynote.pptx")], full=True)
+    renamed = match_scanned_files(db, room.id, [scanned("smith_keynote (1).pptx")], full=True)
+    assert [m["upload_id"] for m in renamed["matches"]] == [upload.id]
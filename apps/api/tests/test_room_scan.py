@@ -0,0 +1,225 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import single_flight
+from app.config import get_settings
+from app.db import SessionLocal, get_engine
+from app.models import Room
+from app.routers import rooms
+from app.single_flight import SingleFlight, advisory_lock
+
+
+class _WatchedCall(single_flight._Call):
+    """_Call that reports callers waiting on it"""
+    waiting = threading.Semaphore(0)
+
+    def __init__(self):
+        super().__init__()
+        wait = self.done.wait
+
+        def report_and_wait(*args):
+            _WatchedCall.waiting.release()
+            return wait(*args)
+        self.done.wait = report_and_wait
+
+
+@pytest.fixture
+def watched_calls(monkeypatch):
+    _WatchedCall.waiting = threading.Semaphore(0)
+    monkeypatch.setattr(single_flight, "_Call", _WatchedCall)
+    return _WatchedCall
+
+
+def run_in_threads(count, fn):
+    results, errors = [None] * count, [None] * count
+
+    def target(i):
+        try:
+            results[i] = fn(i)
+        except BaseException as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_single_flight_joins_concurrent_calls(watched_calls):
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    leader, results, errors = run_in_threads(1, lambda i: flight.do("key", work))
+    started.wait(5)
+    waiters, waiter_results, _ = run_in_threads(3, lambda i: flight.do("key", work))
+    for _ in waiters:
+        assert watched_calls.waiting.acquire(timeout=5)
+    release.set()
+    for thread in leader + waiters:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results + waiter_results == ["result"] * 4
+    # Done calls are forgotten; the next caller runs the work again
+    assert flight.do("key", work) == "result"
+    assert len(calls) == 2
+
+
+def test_single_flight_raises_the_error_in_every_caller(watched_calls):
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("share unreachable")
+
+    leader, _, leader_errors = run_in_threads(1, lambda i: flight.do("key", work))
+    started.wait(5)
+    waiter, _, waiter_errors = run_in_threads(1, lambda i: flight.do("key", work))
+    assert watched_calls.waiting.acquire(timeout=5)
+    release.set()
+    for thread in leader + waiter:
+        thread.join(5)
+    assert isinstance(leader_errors[0], RuntimeError)
+    assert waiter_errors[0] is leader_errors[0]
+
+
+def test_advisory_lock_is_a_no_op_without_mysql():
+    with advisory_lock(get_engine(), "room_scan:1", 0) as acquired:
+        assert acquired is True
+
+
+class FakeScanner:
+    def __init__(self):
+        self.scans = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def scan(self, share, known=None):
+        self.scans += 1
+        self.started.set()
+        self.release.wait(5)
+        return []
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    fake = FakeScanner()
+    monkeypatch.setattr(rooms, "get_remote_scanner", lambda share: fake)
+    monkeypatch.setattr(rooms.RoomScanner, "ping_host", lambda self, host: True)
+    return fake
+
+
+@pytest.fixture
+def room(db, make_room):
+    room = make_room(ip_address="10.0.0.5")
+    db.commit()
+    return room
+
+
+@pytest.fixture
+def window(monkeypatch):
+    def set_window(seconds):
+        monkeypatch.setattr(get_settings(), "SCAN_RESULT_CACHE_SECONDS", seconds)
+    set_window(60)
+    return set_window
+
+
+def scan(db, room_id, event_id=None):
+    return rooms.scan_room(room_id, event_id=event_id, session_date=None, update_uploads=True, db=db)
+
+
+def test_concurrent_scans_join_the_running_one(room, scanner, window, watched_calls):
+    window(0)
+    scanner.release.clear()
+    sessions = [SessionLocal() for _ in range(3)]
+    try:
+        leader, results, errors = run_in_threads(1, lambda i: scan(sessions[0], room.id))
+        assert scanner.started.wait(5)
+        waiters, waiter_results, waiter_errors = run_in_threads(2, lambda i: scan(sessions[i + 1], room.id))
+        for _ in waiters:
+            assert watched_calls.waiting.acquire(timeout=5)
+        scanner.release.set()
+        for thread in leader + waiters:
+            thread.join(5)
+    finally:
+        for session in sessions:
+            session.close()
+
+    assert errors + waiter_errors == [None] * 3
+    assert scanner.scans == 1
+    assert results[0]["status"] == "ok"
+    assert waiter_results == [results[0]] * 2
+
+
+def test_recent_result_is_reused_within_the_window(db, room, scanner, window):
+    first = scan(db, room.id)
+    second = scan(db, room.id)
+    assert scanner.scans == 1
+    assert "cached" not in first
+    assert second == {**first, "cached": True}
+
+    # Other parameters are another scan
+    assert "cached" not in scan(db, room.id, event_id=7)
+    assert scanner.scans == 2
+
+    # Past the window the room is scanned again
+    stored = db.get(Room, room.id)
+    stored.last_scan_at = datetime.utcnow() - timedelta(seconds=61)
+    db.commit()
+    assert "cached" not in scan(db, room.id)
+    assert scanner.scans == 3
+
+
+def test_no_reuse_when_the_window_is_off(db, room, scanner, window):
+    window(0)
+    scan(db, room.id)
+    assert "cached" not in scan(db, room.id)
+    assert scanner.scans == 2
+
+
+def test_busy_when_another_worker_holds_the_lock(db, room, scanner, window, monkeypatch):
+    @contextmanager
+    def held_elsewhere(engine, name, timeout=0):
+        yield False
+
+    monkeypatch.setattr(rooms, "advisory_lock", held_elsewhere)
+    result = scan(db, room.id)
+    assert result == {
+        "status": "busy",
+        "room_id": room.id,
+        "message": "Another scan of this room is still running"
+    }
+    assert scanner.scans == 0
+
+
+def test_result_of_the_lock_holder_is_reused_after_waiting(db, room, scanner, window, monkeypatch):
+    room_id = room.id
+
+    @contextmanager
+    def finished_elsewhere(engine, name, timeout=0):
+        # The other worker stores its result while this one waits for the lock
+        other = SessionLocal()
+        try:
+            rooms._apply_scan(other, other.get(Room, room_id), [], None, None, True)
+        finally:
+            other.close()
+        yield False
+
+    monkeypatch.setattr(rooms, "advisory_lock", finished_elsewhere)
+    result = scan(db, room_id)
+    assert result["status"] == "ok"
+    assert result["cached"] is True
+    assert scanner.scans == 0
@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+from app.config import get_settings
+from app.models import Upload
+from app.room_sync import RoomSyncEngine, remote_names
+from app.storage import LocalStorage
+
+BLOCK = 4096
+# Larger than the fingerprint's head and tail (2 x 64 KB), so a middle block
+# can change without changing the fingerprint
+SIZE = 64 * BLOCK
+
+
+def content(seed: int) -> bytes:
+    return bytes((i * seed) % 251 for i in range(SIZE))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"))
+
+
+@pytest.fixture
+def share(tmp_path):
+    path = tmp_path / "share"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def room(make_room, share):
+    return make_room(attachment_folder=str(share))
+
+
+@pytest.fixture
+def engine(storage):
+    return RoomSyncEngine(storage, max_parallel=2, block_size=BLOCK, delta_min_bytes=BLOCK)
+
+
+@pytest.fixture
+def store(storage, make_event, make_speaker, make_upload, room):
+    event, speaker = make_event(), make_speaker()
+
+    def put(key: str, data: bytes, **columns) -> Upload:
+        path = os.path.join(storage.base_path, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return make_upload(event, speaker, filename=key, room=room, **columns)
+    return put
+
+
+def rewrite(storage, key: str, data: bytes):
+    with open(os.path.join(storage.base_path, key), "wb") as f:
+        f.write(data)
+
+
+def by_upload(report):
+    return {f["upload_id"]: f for f in report["files"]}
+
+
+def test_remote_names_keep_the_oldest_base_name():
+    names = remote_names([(7, "b/deck.pptx"), (3, "a/deck.pptx"), (5, "notes.pdf"), (9, "deck.pptx")])
+    assert names == {3: "deck.pptx", 5: "notes.pdf", 7: "7_deck.pptx", 9: "9_deck.pptx"}
+
+
+def test_same_base_name_goes_to_separate_files(db, engine, store, room, share):
+    first = store("event1/deck.pptx", content(3))
+    second = store("event2/deck.pptx", content(5))
+
+    report = engine.sync_room(db, room)
+    db.commit()
+
+    assert report["copied"] == 2
+    assert (share / "deck.pptx").read_bytes() == content(3)
+    assert (share / f"{second.id}_deck.pptx").read_bytes() == content(5)
+    assert first.uploaded and second.uploaded
+
+
+def test_delta_copy_is_verified_block_by_block(db, engine, store, storage, room, share):
+    upload = store("deck.pptx", content(3))
+    engine.sync_room(db, room)
+    db.commit()
+
+    # Change a middle block and the last byte (so the fingerprint changes)
+    data = bytearray(content(3))
+    data[SIZE // 2] ^= 0xFF
+    data[-1] ^= 0xFF
+    rewrite(storage, "deck.pptx", bytes(data))
+    upload.fingerprint = None
+
+    result = by_upload(engine.sync_room(db, room))[upload.id]
+    assert (result["action"], result["verified"]) == ("delta", True)
+    assert result["bytes_sent"] == 2 * BLOCK
+    assert (share / "deck.pptx").read_bytes() == bytes(data)
+
+
+def test_delta_copy_missing_a_middle_block_fails_verification(db, engine, store, storage, room, monkeypatch):
+    upload = store("deck.pptx", content(3))
+    engine.sync_room(db, room)
+    db.commit()
+
+    data = bytearray(content(3))
+    data[SIZE // 2] ^= 0xFF
+    data[-1] ^= 0xFF
+    rewrite(storage, "deck.pptx", bytes(data))
+    upload.fingerprint = None
+
+    # A transfer that only gets the head and tail right fools the fingerprint, not the block hashes
+    delta_copy = RoomSyncEngine._delta_copy
+
+    def lossy(self, session, source, remote_path, size, old_hashes):
+        block_hashes, sent = delta_copy(self, session, source, remote_path, size, old_hashes)
+        with session.open(remote_path, "r+b") as target:
+            target.seek(SIZE // 2)
+            target.write(bytes([content(3)[SIZE // 2]]))
+        return block_hashes, sent
+    monkeypatch.setattr(RoomSyncEngine, "_delta_copy", lossy)
+
+    result = by_upload(engine.sync_room(db, room))[upload.id]
+    assert (result["action"], result["verified"]) == ("failed", False)
+    assert upload.uploaded is False
+
+
+def test_full_hash_detects_changes_between_head_and_tail(db, engine, store, storage, room, share, monkeypatch):
+    monkeypatch.setattr(get_settings(), "FINGERPRINT_FULL_HASH", True)
+    upload = store("deck.pptx", content(3))
+    engine.sync_room(db, room)
+    db.commit()
+
+    data = bytearray(content(3))
+    data[SIZE // 2] ^= 0xFF
+    rewrite(storage, "deck.pptx", bytes(data))
+    upload.fingerprint = upload.content_hash = None
+
+    result = by_upload(engine.sync_room(db, room))[upload.id]
+    assert result["verified"] and result["action"] in ("delta", "copied")
+    assert (share / "deck.pptx").read_bytes() == bytes(data)
+
+
+def test_transfer_error_leaves_uploaded_alone(db, engine, store, storage, room, monkeypatch):
+    upload = store("deck.pptx", content(3), uploaded=True)
+    db.commit()
+
+    def broken(key):
+        raise OSError("storage unavailable")
+    monkeypatch.setattr(storage, "open", broken)
+
+    result = by_upload(engine.sync_room(db, room))[upload.id]
+    assert result["action"] == "failed"
+    assert upload.uploaded is True
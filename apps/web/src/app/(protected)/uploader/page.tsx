@@ -19,9 +19,18 @@ interface RoomStats {
   room_id: number | null;
   total: number;
   uploaded: number;
-  presentations: Presentation[];
+  presentations?: Presentation[];
 }
 
+interface RoomPresentations {
+  items: Presentation[];
+  loading: boolean;
+  hasMore: boolean;
+}
+
+// Presentations fetched per room on expand, a page at a time
+const PAGE_SIZE = 50;
+
 interface EventStats {
   event_id: number;
   total_presentations: number;
@@ -41,36 +50,73 @@ export default function UploaderPage() {
   const [stats, setStats] = useState<EventStats | null>(null);
   const [loading, setLoading] = useState(false);
   const [expandedRooms, setExpandedRooms] = useState<Set<string>>(new Set());
+  const [presentations, setPresentations] = useState<Record<string, RoomPresentations>>({});
   const [uploadingId, setUploadingId] = useState<number | null>(null);
 
   useEffect(() => {
+    setExpandedRooms(new Set());
+    setPresentations({});
     if (eventIdFromUrl) loadStats(eventIdFromUrl);
   }, [eventIdFromUrl]);
 
-  const loadStats = async (eventId: number) => {
+  // Counts only; the presentations of a room are fetched when it is expanded
+  const loadStats = async (eventId: number, quiet = false) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const data = await apiGet<EventStats>(`/api/events/${eventId}/stats`);
       setStats(data);
-      // Auto-expand all rooms
-      setExpandedRooms(new Set(data.rooms.map((r) => r.room_name)));
     } catch (err) {
       console.error("Failed to load event stats:", err);
     } finally {
-      setLoading(false);
+      if (!quiet) setLoading(false);
     }
   };
 
-  const toggleRoom = (roomName: string) => {
+  // offset 0 replaces what was loaded for the room, anything else appends a page
+  const loadPresentations = async (room: RoomStats, offset: number, limit = PAGE_SIZE) => {
+    if (!eventIdFromUrl) return;
+    setPresentations((prev) => ({
+      ...prev,
+      [room.room_name]: { items: prev[room.room_name]?.items ?? [], hasMore: false, loading: true },
+    }));
+    try {
+      const params = new URLSearchParams({
+        include_presentations: "true",
+        room_id: String(room.room_id ?? 0),
+        limit: String(limit),
+        offset: String(offset),
+      });
+      const data = await apiGet<EventStats>(`/api/events/${eventIdFromUrl}/stats?${params}`);
+      const page = data.rooms.find((r) => r.room_name === room.room_name)?.presentations ?? [];
+      setPresentations((prev) => ({
+        ...prev,
+        [room.room_name]: {
+          items: offset === 0 ? page : [...(prev[room.room_name]?.items ?? []), ...page],
+          hasMore: page.length === limit,
+          loading: false,
+        },
+      }));
+    } catch (err) {
+      console.error("Failed to load presentations:", err);
+      setPresentations((prev) => ({
+        ...prev,
+        [room.room_name]: { items: prev[room.room_name]?.items ?? [], hasMore: true, loading: false },
+      }));
+    }
+  };
+
+  const toggleRoom = (room: RoomStats) => {
+    const expanding = !expandedRooms.has(room.room_name);
     setExpandedRooms((prev) => {
       const next = new Set(prev);
-      if (next.has(roomName)) next.delete(roomName);
-      else next.add(roomName);
+      if (next.has(room.room_name)) next.delete(room.room_name);
+      else next.add(room.room_name);
       return next;
     });
+    if (expanding && !presentations[room.room_name]) loadPresentations(room, 0);
   };
 
-  const handleUpload = async (sessionId: number, speakerId: number, file: File) => {
+  const handleUpload = async (room: RoomStats, sessionId: number, speakerId: number, file: File) => {
     try {
       setUploadingId(sessionId);
       const formData = new FormData();
@@ -88,7 +134,14 @@ export default function UploaderPage() {
       );
 
       if (!response.ok) throw new Error("Upload failed");
-      if (eventIdFromUrl) await loadStats(eventIdFromUrl);
+      if (eventIdFromUrl) {
+        // Refresh the counts and the pages of this room already on screen
+        const loaded = presentations[room.room_name]?.items.length ?? 0;
+        await Promise.all([
+          loadStats(eventIdFromUrl, true),
+          loadPresentations(room, 0, Math.max(loaded, PAGE_SIZE)),
+        ]);
+      }
     } catch (err) {
       console.error("Upload failed:", err);
       alert("Upload failed");
@@ -165,13 +218,14 @@ export default function UploaderPage() {
       <div className="space-y-4">
         {stats.rooms.map((room) => {
           const isExpanded = expandedRooms.has(room.room_name);
+          const roomPresentations = presentations[room.room_name];
           const roomPercent = room.total > 0 ? Math.round((room.uploaded / room.total) * 100) : 0;
 
           return (
             <div key={room.room_name} className="border border-gray-200 rounded-xl overflow-hidden">
               {/* Room header */}
               <button
-                onClick={() => toggleRoom(room.room_name)}
+                onClick={() => toggleRoom(room)}
                 className="w-full flex items-center justify-between px-5 py-4 bg-gray-50 hover:bg-gray-100 transition text-left"
               >
                 <div className="flex items-center gap-3">
@@ -199,10 +253,12 @@ export default function UploaderPage() {
               {/* Room presentations list */}
               {isExpanded && (
                 <div className="divide-y divide-gray-100">
-                  {room.presentations.length === 0 ? (
+                  {!roomPresentations || (roomPresentations.loading && roomPresentations.items.length === 0) ? (
+                    <p className="text-gray-400 text-sm px-5 py-4">Loading presentations...</p>
+                  ) : roomPresentations.items.length === 0 ? (
                     <p className="text-gray-400 text-sm px-5 py-4">No presentations assigned to this room.</p>
                   ) : (
-                    room.presentations.map((p) => (
+                    roomPresentations.items.map((p) => (
                       <div key={p.id} className="flex items-center justify-between px-5 py-3">
                         <div className="flex-1 min-w-0">
                           <p className="text-sm font-medium text-gray-800 truncate">{p.filename}</p>
@@ -227,7 +283,7 @@ export default function UploaderPage() {
                                 disabled={uploadingId === p.id}
                                 onChange={(e) => {
                                   const file = e.target.files?.[0];
-                                  if (file) handleUpload(p.id, p.speaker_id, file);
+                                  if (file) handleUpload(room, p.id, p.speaker_id, file);
                                 }}
                               />
                             </label>
@@ -236,6 +292,17 @@ export default function UploaderPage() {
                       </div>
                     ))
                   )}
+                  {roomPresentations?.hasMore && (
+                    <button
+                      onClick={() => loadPresentations(room, roomPresentations.items.length)}
+                      disabled={roomPresentations.loading}
+                      className="w-full px-5 py-3 text-sm text-blue-600 hover:bg-gray-50 transition disabled:text-gray-400"
+                    >
+                      {roomPresentations.loading
+                        ? "Loading..."
+                        : `Show more (${roomPresentations.items.length} of ${room.total})`}
+                    </button>
+                  )}
                 </div>
               )}
             </div>
@@ -38,6 +38,8 @@ export interface AuthData {
   email?: string | null;
 }
 
+const WRITE_FENCE_HEADER = "X-Write-Fence";
+
 const client = axios.create({
   baseURL,
   headers: {
@@ -55,12 +57,20 @@ client.interceptors.request.use((config) => {
     delete config.headers["Content-Type"];
   }
 
+  // Read our own writes: the API routes reads to the primary for a while after a write
+  const writeFence = sessionStorage.getItem(WRITE_FENCE_HEADER);
+  if (writeFence) config.headers[WRITE_FENCE_HEADER] = writeFence;
+
   return config;
 });
 
 // Response interceptor
 client.interceptors.response.use(
-  (response) => response, // pass successful responses
+  (response) => {
+    const writeFence = response.headers[WRITE_FENCE_HEADER.toLowerCase()];
+    if (writeFence) sessionStorage.setItem(WRITE_FENCE_HEADER, writeFence);
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       // Token expired or invalid, redirect to login